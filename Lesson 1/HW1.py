@@ -1,43 +1,204 @@
+import asyncio
 import dotenv
 import os
-from langchain_google_genai import GoogleGenerativeAI
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_community.embeddings import HuggingFaceEmbeddings
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.llm_cache import ResponseCache, CachedLLM
+from common.chat_memory import ConversationMemory, estimate_tokens, make_llm_summarizer
+from common.policy_rag import ChromaSections, Retriever, SectionIndex, make_chunker
+from common.streaming import TimedStream, TTFTStats
+
+# Кеш відповідей: точний + семантичний (схожі питання отримують збережену відповідь)
+CACHE_DB = Path("data/llm_cache.sqlite")
+CACHE_EMB_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"  # None — лише точний кеш
+CACHE_THRESHOLD = 0.92      # мінімальна косинусна схожість для семантичного влучання
+CACHE_TTL = 7 * 24 * 3600   # секунд
+
+# Памʼять розмови: у промпт іде лише вікно останніх реплік (в токенах),
+# старші репліки стискаються в короткий зміст кожні SUMMARIZE_EVERY реплік
+MAX_WINDOW_TOKENS = 1500
+SUMMARIZE_EVERY = 4
+
+# RAG: замість усього return_policy.txt у промпт ідуть лише RAG_K найрелевантніших розділів.
+# Індекс розділів будується один раз і зберігається в RAG_INDEX_DIR (перебудовується, коли змінились файли)
+RAG = True
+RAG_K = 2
+RAG_EXTRA_DOCS: List[Path] = []            # інші txt-документи бази знань
+RAG_INDEX_DIR = Path("data/policy_index")
+RAG_EMB_MODEL = CACHE_EMB_MODEL or "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+RAG_CACHE_SIZE = 1024                      # скільки нормалізованих питань памʼятає кеш пошуку
+# Сховище HW 6/HW 7 як додаткове джерело: (persist_dir, collection, модель ембедінгів колекції) або None
+RAG_CHROMA = None  # ("chroma_db", "lesson_rag_docs", "sentence-transformers/all-MiniLM-L6-v2")
+RAG_INSTRUCTION = (
+    "Ти — бот підтримки інтернет-магазину з питань повернення товару. "
+    "Відповідай лише на основі наведених нижче розділів правил. Якщо відповіді в них немає — "
+    "так і скажи та порадь звернутися до служби підтримки."
+)
+
+# Друкувати відповідь по мірі генерації (токени), а не чекати повної відповіді
+STREAMING = True
 
 # Зчитування API ключа з .env
 dotenv.load_dotenv()
 api_key = os.getenv('GEMINI_API_KEY')
 
-# Ініціалізація моделі
-llm = GoogleGenerativeAI(
+# Ініціалізація моделі (чат-модель: правила йдуть окремою системною інструкцією)
+llm = ChatGoogleGenerativeAI(
     model='gemini-2.0-flash',
     google_api_key=api_key,
 )
 
-# Зчитування інструкції з файлу
-with open("return_policy.txt", encoding="utf-8") as f:
-    instruction = f.read().strip()
+cache_embeddings = HuggingFaceEmbeddings(model_name=CACHE_EMB_MODEL) if CACHE_EMB_MODEL else None
+cache = ResponseCache(
+    CACHE_DB,
+    namespace="return_policy",
+    embeddings=cache_embeddings,
+    threshold=CACHE_THRESHOLD,
+    ttl_seconds=CACHE_TTL,
+)
+cached_llm = CachedLLM(llm, cache)
+
+# Зчитування інструкції з файлу (поруч зі скриптом, якщо запуск не з цієї папки)
+policy_path = Path("return_policy.txt")
+if not policy_path.exists():
+    policy_path = Path(__file__).with_name("return_policy.txt")
+instruction = policy_path.read_text(encoding="utf-8").strip()
+instruction_tokens = estimate_tokens(instruction)
+
+
+def build_retriever() -> Retriever:
+    """Розділи правил (+ бази знань) з диска або, якщо файли змінились, — ембедінг заново."""
+    t0 = time.perf_counter()
+    embeddings = cache_embeddings if RAG_EMB_MODEL == CACHE_EMB_MODEL and cache_embeddings else \
+        HuggingFaceEmbeddings(model_name=RAG_EMB_MODEL)
+    index = SectionIndex.open_or_build([policy_path, *RAG_EXTRA_DOCS], embeddings, RAG_INDEX_DIR,
+                                       model_name=RAG_EMB_MODEL, chunker=make_chunker(RAG_EMB_MODEL))
+    sources = [index]
+    if RAG_CHROMA:
+        from langchain_community.vectorstores import Chroma
+
+        persist_dir, collection, model = RAG_CHROMA
+        sources.append(ChromaSections(Chroma(collection_name=collection, persist_directory=persist_dir,
+                                             embedding_function=HuggingFaceEmbeddings(model_name=model))))
+    print(f"[RAG] {len(index.sections)} розділів, індекс готовий за {(time.perf_counter() - t0) * 1000:.0f} мс")
+    return Retriever(sources, k=RAG_K, cache_size=RAG_CACHE_SIZE)
+
+
+retriever = build_retriever() if RAG else None
+
+
+def new_session() -> ConversationMemory:
+    """Памʼять розмови: інструкція задається один раз, історія обмежена вікном."""
+    return ConversationMemory(
+        system_instruction=RAG_INSTRUCTION if RAG else instruction,
+        max_window_tokens=MAX_WINDOW_TOKENS,
+        summarizer=make_llm_summarizer(llm),
+        summarize_every=SUMMARIZE_EVERY,
+    )
+
 
-# Початковий чат-історія
-chat_history = f"Instruction: {instruction}\n"
+def cache_key(memory: ConversationMemory, user_input: str, titles: List[str]) -> Optional[str]:
+    """
+    Ключ кешу відповідей або None — без кешу. Кеш спільний для всіх сесій (і в сервері сесій),
+    тож кешуємо лише відповіді, що залежать тільки від питання і знайдених розділів правил:
+    щойно в промпті є вікно реплік чи зміст розмови, відповідь — лише для цієї сесії.
+    """
+    if memory.window or memory.summary:
+        return None
+    return user_input if not titles else f"{user_input}\n[розділи: {'; '.join(titles)}]"
 
-print("Поставте запитання щодо повернення товару (натисніть Enter для завершення):")
 
-while True:
-    user_input = input("Human: ").strip()
-    if not user_input:
-        break
+def build_prompt(memory: ConversationMemory, user_input: str) -> Tuple[list, Optional[str]]:
+    """(повідомлення для LLM, ключ кешу); з RAG — лише знайдені під це питання розділи правил."""
+    sections = [s for s, _ in retriever.retrieve(user_input)] if retriever is not None else []
+    context = "\n\n".join(s.text for s in sections)
+    key = cache_key(memory, user_input, [f"{s.source}:{s.title}" for s in sections])
+    return memory.build_messages(user_input, context=context), key
 
-    chat_history += f"Human: {user_input}\n"
+
+def reply(memory: ConversationMemory, user_input: str) -> str:
+    messages, key = build_prompt(memory, user_input)
 
     # Виклик LLM для генерації відповіді
     try:
-        ai_response = llm.invoke(chat_history)
+        ai_response = cached_llm.invoke(messages, cache_key=key, use_cache=key is not None)
+    except Exception as e:
+        ai_response = "Виникла помилка під час виклику моделі: " + str(e)
+
+    # Додавання репліки до памʼяті
+    memory.add_turn(user_input, ai_response)
+    return ai_response
+
+
+async def areply(memory: ConversationMemory, user_input: str) -> str:
+    """Асинхронна версія reply для сервера сесій (common/session_server.py)."""
+    # пошук розділів (ембедінг питання, Chroma) блокує — у потік, щоб не гальмувати інші сесії
+    messages, key = await asyncio.to_thread(build_prompt, memory, user_input)
+    try:
+        ai_response = await cached_llm.ainvoke(messages, cache_key=key, use_cache=key is not None)
     except Exception as e:
         ai_response = "Виникла помилка під час виклику моделі: " + str(e)
+    # стиснення старих реплік — синхронний виклик LLM, тож не блокуємо event loop
+    await asyncio.to_thread(memory.add_turn, user_input, ai_response)
+    return ai_response
+
+
+def stream_reply(memory: ConversationMemory, user_input: str) -> TimedStream:
+    """Друкує відповідь по шматках; повертає TimedStream з текстом і TTFT."""
+    messages, key = build_prompt(memory, user_input)
+    stream = TimedStream(cached_llm.stream(messages, cache_key=key, use_cache=key is not None))
+    print("AI: ", end="", flush=True)
+    try:
+        for chunk in stream:
+            print(chunk, end="", flush=True)
+    except Exception as e:
+        print("Виникла помилка під час виклику моделі: " + str(e), end="")
+    print()
+    memory.add_turn(user_input, stream.text)
+    return stream
+
+
+def main():
+    memory = new_session()
+    ttft = TTFTStats()
+    print("Поставте запитання щодо повернення товару (натисніть Enter для завершення):")
+
+    while True:
+        user_input = input("Human: ").strip()
+        if not user_input:
+            break
+
+        if STREAMING:
+            stream = stream_reply(memory, user_input)
+            ttft.add(stream)
+            timing = f", TTFT {stream.metrics()['ttft_ms']} мс, всього {stream.metrics()['total_ms']} мс"
+        else:
+            ai_response = reply(memory, user_input)
+            # Вивід відповіді
+            print("AI:", ai_response)
+            timing = ""
+        t = memory.last_prompt_tokens
+        if retriever is not None:
+            rag = (f", розділи {t['context']} (замість документа {instruction_tokens}), пошук "
+                   f"{retriever.last_ms:.1f} мс{' з кешу' if retriever.last_cached else ''}")
+        else:
+            rag = ""
+        print(f"   [токенів у запиті ≈ {t['total']}: інструкція {t['system']}{rag}, зміст {t['summary']}, "
+              f"вікно {t['window']}, питання {t['question']}{timing}]")
 
-    # Додавання відповіді до історії
-    chat_history += f"AI: {ai_response}\n"
+    print("\nДякуємо за звернення!")
+    print(f"[Кеш відповідей] {cache.stats()}")
+    if retriever is not None:
+        print(f"[RAG] {retriever.stats()}")
+    if STREAMING:
+        print(f"[TTFT] {ttft.summary()}")
 
-    # Вивід відповіді
-    print("AI:", ai_response)
 
-print("\nДякуємо за звернення!")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Перевірка кешу відповідей (common/llm_cache.py) на локальній фейковій LLM — без API ключа.
+
+Фейкова модель "думає" --latency секунд на кожен виклик. Потік питань імітує
+бот повернення товару: багато повторів та перефразувань.
+Звіт: влучання (точні / семантичні), hit rate, зекономлений час.
+
+Приклад:
+    python bench_llm_cache.py --latency 0.5 --threshold 0.8
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.hash_embeddings import HashEmbeddings
+from common.llm_cache import CachedLLM, ResponseCache
+
+QUESTIONS = [
+    ["Скільки днів на повернення товару?", "скільки днів на повернення товару", "Скільки є днів на повернення товару?"],
+    ["Чи можна повернути товар без чека?", "чи можна повернути товар без чека?", "Чи можна повернути цей товар без чека"],
+    ["Як повернути гроші за товар?", "Як мені повернути гроші за товар?", "як повернути гроші за товар"],
+    ["Чи повертаються гроші за доставку?", "Чи повертаються гроші за доставку товару?"],
+    ["Який стан товару потрібен для повернення?", "який стан товару потрібен для повернення"],
+]
+
+
+class SlowFakeLLM:
+    """Імітація LLM: відповідь залежить від промпту, затримка фіксована."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+
+    def invoke(self, prompt):
+        self.calls += 1
+        time.sleep(self.latency)
+        return f"Відповідь на: {prompt}"
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--turns", type=int, default=200)
+    ap.add_argument("--latency", type=float, default=0.2, help="секунд на виклик фейкової LLM")
+    ap.add_argument("--threshold", type=float, default=0.8, help="поріг семантичної схожості")
+    ap.add_argument("--no-semantic", action="store_true", help="лише точний кеш")
+    args = ap.parse_args()
+
+    rnd = random.Random(0)
+    stream = [rnd.choice(rnd.choice(QUESTIONS)) for _ in range(args.turns)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ResponseCache(Path(tmp) / "cache.sqlite", namespace="bench",
+                              embeddings=None if args.no_semantic else HashEmbeddings(),
+                              threshold=args.threshold)
+        fake = SlowFakeLLM(args.latency)
+        llm = CachedLLM(fake, cache)
+        t0 = time.perf_counter()
+        for q in stream:
+            llm.invoke(q, cache_key=q)
+        elapsed = time.perf_counter() - t0
+
+    stats = cache.stats()
+    print(f"Реплік: {len(stream)}, викликів LLM: {fake.calls}")
+    print(f"Точних влучань: {stats['exact_hits']}, семантичних: {stats['semantic_hits']}, промахів: {stats['misses']}")
+    print(f"Hit rate: {stats['hit_rate']:.1%}")
+    print(f"Час: {elapsed:.2f} с замість {len(stream) * args.latency:.2f} с без кешу "
+          f"(зекономлено {stats['saved_seconds']:.2f} с)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+RAG для бота повернення (common/policy_rag.py) проти "увесь документ у промпті" — офлайн, без API ключа.
+
+Ембедінги — HashEmbeddings (без моделі), тож якість пошуку тут нижча, ніж із
+sentence-transformer; міряється механіка:
+- старт: побудова індексу розділів (ембедінг) проти підвантаження збереженого;
+- токени промпту на хід: весь return_policy.txt (+ --extra-sections розділів бази знань)
+  проти RAG_K розділів;
+- час пошуку: перше питання проти повтору/перефразування з кешу (нормалізоване питання);
+- чи потрапляє в top-k розділ, де справді є відповідь.
+
+Приклади:
+    python bench_rag_policy.py
+    python bench_rag_policy.py --k 2 --extra-sections 300 --rounds 20
+"""
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent))
+from common.chat_memory import ConversationMemory, estimate_tokens
+from common.hash_embeddings import HashEmbeddings
+from common.policy_rag import Retriever, SectionIndex, make_chunker
+
+# (варіанти питання, номер розділу правил з відповіддю)
+QUESTIONS = [
+    (["Скільки днів є на повернення товару?", "скільки днів є на повернення товару",
+      "Протягом скількох календарних днів можна повернути товар?"], "1."),
+    (["Чи можна повернути товар без оригінального пакування?", "чи можна повернути товар без пакування"], "2."),
+    (["Чи можна повернути косметику або медикаменти?", "Які товари не підлягають поверненню?"], "3."),
+    (["Як подати заявку на повернення?", "як подати заявку на повернення товару"], "4."),
+    (["Коли повернуть гроші?", "За скільки робочих днів повертаються кошти?"], "5."),
+    (["Який телефон підтримки?", "Куди писати на email щодо повернення?"], "6."),
+]
+
+KB_WORDS = ("доставка оплата кур'єр самовивіз гарантія сервіс ремонт обмін знижка бонус акція "
+            "замовлення склад відділення статус трек номер рахунок картка готівка розстрочка").split()
+
+
+def write_knowledge(path: Path, n_sections: int, seed: int = 1) -> Path:
+    """Синтетична база знань: блоки через два порожні рядки, як у huge_file.txt."""
+    rnd = random.Random(seed)
+    with path.open("w", encoding="utf-8") as f:
+        for i in range(n_sections):
+            body = " ".join(rnd.choice(KB_WORDS) for _ in range(rnd.randint(40, 120)))
+            f.write(f"Довідка {i}: {rnd.choice(KB_WORDS)}\n{body}.\n\n\n")
+    return path
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--k", type=int, default=2)
+    ap.add_argument("--extra-sections", type=int, default=0, help="розділів синтетичної бази знань поруч із правилами")
+    ap.add_argument("--rounds", type=int, default=10, help="скільки разів прогнати набір питань (повтори йдуть із кешу)")
+    args = ap.parse_args()
+
+    emb = HashEmbeddings()
+    policy = HERE / "return_policy.txt"
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [policy] + ([write_knowledge(Path(tmp) / "kb.txt", args.extra_sections)] if args.extra_sections else [])
+        full_doc = "\n\n".join(p.read_text(encoding="utf-8") for p in paths)
+        index_dir = Path(tmp) / "index"
+
+        t0 = time.perf_counter()
+        index = SectionIndex.open_or_build(paths, emb, index_dir, model_name="hash", chunker=make_chunker())
+        build_ms = (time.perf_counter() - t0) * 1000
+        t0 = time.perf_counter()
+        SectionIndex.open_or_build(paths, emb, index_dir, model_name="hash", chunker=make_chunker())
+        load_ms = (time.perf_counter() - t0) * 1000
+        print(f"Розділів: {len(index.sections)}; старт: побудова {build_ms:.1f} мс, з диска {load_ms:.1f} мс")
+
+        retriever = Retriever([index], k=args.k)
+        full_mem = ConversationMemory(system_instruction=full_doc, max_window_tokens=0)
+        rag_mem = ConversationMemory(system_instruction="Відповідай лише за розділами правил нижче.",
+                                     max_window_tokens=0)
+        stream = [(q, sec) for _ in range(args.rounds) for variants, sec in QUESTIONS for q in variants]
+        random.Random(0).shuffle(stream)
+
+        full_tokens, rag_tokens, cold_ms, warm_ms, found = [], [], [], [], 0
+        for q, sec in stream:
+            full_mem.build_messages(q)
+            full_tokens.append(full_mem.last_prompt_tokens["total"])
+            hits = retriever.retrieve(q)
+            (warm_ms if retriever.last_cached else cold_ms).append(retriever.last_ms)
+            found += any(s.text.startswith(sec) for s, _ in hits)
+            rag_mem.build_messages(q, context="\n\n".join(s.text for s, _ in hits))
+            rag_tokens.append(rag_mem.last_prompt_tokens["total"])
+
+        print(f"Документ цілком: ≈{estimate_tokens(full_doc)} токенів")
+        print({"mode": "весь документ", "prompt_tokens_avg": round(statistics.mean(full_tokens))})
+        print({"mode": f"RAG k={args.k}", "prompt_tokens_avg": round(statistics.mean(rag_tokens)),
+               "saved": f"{1 - statistics.mean(rag_tokens) / statistics.mean(full_tokens):.0%}",
+               "answer_section_in_top_k": round(found / len(stream), 3)})
+        print({"retrieval": "без кешу", "n": len(cold_ms), "p50_ms": round(statistics.median(cold_ms), 3)})
+        if warm_ms:
+            print({"retrieval": "з кешу", "n": len(warm_ms), "p50_ms": round(statistics.median(warm_ms), 4)})
+        print(retriever.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,15 @@
 from langchain_google_genai import GoogleGenerativeAI
 from langchain.prompts import PromptTemplate
-from langchain.output_parsers import ResponseSchema, StructuredOutputParser
+from langchain.output_parsers import ResponseSchema
 import dotenv
 import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.chain_dag import ChainDAG
+from common.rate_limit import TokenBucket
+from common.structured_output import CompactOutputParser
 
 # Завантаження API ключа
 dotenv.load_dotenv()
@@ -19,10 +26,10 @@ llm = GoogleGenerativeAI(
 # Схема для вправ
 schemas_exercises = [
     ResponseSchema(name='goal', description='мета тренування'),
-    ResponseSchema(name='exercises', description='список рекомендованих вправ')
+    ResponseSchema(name='exercises', description='список рекомендованих вправ', type='list')
 ]
 
-parser_exercises = StructuredOutputParser.from_response_schemas(schemas_exercises)
+parser_exercises = CompactOutputParser.from_response_schemas(schemas_exercises)
 instructions_ex = parser_exercises.get_format_instructions()
 
 prompt_exercises = PromptTemplate.from_template(
@@ -46,7 +53,7 @@ schemas_plan = [
     ResponseSchema(name='training_plan', description='детальний тренувальний план на тиждень')
 ]
 
-parser_plan = StructuredOutputParser.from_response_schemas(schemas_plan)
+parser_plan = CompactOutputParser.from_response_schemas(schemas_plan)
 instructions_plan = parser_plan.get_format_instructions()
 
 prompt_plan = PromptTemplate.from_template(
@@ -69,22 +76,26 @@ prompt_plan = PromptTemplate.from_template(
 chain_plan = prompt_plan | llm | parser_plan
 
 
+# Конвеєр: вправи -> план (етапи з залежностями, ліміт запитів до API)
+fitness_dag = ChainDAG(rate_limiter=TokenBucket(rate=10, burst=10))
+fitness_dag.add("exercises", chain_exercises, inputs=lambda c: {"goal": c["goal"]})
+fitness_dag.add("plan", chain_plan, deps=["exercises"], inputs=lambda c: {
+    "exercises": c["exercises"]["exercises"],
+    "level": c["level"],
+    "hours": c["hours"],
+})
 
 
 # Крок 1: мета тренування
 goal_input = "схуднення"
-ex_result = chain_exercises.invoke({"goal": goal_input})
 
 # Крок 2: рівень та час
 user_level = "середній"
 weekly_hours = 4
 
 # Генеруємо тренувальний план
-plan_result = chain_plan.invoke({
-    "exercises": ex_result['exercises'],
-    "level": user_level,
-    "hours": weekly_hours
-})
+result = fitness_dag.invoke({"goal": goal_input, "level": user_level, "hours": weekly_hours})
+ex_result, plan_result = result["exercises"], result["plan"]
 
 # Вивід
 print("Вправи:")
@@ -92,3 +103,12 @@ print(ex_result['exercises'])
 
 print("\nПлан тренувань:")
 print(plan_result['training_plan'])
+
+# Кілька користувачів одночасно
+users = [
+    {"goal": "набір мʼязової маси", "level": "початковий", "hours": 3},
+    {"goal": "витривалість", "level": "просунутий", "hours": 6},
+]
+for u, r in zip(users, fitness_dag.batch(users, max_concurrency=4)):
+    print(f"\n{u['goal']}: {r['plan']['training_plan']}")
+print(fitness_dag.trace_summary())
@@ -1,10 +1,18 @@
 from langchain_google_genai import GoogleGenerativeAI
 from langchain.prompts import PromptTemplate
-from langchain.output_parsers import ResponseSchema, StructuredOutputParser
+from langchain.output_parsers import ResponseSchema
 
 import json
 import dotenv
 import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.streaming import TimedStream, iter_partial_json
+from common.chain_dag import ChainDAG
+from common.rate_limit import TokenBucket
+from common.structured_output import CompactOutputParser
 
 # завантажити api ключі з папки .env
 dotenv.load_dotenv()
@@ -42,7 +50,9 @@ schemas = [
 ]
 
 # створення парсер
-parser = StructuredOutputParser.from_response_schemas(schemas)
+# (компактні інструкції формату + локальне виправлення кривого JSON;
+#  StructuredOutputParser з тими ж schemas теж працює, але довший промпт і падає на дрібних помилках)
+parser = CompactOutputParser.from_response_schemas(schemas)
 
 # отримати інструкція для llm
 instructions = parser.get_format_instructions()
@@ -70,9 +80,20 @@ prompt = PromptTemplate.from_template(
 # створення ланцюга
 chain = prompt | llm | parser
 
-response = chain.invoke({
+# response = chain.invoke({
+#     "question": "Коли була написана книга 1984",
+# })
+
+# потоковий варіант: парсер розбирає лише готову відповідь,
+# тому стрімимо prompt | llm і показуємо поля JSON, щойно вони зʼявились
+stream = TimedStream((prompt | llm).stream({
     "question": "Коли була написана книга 1984",
-})
+}))
+for partial in iter_partial_json(stream):
+    print("…", partial)
+print(stream.metrics())  # TTFT та повний час
+
+response = parser.parse(stream.text)
 
 print(response)
 print(response['theme'])
@@ -123,10 +144,10 @@ recommendation = chain_recommendation.invoke({
 # дістати всі назви книг з рекомендації
 
 schemas = [
-    ResponseSchema(name='books', description='список з назвами книг')
+    ResponseSchema(name='books', description='список з назвами книг', type='list')
 ]
 
-parser = StructuredOutputParser.from_response_schemas(schemas)
+parser = CompactOutputParser.from_response_schemas(schemas)
 instructions = parser.get_format_instructions()
 
 prompt = PromptTemplate.from_template(
@@ -150,4 +171,27 @@ response = chain_book_selector.invoke({
 print(response)
 
 for book in response['books']:
-    print(book)
\ No newline at end of file
+    print(book)
+
+
+# ------------------------------
+# Той самий конвеєр як DAG: етапи оголошені з залежностями,
+# і багато питань обробляються одночасно (з обмеженням частоти запитів до API)
+
+book_dag = ChainDAG(rate_limiter=TokenBucket(rate=10, burst=10))  # ~10 запитів/с до Gemini
+book_dag.add("info", chain, inputs=lambda c: {"question": c["question"]})
+book_dag.add("recommendation", chain_recommendation, deps=["info"],
+             inputs=lambda c: {"genre": c["info"]["genre"], "author": c["info"]["author"], "theme": c["info"]["theme"]})
+book_dag.add("books", chain_book_selector, deps=["recommendation"],
+             inputs=lambda c: {"text": c["recommendation"]})
+
+questions = [
+    "Коли була написана книга 1984",
+    "Про що роман Майстер і Маргарита",
+    "Хто головний герой Тіней забутих предків",
+]
+results = book_dag.batch([{"question": q} for q in questions], max_concurrency=5)
+for r in results:
+    print(r["question"], "->", r["books"]["books"])
+
+print(book_dag.trace_summary())  # латентність кожного етапу
\ No newline at end of file
@@ -0,0 +1,81 @@
+"""
+Бенчмарк ChainDAG (common/chain_dag.py) на заглушках замість Gemini.
+
+Три етапи як у Lesson 3.py (info -> recommendation -> books), кожен — async-функція
+зі сном --latency секунд. Порівнюємо послідовне виконання (як у скрипті зараз:
+3 × латентність на питання) з dag.batch() при різних max_concurrency.
+
+Приклад:
+    python "Lesson 3/bench_dag.py" --questions 1000 --latency 0.05 --concurrency 1 10 50 200
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.chain_dag import ChainDAG
+from common.rate_limit import TokenBucket
+
+
+def make_stage(latency: float, jitter: float, fn):
+    async def run(value):
+        await asyncio.sleep(latency + random.random() * jitter)
+        return fn(value)
+    return run
+
+
+def build_dag(latency: float, jitter: float, rate: float) -> ChainDAG:
+    limiter = TokenBucket(rate=rate, burst=int(rate)) if rate > 0 else None
+    dag = ChainDAG(rate_limiter=limiter)
+    dag.add("info", make_stage(latency, jitter, lambda v: {"genre": "роман", "author": "Орвелл", "theme": v}),
+            inputs=lambda c: c["question"])
+    dag.add("recommendation", make_stage(latency, jitter, lambda v: f"Схожі на {v['author']}: ..."),
+            deps=["info"], inputs=lambda c: c["info"])
+    dag.add("books", make_stage(latency, jitter, lambda v: {"books": ["Мы", "О дивний новий світ"]}),
+            deps=["recommendation"], inputs=lambda c: c["recommendation"])
+    return dag
+
+
+async def run_sequential(dag: ChainDAG, questions):
+    for q in questions:
+        await dag.ainvoke({"question": q})
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--questions", type=int, default=1000)
+    ap.add_argument("--latency", type=float, default=0.05, help="латентність одного виклику LLM, с")
+    ap.add_argument("--jitter", type=float, default=0.02)
+    ap.add_argument("--rate", type=float, default=0, help="ліміт викликів/с (0 — без ліміту)")
+    ap.add_argument("--concurrency", type=int, nargs="+", default=[10, 50, 200])
+    ap.add_argument("--sequential-sample", type=int, default=50,
+                    help="скільки питань прогнати послідовно (решту екстраполюємо)")
+    args = ap.parse_args()
+
+    questions = [f"питання {i}" for i in range(args.questions)]
+
+    dag = build_dag(args.latency, args.jitter, args.rate)
+    n = min(args.sequential_sample, args.questions)
+    t0 = time.perf_counter()
+    asyncio.run(run_sequential(dag, questions[:n]))
+    per_q = (time.perf_counter() - t0) / n
+    print(f"послідовно:          {per_q * 1000:7.1f} мс/питання  -> {per_q * args.questions:7.1f} с на {args.questions} "
+          f"({1 / per_q:7.1f} питань/с)")
+
+    for c in args.concurrency:
+        dag = build_dag(args.latency, args.jitter, args.rate)
+        t0 = time.perf_counter()
+        results = dag.batch([{"question": q} for q in questions], max_concurrency=c)
+        elapsed = time.perf_counter() - t0
+        assert len(results) == args.questions and all("books" in r for r in results)
+        waited = dag.rate_limiter.waited if dag.rate_limiter else 0.0
+        print(f"batch, concurrency={c:<4} {elapsed:7.2f} с  ({args.questions / elapsed:7.1f} питань/с, "
+              f"прискорення ×{per_q * args.questions / elapsed:.1f}, очікування ліміту {waited:.1f} с)")
+        print(f"    етапи: {dag.trace_summary()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Бенчмарк CompactOutputParser (common/structured_output.py) проти StructuredOutputParser.
+
+1. Токени інструкцій формату в промпті для схем з Lesson 3.py та HW3.py.
+2. Розбір записаних відповідей моделі (recorded_outputs.jsonl): скільки
+   StructuredOutputParser не розібрав би (= повторний запит до LLM), скільки з них
+   компактний парсер виправив локально, і час розбору. Обірвані відповіді, з яких
+   узято лише повні поля, показуються окремо й до уникнутих повторів не входять.
+
+Приклад:
+    python "Lesson 3/bench_structured_output.py"
+"""
+import argparse
+import json
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+from langchain.output_parsers import ResponseSchema, StructuredOutputParser
+from langchain_core.exceptions import OutputParserException
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.chat_memory import estimate_tokens
+from common.structured_output import CompactOutputParser
+
+HERE = Path(__file__).resolve().parent
+
+SCHEMAS = {
+    "book_info": [
+        ResponseSchema(name='answer', description='відповідь на питання користувача'),
+        ResponseSchema(name='theme', description='головна тема книги'),
+        ResponseSchema(name='author', description='автор книги'),
+        ResponseSchema(name='genre', description='жанр книги'),
+    ],
+    "books": [ResponseSchema(name='books', description='список з назвами книг', type='list')],
+    "exercises": [
+        ResponseSchema(name='goal', description='мета тренування'),
+        ResponseSchema(name='exercises', description='список рекомендованих вправ', type='list'),
+    ],
+    "plan": [ResponseSchema(name='training_plan', description='детальний тренувальний план на тиждень')],
+}
+
+
+def try_parse(parser, text):
+    try:
+        return parser.parse(text)
+    except OutputParserException:
+        return None
+
+
+def time_parse(parser, texts, repeats):
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        for text in texts:
+            try_parse(parser, text)
+    return (time.perf_counter() - t0) / (repeats * len(texts)) * 1e6
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--corpus", type=Path, default=HERE / "recorded_outputs.jsonl")
+    ap.add_argument("--repeats", type=int, default=200)
+    ap.add_argument("--verbose", action="store_true", help="показати результат для кожної відповіді")
+    args = ap.parse_args()
+
+    std = {name: StructuredOutputParser.from_response_schemas(s) for name, s in SCHEMAS.items()}
+    compact = {name: CompactOutputParser.from_response_schemas(s) for name, s in SCHEMAS.items()}
+
+    print("Токени інструкцій формату (оцінка):")
+    total_std = total_compact = 0
+    for name in SCHEMAS:
+        a = estimate_tokens(std[name].get_format_instructions())
+        b = estimate_tokens(compact[name].get_format_instructions())
+        total_std += a
+        total_compact += b
+        print(f"  {name:<10} {a:4d} -> {b:4d}  (-{100 * (a - b) / a:.0f}%)")
+    print(f"  {'разом':<10} {total_std:4d} -> {total_compact:4d}  (-{100 * (total_std - total_compact) / total_std:.0f}%)")
+
+    rows = [json.loads(line) for line in args.corpus.read_text(encoding="utf-8").splitlines() if line.strip()]
+    outcome = Counter()
+    from_partial = 0
+    for row in rows:
+        s_ok = try_parse(std[row["schema"]], row["text"]) is not None
+        before = dict(compact[row["schema"]].stats)
+        c_res = try_parse(compact[row["schema"]], row["text"])
+        c_ok = c_res is not None
+        if c_ok and not s_ok and compact[row["schema"]].stats["partial"] > before["partial"]:
+            from_partial += 1  # дані з обірваної відповіді — не рахуємо як уникнутий повтор
+            c_ok = False
+        outcome[(s_ok, c_ok)] += 1
+        if args.verbose:
+            print(f"  [{'ok' if s_ok else '--'} | {'ok' if c_ok else '--'}] {row['schema']:<10} {row['note']}"
+                  + (f" -> {c_res}" if c_ok and not s_ok else ""))
+
+    n = len(rows)
+    std_fail = sum(v for (s_ok, _), v in outcome.items() if not s_ok)
+    avoided = outcome[(False, True)]
+    regressions = outcome[(True, False)]
+    stats = Counter()
+    for p in compact.values():
+        stats.update(p.stats)
+    print(f"\nЗаписаних відповідей: {n}")
+    print(f"  StructuredOutputParser: не розібрано {std_fail} ({100 * std_fail / n:.0f}%) -> {std_fail} повторних запитів")
+    print(f"  CompactOutputParser:    strict {stats['strict']}, виправлено {stats['repaired']}, "
+          f"з обірваних {stats['partial']}, не розібрано {stats['failed']}")
+    print(f"  уникнуто повторних запитів: {avoided} з {std_fail}; розібрано стандартним, але не компактним: {regressions}")
+    print(f"  з обірваних відповідей (усі поля повні, не зараховано): {from_partial}")
+
+    by_schema = {}
+    for row in rows:
+        by_schema.setdefault(row["schema"], []).append(row["text"])
+    us_std = sum(time_parse(std[k], v, args.repeats) * len(v) for k, v in by_schema.items()) / n
+    us_compact = sum(time_parse(compact[k], v, args.repeats) * len(v) for k, v in by_schema.items()) / n
+    print(f"\nЧас розбору: StructuredOutputParser {us_std:.1f} мкс, CompactOutputParser {us_compact:.1f} мкс на відповідь")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,27 @@
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.prompts import PromptTemplate
 from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_community.embeddings import HuggingFaceEmbeddings
 import json
 import dotenv
 import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from common.llm_cache import ResponseCache, CachedLLM
+from common.streaming import TimedStream, TTFTStats
+from order_engine import OrderEngine
+
+# Кеш відповідей: точний + семантичний (схожі питання отримують збережену відповідь)
+CACHE_DB = Path("data/llm_cache.sqlite")
+CACHE_EMB_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"  # None — лише точний кеш
+CACHE_THRESHOLD = 0.92
+CACHE_TTL = 24 * 3600  # меню/ціни можуть змінитись — тримаємо відповіді добу
+
+# Друкувати відповідь по мірі генерації (токени), а не чекати повної відповіді
+STREAMING = True
 
 # Завантаження API ключа з .env
 dotenv.load_dotenv()
@@ -18,8 +36,16 @@ menu = {
     "Вегетаріанська": {"Мала": 130, "Велика": 190}
 }
 
-# Словник для зберігання замовлення
+# Словник для зберігання замовлення (консольний режим; у сервері сесій — свій на кожну сесію)
+# {назва: {розмір: кількість}}
 order = {}
+session = {"order": order}
+
+# Меню в промпті не змінюється — серіалізуємо один раз
+MENU_JSON = json.dumps(menu, ensure_ascii=False)
+
+# Прості репліки (меню, додати/прибрати піцу, сума) обробляються локально, без LLM
+engine = OrderEngine(menu)
 
 # Створення LLM
 llm = ChatGoogleGenerativeAI(
@@ -38,31 +64,89 @@ template = """
 Меню (назва - ціна Мала/Велика):
 {menu_json}
 
+Поточне замовлення:
+{order_text}
+
 Користувач: {user_input}
 Відповідай українською.
 """
 
 prompt = PromptTemplate(
-    input_variables=["menu_json", "user_input"],
+    input_variables=["menu_json", "order_text", "user_input"],
     template=template
 )
 
-def chat_with_bot(user_input):
+cache = ResponseCache(
+    CACHE_DB,
+    namespace="pizzeria",
+    embeddings=HuggingFaceEmbeddings(model_name=CACHE_EMB_MODEL) if CACHE_EMB_MODEL else None,
+    threshold=CACHE_THRESHOLD,
+    ttl_seconds=CACHE_TTL,
+)
+cached_llm = CachedLLM(llm, cache)
+
+def build_messages(user_input, order=None):
     formatted_prompt = prompt.format(
-        menu_json=json.dumps(menu, ensure_ascii=False),
+        menu_json=MENU_JSON,
+        order_text=engine.format_order(order or {}),
         user_input=user_input
     )
-
-    response = llm([
+    return [
         SystemMessage(content="Ти працюєш як бот замовлень піци."),
         HumanMessage(content=formatted_prompt)
-    ])
-    return response.content
-
-while True:
-    user_input = input("Ви: ")
-    if user_input.lower() in ["вихід", "exit"]:
-        print("Бот: Дякуємо, гарного дня!")
-        break
-    answer = chat_with_bot(user_input)
-    print("Бот:", answer)
+    ]
+
+def cache_key(user_input, order):
+    # промпт залежить від меню, замовлення та репліки; при порожньому замовленні ключ — сама репліка
+    return user_input if not order else f"{user_input}\n[{engine.format_order(order)}]"
+
+def chat_with_bot(user_input, session=session):
+    reply = engine.handle(session, user_input)
+    if reply is not None:
+        return reply
+    return cached_llm.invoke(build_messages(user_input, session["order"]), cache_key=cache_key(user_input, session["order"]))
+
+# ---------- Інтерфейс для сервера сесій (common/session_server.py) ----------
+def new_session():
+    return {"order": {}}
+
+async def areply(session, user_input):
+    reply = engine.handle(session, user_input)
+    if reply is not None:
+        return reply
+    return await cached_llm.ainvoke(build_messages(user_input, session["order"]),
+                                    cache_key=cache_key(user_input, session["order"]))
+
+def stream_chat_with_bot(user_input, session=session):
+    """Друкує відповідь по шматках; повертає TimedStream з TTFT."""
+    reply = engine.handle(session, user_input)
+    if reply is not None:
+        stream = TimedStream([reply])
+    else:
+        stream = TimedStream(cached_llm.stream(build_messages(user_input, session["order"]),
+                                               cache_key=cache_key(user_input, session["order"])))
+    print("Бот: ", end="", flush=True)
+    for chunk in stream:
+        print(chunk, end="", flush=True)
+    print(f"\n   [TTFT {stream.metrics()['ttft_ms']} мс, всього {stream.metrics()['total_ms']} мс]")
+    return stream
+
+def main():
+    ttft = TTFTStats()
+    while True:
+        user_input = input("Ви: ")
+        if user_input.lower() in ["вихід", "exit"]:
+            print("Бот: Дякуємо, гарного дня!")
+            print(f"[Кеш відповідей] {cache.stats()}")
+            print(f"[Локальний рушій] оброблено без LLM: {engine.stats['rule']}, через LLM: {engine.stats['llm']}")
+            if STREAMING:
+                print(f"[TTFT] {ttft.summary()}")
+            break
+        if STREAMING:
+            ttft.add(stream_chat_with_bot(user_input))
+        else:
+            answer = chat_with_bot(user_input)
+            print("Бот:", answer)
+
+if __name__ == "__main__":
+    main()
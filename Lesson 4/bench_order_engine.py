@@ -0,0 +1,97 @@
+"""
+Бенчмарк локального рушія замовлень (order_engine.py) на записаних розмовах.
+
+Для кожної репліки з recorded_conversations.jsonl: чи обробив її рушій без LLM,
+скільки це зайняло, і чи збігається підсумкове замовлення з очікуваним
+(репліки, віддані LLM, замовлення тут не змінюють). llm_turns у розмові — номери
+реплік, які рушій мусить віддати LLM (заперечення, "без цибулі", "все, а ...?",
+"на 2 персони"); кожну, оброблену правилами, звіт показує як хибну.
+Економія LLM оцінюється в токенах промпта HW 4 (шаблон і меню беруться з "HW 4.py"),
+який довелось би відправити на кожну репліку без рушія.
+
+Приклад:
+    python "Lesson 4/bench_order_engine.py" --verbose
+"""
+import argparse
+import ast
+import json
+import sys
+import time
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent))
+sys.path.insert(0, str(HERE))
+from common.chat_memory import estimate_tokens
+from order_engine import OrderEngine
+
+
+def hw4_constants():
+    """menu і template з "HW 4.py" без імпорту скрипта (він створює LLM і кеш)."""
+    tree = ast.parse((HERE / "HW 4.py").read_text(encoding="utf-8"))
+    found = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and isinstance(node.targets[0], ast.Name) \
+                and node.targets[0].id in ("menu", "template"):
+            found[node.targets[0].id] = ast.literal_eval(node.value)
+    return found["menu"], found["template"]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--corpus", type=Path, default=HERE / "recorded_conversations.jsonl")
+    ap.add_argument("--repeats", type=int, default=200, help="повторів для заміру часу")
+    ap.add_argument("--verbose", action="store_true")
+    args = ap.parse_args()
+
+    menu, template = hw4_constants()
+    menu_json = json.dumps(menu, ensure_ascii=False)
+    convs = [json.loads(line) for line in args.corpus.read_text(encoding="utf-8").splitlines() if line.strip()]
+
+    engine = OrderEngine(menu)
+    turns = rule_turns = tokens_all = tokens_llm = 0
+    wrong, misrouted = [], []
+    for i, conv in enumerate(convs):
+        session = {"order": {}}
+        for j, text in enumerate(conv["turns"]):
+            prompt_tokens = estimate_tokens(template.format(menu_json=menu_json, order_text=engine.format_order(session["order"]),
+                                                            user_input=text))
+            reply = engine.handle(session, text)
+            turns += 1
+            tokens_all += prompt_tokens
+            if reply is None:
+                tokens_llm += prompt_tokens
+            else:
+                rule_turns += 1
+                if j in conv.get("llm_turns", ()):
+                    misrouted.append((i, text, reply))
+            if args.verbose:
+                print(f"  [{'rule' if reply is not None else 'LLM '}] {text}")
+        if session["order"] != conv["expected_order"]:
+            wrong.append((i, session["order"], conv["expected_order"]))
+
+    texts = [t for conv in convs for t in conv["turns"]]
+    t0 = time.perf_counter()
+    for _ in range(args.repeats):
+        for conv in convs:
+            session = {"order": {}}
+            for text in conv["turns"]:
+                engine.handle(session, text)
+    us_per_turn = (time.perf_counter() - t0) / (args.repeats * len(texts)) * 1e6
+
+    print(f"Розмов: {len(convs)}, реплік: {turns}")
+    print(f"  оброблено локально: {rule_turns} ({100 * rule_turns / turns:.0f}%), через LLM: {turns - rule_turns}")
+    print(f"  час рушія: {us_per_turn:.1f} мкс на репліку")
+    print(f"  токени промпта (оцінка): без рушія {tokens_all}, з рушієм {tokens_llm} "
+          f"(-{100 * (tokens_all - tokens_llm) / tokens_all:.0f}%)")
+    print(f"  підсумкове замовлення збіглося: {len(convs) - len(wrong)}/{len(convs)}")
+    for i, got, exp in wrong:
+        print(f"    розмова {i}: отримано {got}, очікувалось {exp}")
+    n_llm = sum(len(conv.get("llm_turns", ())) for conv in convs)
+    print(f"  репліки, що мають іти в LLM: {n_llm - len(misrouted)}/{n_llm} віддано LLM")
+    for i, text, reply in misrouted:
+        print(f"    розмова {i}: \"{text}\" оброблено правилами: {reply.splitlines()[0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""
+Локальний рушій замовлень для бота піцерії (HW 4) — без виклику LLM.
+
+Розпізнає прості репліки за словником меню:
+- "покажи меню", "скільки коштує Пепероні";
+- додавання: "2 великі Пепероні і одну малу Маргариту" (назва, розмір, кількість);
+  якщо розмір не вказано — перепитує і чекає відповіді ("велику");
+- видалення / заміна: "прибери Гавайську", "заміни Маргариту на Пепероні";
+- стан: "моє замовлення", "скільки до сплати", "очисти замовлення", "підтверджую".
+
+Замовлення зберігається в session["order"] як {назва: {розмір: кількість}},
+сума рахується локально. Якщо репліку не розпізнано, handle() повертає None —
+тоді відповідає LLM. Так само LLM віддаються репліки, які правила легко
+зрозуміли б хибно: заперечення перед назвою ("не хочу Пепероні"), "без X" як
+побажання до начинки ("Маргариту без цибулі"), "все" разом із питанням і числа,
+не привʼязані до піци ("Маргариту на 2 персони").
+"""
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+NUMBER_WORDS = {
+    "один": 1, "одна": 1, "одну": 1, "одне": 1, "одного": 1,
+    "два": 2, "дві": 2, "двох": 2, "пару": 2, "пара": 2,
+    "три": 3, "трьох": 3, "чотири": 4, "чотирьох": 4,
+    "пʼять": 5, "шість": 6, "сім": 7, "вісім": 8, "девʼять": 9, "десять": 10,
+}
+NUMBER_RE = re.compile(r"\b(\d{1,2})\b|\b(" + "|".join(NUMBER_WORDS) + r")\b")
+NUM = r"\b(?:\d{1,2}|" + "|".join(NUMBER_WORDS) + r")\b"
+# кількість одразу після назви: "Пепероні 2 шт", "Маргарита x2"
+QTY_AFTER_RE = re.compile(r"\s*(?:[x×]\s*(\d{1,2})\b|" + NUM + r"(?:\s*шт\w*\.?)?)")
+
+MENU_RE = re.compile(r"меню|які (є )?піц|що (у вас )?є|асортимент")
+PRICE_RE = re.compile(r"скільки кошту|ціна|почім|вартість")
+ADD_RE = re.compile(r"хочу|додай|додати|замов|візьму|беру|ще |дайте|будь ласка")
+REMOVE_RE = re.compile(r"прибер|видал|забер|не треба|не потрібн|скасуй|відмін")
+NEGATION_RE = re.compile(r"\bне (хочу|треба|потрібн\w*|буду|беру|бери|додавай)\b")
+WITHOUT_RE = re.compile(r"\bбез\s+")
+CHANGE_RE = re.compile(r"замін|поміня|змін")
+SHOW_RE = re.compile(r"моє замовлення|що (я )?замовив|що в замовленні|сума|до сплати|разом|скільки (все )?(це )?кошту(є|ватиме) (все|замовлення)")
+CLEAR_RE = re.compile(r"очист|скасуй (все|замовлення)|скасувати замовлення|почати (з)?нову")
+CONFIRM_RE = re.compile(r"підтверд|оформ|це все|на цьому все|^все[,.! ]|^все$")
+GREETING_RE = re.compile(r"^(привіт|вітаю|добрий (день|вечір)|доброго дня)[!. ]*$")
+QUESTION_RE = re.compile(r"\?|що входить|склад|чи є|гостр|інгредієнт|порад|яка краща")
+
+
+def normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text.lower().replace("'", "ʼ").replace("’", "ʼ")).strip()
+
+
+def _stem(word: str) -> str:
+    """Основа слова для відмінків: маргарита -> маргари (маргариту, маргарити)."""
+    if word.isdigit() or len(word) <= 3:
+        return word
+    return word[:-2] if len(word) > 6 else word[:-1]
+
+
+def _word_pattern(word: str) -> str:
+    if word.isdigit():
+        spelled = [w for w, n in NUMBER_WORDS.items() if n == int(word)]
+        return "(?:" + "|".join([word] + spelled) + ")"
+    return re.escape(_stem(word)) + r"\w*"
+
+
+class OrderEngine:
+    def __init__(self, menu: Dict[str, Dict[str, int]]):
+        self.menu = menu
+        self.sizes = sorted({s for prices in menu.values() for s in prices})
+        self._pizza_re = [
+            (name, re.compile(r"(?<!\w)" + r"\s+".join(_word_pattern(w) for w in normalize(name).split())))
+            for name in menu
+        ]
+        self._size_re = [(size, re.compile(r"\b" + re.escape(_stem(size.lower())) + r"\w*")) for size in self.sizes]
+        # кількість перед назвою: число, за ним хіба що розмір — "2 великі Пепероні", "одну малу"
+        sizes = "|".join(re.escape(_stem(size.lower())) + r"\w*" for size in self.sizes)
+        self._qty_before_re = re.compile(NUM + r"(?:\s+(?:" + sizes + r"))?\s*$")
+        # розмір — лише слово впритул до назви: "малу Маргариту", "Пепероні велику", "Пепероні 2 шт велику"
+        self._size_before_re = re.compile(r"(?<!\w)(" + sizes + r")\s*$")
+        self._size_after_re = re.compile(r"\s*(" + sizes + r")\b")
+        self.stats = {"rule": 0, "llm": 0, "rule_seconds": 0.0}
+
+    # ---------- розбір ----------
+    def find_pizzas(self, text: str) -> List[Tuple[int, int, str]]:
+        found = []
+        for name, rx in self._pizza_re:
+            found += [(m.start(), m.end(), name) for m in rx.finditer(text)]
+        return sorted(found)
+
+    def _size_in(self, text: str) -> Optional[str]:
+        for size, rx in self._size_re:
+            if rx.search(text):
+                return size
+        return None
+
+    def _size_of(self, word: str) -> str:
+        return next(size for size, rx in self._size_re if rx.match(word))
+
+    @staticmethod
+    def _qty_in(text: str) -> Optional[int]:
+        m = NUMBER_RE.search(text)
+        if not m:
+            return None
+        return int(m.group(1)) if m.group(1) else NUMBER_WORDS[m.group(2)]
+
+    def parse_items(self, text: str) -> List[Dict]:
+        """
+        [{"name", "size"|None, "qty"|None, "single", "span", "qty_span"|None}] — розмір і кількість
+        беремо лише впритул до назви: спершу перед нею, інакше одразу після (розмір після назви,
+        що стоїть упритул до наступної піци, належить їй: "Пепероні малу Маргариту").
+        """
+        mentions = self.find_pizzas(text)
+        items = []
+        for i, (start, end, name) in enumerate(mentions):
+            seg_start = mentions[i - 1][1] if i else 0
+            before = text[seg_start:start]
+            after = text[end:mentions[i + 1][0] if i + 1 < len(mentions) else len(text)]
+            parts = re.split(r"\bі\b|\bта\b|,|\bа\b", after)
+            after, next_adjacent = parts[0], len(parts) == 1 and i + 1 < len(mentions)
+            qty = qty_span = None
+            qty_end = 0  # де в after закінчується кількість після назви
+            m = self._qty_before_re.search(before)
+            if m:
+                qty, qty_span = self._qty_in(m.group(0)), (seg_start + m.start(), seg_start + m.end())
+            else:
+                m = QTY_AFTER_RE.match(after)
+                if m:
+                    qty = int(m.group(1)) if m.group(1) else self._qty_in(m.group(0))
+                    qty_span = (end + m.start(), end + m.end())
+                    qty_end = m.end()
+            word = None
+            m = self._size_before_re.search(before)
+            if m:
+                word = m.group(1)
+            else:
+                m = self._size_after_re.match(after, qty_end)
+                if m and not (next_adjacent and not after[m.end():].strip()):
+                    word = m.group(1)
+            items.append({
+                "name": name,
+                "size": self._size_of(word) if word else None,
+                "qty": qty,
+                # розмір в однині (малу, велика) — одна піца; у множині (малі, великих) — кілька
+                "single": bool(word) and not word.endswith(("і", "их")),
+                "span": (start, end),
+                "qty_span": qty_span,
+            })
+        return items
+
+    @staticmethod
+    def _loose_number(text: str, items: List[Dict]) -> bool:
+        """Є число, що не є кількістю жодної піци і не частиною назви ("на 2 персони", "о 7")."""
+        spans = [it["span"] for it in items] + [it["qty_span"] for it in items if it["qty_span"]]
+        return any(not any(a <= m.start() < b for a, b in spans) for m in NUMBER_RE.finditer(text))
+
+    @staticmethod
+    def _ambiguous(text: str, items: List[Dict]) -> bool:
+        """Репліки з піцами, які правила зрозуміли б хибно, — їх віддаємо LLM."""
+        first = items[0]["span"][0]
+        if any(m.start() < first for m in NEGATION_RE.finditer(text)):
+            return True  # "не хочу Пепероні"
+        starts = {it["span"][0] for it in items}
+        if any(m.end() not in starts for m in WITHOUT_RE.finditer(text)):
+            return True  # "без цибулі" — побажання до начинки, а не видалення піци
+        return OrderEngine._loose_number(text, items)
+
+    # ---------- замовлення ----------
+    def add(self, order: Dict, name: str, size: str, qty: int = 1):
+        order.setdefault(name, {})
+        order[name][size] = order[name].get(size, 0) + qty
+
+    def remove(self, order: Dict, name: str, size: Optional[str] = None, qty: Optional[int] = None) -> int:
+        """Скільки піц справді прибрано (0 — такої в замовленні немає)."""
+        removed = 0
+        sizes = [size] if size else list(order.get(name, {}))
+        for s in sizes:
+            have = order.get(name, {}).get(s, 0)
+            left = have - (qty or 10 ** 6)
+            if left > 0:
+                order[name][s] = left
+            else:
+                order.get(name, {}).pop(s, None)
+            removed += have - max(left, 0)
+        if name in order and not order[name]:
+            del order[name]
+        return removed
+
+    def total(self, order: Dict) -> int:
+        return sum(self.menu[name][size] * qty for name, sizes in order.items() for size, qty in sizes.items())
+
+    def format_order(self, order: Dict) -> str:
+        if not order:
+            return "Замовлення поки порожнє."
+        lines = [f"- {name} ({size}) × {qty} — {self.menu[name][size] * qty} грн"
+                 for name, sizes in order.items() for size, qty in sizes.items()]
+        return "\n".join(lines + [f"Разом: {self.total(order)} грн"])
+
+    def format_menu(self) -> str:
+        lines = [f"- {name}: " + ", ".join(f"{s} {p} грн" for s, p in prices.items()) for name, prices in self.menu.items()]
+        return "Наше меню:\n" + "\n".join(lines)
+
+    # ---------- репліка ----------
+    def handle(self, session: Dict, user_input: str) -> Optional[str]:
+        """Відповідь на репліку або None, якщо потрібен LLM."""
+        t0 = time.perf_counter()
+        reply = self._handle(session, normalize(user_input))
+        if reply is None:
+            self.stats["llm"] += 1
+        else:
+            self.stats["rule"] += 1
+            self.stats["rule_seconds"] += time.perf_counter() - t0
+        return reply
+
+    def _handle(self, session: Dict, text: str) -> Optional[str]:
+        order = session.setdefault("order", {})
+        items = self.parse_items(text)
+
+        # відповідь на "Якого розміру?"
+        pending = session.get("pending")
+        if pending and not items:
+            size = self._size_in(text)
+            if size is None:
+                session.pop("pending", None)
+            else:
+                session.pop("pending")
+                for it in pending:
+                    self.add(order, it["name"], size, it["qty"] or 1)
+                return f"Додав: {self._describe(pending, size)}.\n{self.format_order(order)}"
+
+        if items:
+            if self._ambiguous(text, items):
+                return None
+            if PRICE_RE.search(text) and not ADD_RE.search(text):
+                return "\n".join(f"{it['name']}: " + ", ".join(f"{s} {p} грн" for s, p in self.menu[it['name']].items())
+                                 for it in items)
+            if CHANGE_RE.search(text) and len(items) == 2:
+                old, new = items
+                old_qty = sum(order.get(old["name"], {}).values()) if old["size"] is None else \
+                    order.get(old["name"], {}).get(old["size"], 0)
+                if not old_qty:
+                    return f"У замовленні немає {old['name']}.\n{self.format_order(order)}"
+                sizes = dict(order[old["name"]]) if old["size"] is None else {old["size"]: old_qty}
+                self.remove(order, old["name"], old["size"])
+                for size, qty in sizes.items():
+                    self.add(order, new["name"], new["size"] or size, new["qty"] or qty)
+                return f"Замінив {old['name']} на {new['name']}.\n{self.format_order(order)}"
+            if REMOVE_RE.search(text) or WITHOUT_RE.search(text):  # "без" тут — лише перед назвою піци
+                removed, missing = [], []
+                for it in items:
+                    # "прибери Гавайську" — усі; "прибери малу Гавайську" — одну малу
+                    n = self.remove(order, it["name"], it["size"], it["qty"] or (1 if it["single"] else None))
+                    label = f"{it['name']} ({it['size']})" if it["size"] else it["name"]
+                    (removed if n else missing).append(f"{label} × {n}" if n else label)
+                reply = [f"Прибрав: {', '.join(removed)}." if removed else "",
+                         f"У замовленні немає: {', '.join(missing)}." if missing else "",
+                         self.format_order(order)]
+                return "\n".join(r for r in reply if r)
+            explicit = ADD_RE.search(text) or any(it["size"] or it["qty"] for it in items)
+            if QUESTION_RE.search(text) or not explicit:
+                return None  # питання про піцу — хай відповідає LLM
+            sized = [it for it in items if it["size"]]
+            unsized = [it for it in items if not it["size"]]
+            for it in sized:
+                self.add(order, it["name"], it["size"], it["qty"] or 1)
+            reply = [f"Додав: {self._describe(sized)}." if sized else ""]
+            if unsized:
+                session["pending"] = unsized
+                names = ", ".join(it["name"] for it in unsized)
+                reply.append(f"Якого розміру {names}: {' чи '.join(self.sizes)}?")
+            else:
+                reply.append(self.format_order(order))
+            return "\n".join(r for r in reply if r)
+
+        if MENU_RE.search(text):
+            return self.format_menu()
+        if CLEAR_RE.search(text):
+            order.clear()
+            session.pop("pending", None)
+            return "Замовлення очищено."
+        if SHOW_RE.search(text):
+            return self.format_order(order)
+        if CONFIRM_RE.search(text) and not QUESTION_RE.search(text):  # "все зрозуміло, а доставка?" — питання
+            if not order:
+                return "Замовлення порожнє — що бажаєте замовити?"
+            session["confirmed"] = True
+            return f"Підтверджую замовлення:\n{self.format_order(order)}\nДякуємо!"
+        if GREETING_RE.search(text):
+            return "Вітаю! Можу показати меню або одразу прийняти замовлення."
+        return None
+
+    @staticmethod
+    def _describe(items: List[Dict], size: Optional[str] = None) -> str:
+        return ", ".join(f"{it['name']} ({size or it['size']}) × {it['qty'] or 1}" for it in items)
@@ -1,28 +1,39 @@
 import os
+import sys
+from pathlib import Path
 from typing import List, Dict
 from dotenv import load_dotenv
 
-# LangChain Serper wrapper
-from langchain_community.utilities.google_serper import GoogleSerperAPIWrapper
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from places_backend import PlacesBackend, SERPER_URL
 
 load_dotenv()  # підхоплює SERPER_API_KEY з .env
 
-# ---------- "Інструмент": пошук ресторанів через Serper Places ----------
-def search_restaurants(query: str, k: int = 5) -> List[Dict]:
-    """
-    Приймає рядок запиту та повертає список словників:
-    { name, website (або None), rating (або None) }
-    """
-    if not os.getenv("SERPER_API_KEY"):
-        raise RuntimeError("Недоступний SERPER_API_KEY. Додайте його в .env або змінні середовища.")
+# Кеш відповідей Serper: популярні запити ("суші Львів") не йдуть в API повторно
+CACHE_DB = Path("data/serper_cache.sqlite")
+CACHE_TTL = 24 * 3600   # рейтинги і сайти закладів змінюються рідко
+SERPER_RATE = 5         # запитів/с до Serper
+SERPER_MAX_CONCURRENCY = 8
+SERPER_GL = "us"        # країна пошуку Google (gl) — типові значення, як у GoogleSerperAPIWrapper
+SERPER_HL = "en"        # мова результатів (hl)
 
-    # type="places" вмикає режим Google Places
-    serper = GoogleSerperAPIWrapper(type="places", k=k)
+# Один бекенд на процес: кеш, обʼєднання однакових запитів, rate limit, спільний пул HTTP-зʼєднань.
+# SERPER_BASE_URL дозволяє підставити локальну заглушку (python -m common.fake_serper)
+backend = PlacesBackend(
+    api_key=os.getenv("SERPER_API_KEY"),
+    base_url=os.getenv("SERPER_BASE_URL", SERPER_URL),
+    cache_db=CACHE_DB,
+    ttl_seconds=CACHE_TTL,
+    rate=SERPER_RATE,
+    burst=SERPER_RATE,
+    max_concurrency=SERPER_MAX_CONCURRENCY,
+    gl=SERPER_GL,
+    hl=SERPER_HL,
+)
 
-    # serper.results повертає JSON з ключем 'places'
-    data = serper.results(query)
-    places = data.get("places", []) or []
 
+def parse_places(data: Dict) -> List[Dict]:
+    places = data.get("places", []) or []
     results = []
     for p in places:
         results.append({
@@ -32,6 +43,60 @@ def search_restaurants(query: str, k: int = 5) -> List[Dict]:
         })
     return results
 
+
+# ---------- "Інструмент": пошук ресторанів через Serper Places ----------
+def search_restaurants(query: str, k: int = 5) -> List[Dict]:
+    """
+    Приймає рядок запиту та повертає список словників:
+    { name, website (або None), rating (або None) }
+    """
+    # Serper Places повертає JSON з ключем 'places'
+    return parse_places(backend.search(query, k))
+
+
+async def asearch_restaurants(query: str, k: int = 5) -> List[Dict]:
+    """Асинхронна версія search_restaurants через спільний пул HTTP-зʼєднань."""
+    return parse_places(await backend.asearch(query, k))
+
+
+async def asearch_many(queries: List[str], k: int = 5) -> List[List[Dict]]:
+    """Кілька запитів одночасно (напр. 'суші Львів' і 'рамен Львів')."""
+    return [parse_places(data) for data in await backend.asearch_many(queries, k)]
+
+
+async def aclose():
+    """Закриває спільну HTTP-сесію (викликає сервер при зупинці)."""
+    await backend.aclose()
+
+
+def format_results(items: List[Dict]) -> str:
+    if not items:
+        return "Нічого не знайдено. Спробуйте перефразувати або додати місто/район."
+    lines = ["Топ результатів:"]
+    for i, it in enumerate(items, start=1):
+        name = it.get("name") or "—"
+        site = it.get("website") or "—"
+        rating = it.get("rating")
+        rating_str = f"{rating:.1f}" if isinstance(rating, (int, float)) else "—"
+        lines.append(f"{i}. {name}")
+        lines.append(f"   Сайт: {site}")
+        lines.append(f"   Рейтинг: {rating_str}")
+    return "\n".join(lines)
+
+
+# ---------- Інтерфейс для сервера сесій (common/session_server.py) ----------
+def new_session() -> Dict:
+    return {"history": []}
+
+
+async def areply(session: Dict, user_q: str) -> str:
+    session["history"].append(user_q)
+    try:
+        items = await asearch_restaurants(user_q, k=7)
+    except Exception as e:
+        return f"Помилка: {e}"
+    return format_results(items)
+
 # ---------- Чат-бот (консоль) ----------
 def main():
     print("🧭 Рекомендатор ресторанів (Serper Places). Введіть запит або 'exit' для виходу.")
@@ -42,6 +107,7 @@ def main():
         if not user_q:
             continue
         if user_q.lower() in {"exit", "quit"}:
+            print(f"[Кеш Serper] {backend.stats()}")
             print("Бувай!")
             break
 
@@ -51,20 +117,7 @@ def main():
             print(f"Помилка: {e}")
             continue
 
-        if not items:
-            print("Нічого не знайдено. Спробуйте перефразувати або додати місто/район.")
-            continue
-
-        print("\nТоп результатів:")
-        for i, it in enumerate(items, start=1):
-            name = it.get("name") or "—"
-            site = it.get("website") or "—"
-            rating = it.get("rating")
-            rating_str = f"{rating:.1f}" if isinstance(rating, (int, float)) else "—"
-
-            print(f"{i}. {name}")
-            print(f"   Сайт: {site}")
-            print(f"   Рейтинг: {rating_str}")
+        print("\n" + format_results(items))
 
 if __name__ == "__main__":
     main()
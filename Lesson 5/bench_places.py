@@ -0,0 +1,121 @@
+"""
+Бенчмарк PlacesBackend (places_backend.py) на локальній заглушці Serper (common/fake_serper.py).
+
+Навантаження: --requests запитів від --users одночасних користувачів; запити
+беруться з пулу з розподілом Ціпфа (кілька популярних — "суші Львів" — і довгий хвіст),
+з різним регістром/пробілами. Порівнюємо:
+- напряму: кожен запит — окремий виклик Serper (як було в HW 5);
+- PlacesBackend: кеш + обʼєднання однакових запитів + rate limit + обмежений паралелізм.
+
+Приклад:
+    python "Lesson 5/bench_places.py" --requests 2000 --users 50 --latency 0.2
+"""
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import aiohttp
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent))
+sys.path.insert(0, str(HERE))
+from common.fake_serper import start_fake_serper
+from places_backend import PlacesBackend
+
+CUISINES = ["суші", "піца", "рамен", "бургери", "кава", "грузинська кухня", "веганське кафе", "стейк", "морепродукти",
+            "хінкалі", "вареники", "шаурма", "паста", "тайська кухня", "сніданки"]
+CITIES = ["Львів", "Київ", "Одеса", "Харків", "Дніпро", "Ужгород"]
+
+
+def make_workload(n: int, seed: int, zipf_s: float):
+    rnd = random.Random(seed)
+    pool = [f"{c} {city}" for c in CUISINES for city in CITIES]
+    rnd.shuffle(pool)
+    weights = [1 / (i + 1) ** zipf_s for i in range(len(pool))]
+    out = []
+    for q in rnd.choices(pool, weights=weights, k=n):
+        variant = rnd.random()
+        if variant < 0.2:
+            q = q.capitalize()
+        elif variant < 0.3:
+            q = f"  {q}  "
+        elif variant < 0.4:
+            q = q + "?"
+        out.append(q)
+    return out
+
+
+async def run_users(queries, users, search):
+    """users одночасних користувачів по черзі розбирають спільну чергу запитів."""
+    it = iter(queries)
+    latencies = []
+
+    async def user():
+        for q in it:
+            t0 = time.perf_counter()
+            await search(q)
+            latencies.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(users)))
+    return time.perf_counter() - t0, sorted(latencies)
+
+
+def p(lat, q):
+    return lat[min(len(lat) - 1, int(q / 100 * len(lat)))] * 1000
+
+
+async def main_async(args):
+    queries = make_workload(args.requests, args.seed, args.zipf)
+    fake = await start_fake_serper(args.latency, api_key="test")
+
+    # напряму, без кешу
+    async with aiohttp.ClientSession() as http:
+        async def direct(q):
+            async with http.post(fake.url + "/places", headers={"X-API-KEY": "test"}, json={"q": q, "num": args.k}) as r:
+                return await r.json()
+        before = fake.requests
+        elapsed, lat = await run_users(queries, args.users, direct)
+        direct_calls = fake.requests - before
+    print(f"напряму:       {elapsed:6.2f} с, викликів Serper {direct_calls:5d}, "
+          f"p50 {p(lat, 50):6.1f} мс, p95 {p(lat, 95):6.1f} мс")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backend = PlacesBackend(api_key="test", base_url=fake.url, cache_db=Path(tmp) / "serper.sqlite",
+                                rate=args.rate, burst=int(args.rate), max_concurrency=args.max_concurrency)
+        before, fake.max_in_flight = fake.requests, 0
+        elapsed, lat = await run_users(queries, args.users, lambda q: backend.asearch(q, args.k))
+        stats = backend.stats()
+        print(f"PlacesBackend: {elapsed:6.2f} с, викликів Serper {fake.requests - before:5d}, "
+              f"p50 {p(lat, 50):6.1f} мс, p95 {p(lat, 95):6.1f} мс, одночасно до Serper ≤ {fake.max_in_flight}")
+        print(f"  {stats}")
+
+        # пакетний запит: кілька кухонь у новому місті (ще не в кеші)
+        batch = [f"{c} Чернівці" for c in CUISINES]
+        t0 = time.perf_counter()
+        await backend.asearch_many(batch, args.k)
+        print(f"  asearch_many({len(batch)} запитів): {time.perf_counter() - t0:.2f} с, "
+              f"викликів Serper всього {backend.upstream_calls}")
+        await backend.aclose()
+    await fake.close()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--requests", type=int, default=2000)
+    ap.add_argument("--users", type=int, default=50)
+    ap.add_argument("--latency", type=float, default=0.2, help="затримка заглушки Serper, с")
+    ap.add_argument("--k", type=int, default=7)
+    ap.add_argument("--rate", type=float, default=20, help="ліміт викликів Serper/с")
+    ap.add_argument("--max-concurrency", type=int, default=8)
+    ap.add_argument("--zipf", type=float, default=1.1)
+    ap.add_argument("--seed", type=int, default=0)
+    asyncio.run(main_async(ap.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
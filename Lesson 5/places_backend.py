@@ -0,0 +1,212 @@
+"""
+Шар пошуку закладів поверх Serper Places API.
+
+- кеш на диску (SQLite) з TTL; ключ — нормалізований запит (+ країна/мова
+  пошуку gl/hl) + k. Відповідь, збережена для більшого k, обслуговує і менші k;
+- обʼєднання однакових одночасних запитів: поки запит летить до Serper,
+  інші такі самі чекають його результату, а не роблять свій. Запит іде окремою
+  задачею, тож скасування того, хто його почав, не скасовує його для решти;
+- token bucket (common/rate_limit.py) на всі виклики Serper;
+- обмежений паралелізм (max_concurrency) для пакетних запитів search_many;
+- HTTP-сесія, семафор і запити "у польоті" — свої для кожного event loop
+  (aiohttp і asyncio-примітиви привʼязані до циклу, в якому створені), тож бекенд
+  можна викликати і з asyncio.run у консолі, і з циклу сервера; aclose() / async with
+  закривають сесію поточного циклу.
+
+base_url можна направити на локальну заглушку (common/fake_serper.py).
+Статистика: влучання в кеш, обʼєднані запити, реальні виклики Serper.
+"""
+import asyncio
+import json
+import sqlite3
+import sys
+import threading
+import time
+import weakref
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.llm_cache import normalize_key
+from common.rate_limit import TokenBucket
+
+SERPER_URL = "https://google.serper.dev"
+
+
+@dataclass
+class _LoopState:
+    """Асинхронні ресурси одного event loop."""
+    sem: asyncio.Semaphore
+    session: Any = None  # aiohttp.ClientSession, створюється при першому запиті
+    inflight: Dict[Tuple[str, int], asyncio.Task] = field(default_factory=dict)
+
+
+class PlacesBackend:
+    def __init__(self, api_key: Optional[str], base_url: str = SERPER_URL, cache_db: Optional[Path] = None,
+                 ttl_seconds: float = 24 * 3600, rate: float = 5.0, burst: int = 5, max_concurrency: int = 8,
+                 timeout: float = 15.0, gl: str = "us", hl: str = "en"):
+        self.api_key = api_key
+        self.url = base_url.rstrip("/") + "/places"
+        self.gl, self.hl = gl, hl  # країна й мова пошуку Google (як у GoogleSerperAPIWrapper)
+        self.ttl = ttl_seconds
+        self.timeout = timeout
+        self.rate_limiter = TokenBucket(rate=rate, burst=burst)
+        self.max_concurrency = max_concurrency
+        # стан зникає разом із циклом (asyncio.run закриває свій цикл після завершення)
+        self._loops: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._conn = None
+        if cache_db is not None:
+            Path(cache_db).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(cache_db), check_same_thread=False, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            with self._conn:
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS places ("
+                    " query TEXT NOT NULL, k INTEGER NOT NULL, response TEXT NOT NULL, created REAL NOT NULL,"
+                    " PRIMARY KEY (query, k))"
+                )
+                self._conn.execute("DELETE FROM places WHERE created < ?", (time.time() - self.ttl,))
+        self.hits = 0
+        self.coalesced = 0
+        self.upstream_calls = 0
+        self.upstream_seconds = 0.0
+
+    # ---------- кеш ----------
+    def _cache_get(self, query: str, k: int) -> Optional[Dict]:
+        if self._conn is None:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response FROM places WHERE query = ? AND k >= ? AND created >= ? ORDER BY k LIMIT 1",
+                (query, k, time.time() - self.ttl)).fetchone()
+        if row is None:
+            return None
+        data = json.loads(row[0])
+        data["places"] = (data.get("places") or [])[:k]
+        return data
+
+    def _cache_put(self, query: str, k: int, data: Dict):
+        if self._conn is None:
+            return
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO places(query, k, response, created) VALUES (?, ?, ?, ?)",
+                               (query, k, json.dumps(data, ensure_ascii=False), time.time()))
+
+    def _key(self, query: str) -> str:
+        """Ключ кешу: результати залежать від країни й мови пошуку, не лише від запиту."""
+        return f"{normalize_key(query)}|{self.gl}|{self.hl}"
+
+    def _payload(self, query: str, k: int) -> Dict:
+        return {"q": query, "num": k, "gl": self.gl, "hl": self.hl}
+
+    def _headers(self) -> Dict[str, str]:
+        if not self.api_key:
+            raise RuntimeError("Недоступний SERPER_API_KEY. Додайте його в .env або змінні середовища.")
+        return {"X-API-KEY": self.api_key, "Content-Type": "application/json"}
+
+    # ---------- синхронний пошук (консоль) ----------
+    def search(self, query: str, k: int = 5) -> Dict:
+        import requests
+
+        key = self._key(query)
+        cached = self._cache_get(key, k)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        headers = self._headers()
+        self.rate_limiter.acquire_sync()
+        t0 = time.perf_counter()
+        resp = requests.post(self.url, headers=headers, json=self._payload(query, k), timeout=self.timeout)
+        resp.raise_for_status()
+        data = resp.json()
+        self.upstream_calls += 1
+        self.upstream_seconds += time.perf_counter() - t0
+        self._cache_put(key, k, data)
+        return data
+
+    # ---------- асинхронний пошук (сервер сесій, пакетні запити) ----------
+    def _state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        state = self._loops.get(loop)
+        if state is None:
+            state = self._loops[loop] = _LoopState(sem=asyncio.Semaphore(self.max_concurrency))
+        return state
+
+    async def _fetch(self, query: str, k: int) -> Dict:
+        import aiohttp
+
+        state = self._state()
+        if state.session is None or state.session.closed:
+            state.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=100),
+                                                  timeout=aiohttp.ClientTimeout(total=self.timeout))
+        headers = self._headers()
+        async with state.sem:
+            await self.rate_limiter.acquire()
+            t0 = time.perf_counter()
+            async with state.session.post(self.url, headers=headers, json=self._payload(query, k)) as resp:
+                resp.raise_for_status()
+                data = await resp.json()
+        self.upstream_calls += 1
+        self.upstream_seconds += time.perf_counter() - t0
+        return data
+
+    async def _fetch_and_cache(self, key: str, query: str, k: int) -> Dict:
+        data = await self._fetch(query, k)
+        self._cache_put(key, k, data)
+        return data
+
+    @staticmethod
+    def _fetch_done(inflight: Dict[Tuple[str, int], asyncio.Task], inflight_key: Tuple[str, int], task: asyncio.Task):
+        inflight.pop(inflight_key, None)
+        if not task.cancelled():
+            task.exception()  # щоб asyncio не скаржився, якщо ніхто більше не чекав
+
+    async def asearch(self, query: str, k: int = 5) -> Dict:
+        key = self._key(query)
+        cached = self._cache_get(key, k)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        inflight = self._state().inflight
+        task = inflight.get((key, k))
+        if task is not None:
+            self.coalesced += 1
+        else:
+            # окрема задача, а не корутина першого запитувача: якщо його скасують (клієнт пішов),
+            # CancelledError не дістанеться решті — помилки Serper (Exception) отримують усі
+            task = asyncio.ensure_future(self._fetch_and_cache(key, query, k))
+            inflight[(key, k)] = task
+            task.add_done_callback(lambda t, inflight_key=(key, k): self._fetch_done(inflight, inflight_key, t))
+        return await asyncio.shield(task)
+
+    async def asearch_many(self, queries: List[str], k: int = 5) -> List[Dict]:
+        """Кілька запитів паралельно; до Serper одночасно не більше max_concurrency."""
+        return await asyncio.gather(*(self.asearch(q, k) for q in queries))
+
+    async def aclose(self):
+        """Закриває HTTP-сесію поточного циклу; наступний запит у ньому відкриє нову."""
+        state = self._loops.pop(asyncio.get_running_loop(), None)
+        if state is not None and state.session is not None and not state.session.closed:
+            await state.session.close()
+
+    async def __aenter__(self) -> "PlacesBackend":
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    def stats(self) -> Dict:
+        requests_total = self.hits + self.coalesced + self.upstream_calls
+        saved = self.hits + self.coalesced
+        return {
+            "requests": requests_total,
+            "cache_hits": self.hits,
+            "coalesced": self.coalesced,
+            "upstream_calls": self.upstream_calls,
+            "hit_rate": round(saved / requests_total, 3) if requests_total else 0.0,
+            "upstream_calls_saved": saved,
+            "upstream_avg_ms": round(self.upstream_seconds / self.upstream_calls * 1000, 1) if self.upstream_calls else None,
+            "rate_limit_wait_s": round(self.rate_limiter.waited, 2),
+        }
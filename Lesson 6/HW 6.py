@@ -1,16 +1,27 @@
 import os
-import json
-import uuid
-import re
+import hashlib
+import shutil
+import sys
+import time
+from collections import deque
 from pathlib import Path
-from typing import List, Tuple, Dict
+from typing import TYPE_CHECKING, List, Tuple, Dict, Iterable, Iterator, Optional, Union
 
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.vectorstores import Chroma
+# langchain_community / sentence-transformers / torch і обгортки ембедінгів імпортуються ліниво (у get_vectorstore):
+# сам модуль відкривається за мілісекунди — це важливо для rag_cli.py і бенчмарків
+if TYPE_CHECKING:
+    from langchain_community.vectorstores import Chroma
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.id_registry import IdRegistry
+from common.ann_search import AnnSearcher, VectorIndex, hnsw_metadata, query_collection_batch
+from common.bm25_index import BM25Index, HybridSearcher, collection_db_path
+from common.chunker import BLOCK_SEP_RE, Chunk, Chunker, iter_text_blocks, token_counter
 
 # ====== КОНФІГ ======
 TXT_PATH = Path("data/lesson_rag/huge_file.txt")
-IDS_JSON = Path("data/lesson_rag/ids.json")
+IDS_DB = Path("data/lesson_rag/ids.sqlite")     # реєстр ID (SQLite)
+IDS_JSON = Path("data/lesson_rag/ids.json")     # старий формат — імпортується в IDS_DB один раз
 
 # Каталог існуючої Chroma-бази (НЕ видаляємо його; Chroma сам допише нові записи)
 PERSIST_DIR = Path("chroma_db")           # змініть, якщо у вас інший шлях
@@ -19,8 +30,52 @@ COLLECTION_NAME = "lesson_rag_docs"       # змініть на свою кол
 # Яка модель для ембедінгів (зручна, легка, без ключів)
 EMB_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
 
+# Кеш ембедінгів на диску: (модель, хеш тексту) -> вектор; None — вимкнути
+EMB_CACHE_PATH = Path("data/emb_cache.sqlite")
+EMB_CACHE_MAX_ENTRIES = 1_000_000
+
+# Паралельний ембедінг на CPU: 0 — звичайний HuggingFaceEmbeddings в одному процесі,
+# N > 0 — пул із N процесів (None — усі ядра), у кожному своя копія моделі.
+# Щоб завантажити всі ядра, BATCH_SIZE має бути >= EMB_WORKERS * EMB_BATCH_SIZE.
+EMB_WORKERS = 0
+EMB_BATCH_SIZE = 64
+
+# Потоковий режим: файл читається шматками, блоки йдуть у БД пачками по BATCH_SIZE
+# (пікова памʼять не залежить від розміру файлу)
+STREAM_MODE = True
+BATCH_SIZE = 256
+READ_CHUNK_CHARS = 1 << 20  # ~1M символів за одне читання
+
+# Розбиття блоків під вікно моделі (common/chunker.py): довгі блоки ділимо на фрагменти
+# ~target_tokens (не більше max_tokens токенів токенізатора EMB_MODEL, з перекриттям),
+# короткі сусідні — зливаємо. None — як раніше: один блок = один вектор
+CHUNKING = dict(target_tokens=200, max_tokens=256, overlap_tokens=32, min_tokens=64)
+
+# Інкрементальна переіндексація: ID блоку = MD5 вмісту, тож ембедимо лише
+# нові/змінені блоки, а зниклі з файлу — видаляємо з колекції
+INCREMENTAL = True
+DELETE_BATCH = 5000
+
+# Параметри HNSW-індексу Chroma (діють лише при СТВОРЕННІ колекції), напр.
+# dict(M=32, construction_ef=200, search_ef=128); None — налаштування Chroma за замовчуванням.
+# Підібрати значення під потрібний recall/латентність: bench_ann.py
+HNSW_PARAMS = None
+
+# Лексичний індекс BM25 з тими самими ID блоків (оновлюється разом із колекцією; окремий файл
+# на кожну колекцію поруч із BM25_DB); None — вимкнути.
+# Режим пошуку для перевірки: "lexical" | "dense" | "hybrid" (RRF)
+BM25_DB = Path("data/lesson_rag/bm25.sqlite")
+SEARCH_MODE = "hybrid"
+
+# Вивантаження векторів колекції для пакетного пошуку (batch_search: np.load з mmap);
+# перестворюється, коли колекція змінилась. None — пакетні запити через collection.query
+VECTORS_EXPORT = Path("data/lesson_rag/vectors")
+
 
 # ====== УТИЛІТИ ======
+# розділювач блоків (два й більше порожніх рядки) — BLOCK_SEP_RE з common/chunker.py
+
+
 def read_blocks(txt_path: Path) -> List[str]:
     """
     Читає файл та розбиває на блоки.
@@ -28,12 +83,35 @@ def read_blocks(txt_path: Path) -> List[str]:
     Повертає список рядків-блоків (без зайвих пробілів).
     """
     text = txt_path.read_text(encoding="utf-8", errors="ignore")
-    # сплітимо за двома й більше порожніми рядками (переноси можуть різнитись)
-    parts = re.split(r"(?:\r?\n)\s*(?:\r?\n)\s*(?:\r?\n)+", text)
+    parts = BLOCK_SEP_RE.split(text)
     blocks = [p.strip() for p in parts if p.strip()]
     return blocks
 
 
+def iter_blocks(txt_path: Path, chunk_chars: int = READ_CHUNK_CHARS) -> Iterator[str]:
+    """
+    Потокова версія read_blocks: читає файл шматками по chunk_chars символів
+    і віддає блоки по одному (той самий розділювач, той самий результат).
+    У памʼяті тримається лише поточний шматок + незавершений хвіст.
+    """
+    with txt_path.open("r", encoding="utf-8", errors="ignore") as f:
+        yield from iter_text_blocks(f, chunk_chars)
+
+
+def batched(items: Iterable, n: int) -> Iterator[List]:
+    """
+    Групує елементи ітератора у списки довжиною до n.
+    """
+    batch = []
+    for it in items:
+        batch.append(it)
+        if len(batch) >= n:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
 def title_of_block(block: str) -> str:
     """
     Повертає перший непорожній рядок як назву блоку.
@@ -45,68 +123,223 @@ def title_of_block(block: str) -> str:
     return "Untitled"
 
 
-def build_docs(blocks: List[str], file_name: str) -> Tuple[List[str], List[Dict], List[str]]:
+def stable_id_from_text(text: str) -> str:
+    """Детерміністичний ID: MD5 від вмісту блоку (як у HW 7)."""
+    return hashlib.md5(text.encode("utf-8")).hexdigest()
+
+
+def make_chunker() -> Optional[Chunker]:
+    """Chunker за CHUNKING з токенізатором EMB_MODEL (None, якщо розбиття вимкнене)."""
+    if not CHUNKING:
+        return None
+    return Chunker(token_counter(EMB_MODEL), title_fn=title_of_block, **CHUNKING)
+
+
+def iter_docs(txt_path: Path, chunker: Optional[Chunker] = None) -> Iterator[Union[str, Chunk]]:
+    """Блоки файлу потоком — як є або вже розбиті chunker-ом на фрагменти."""
+    blocks = iter_blocks(txt_path)
+    return chunker.chunk_stream(blocks) if chunker is not None else blocks
+
+
+def text_of(doc: Union[str, Chunk]) -> str:
+    return doc.text if isinstance(doc, Chunk) else doc
+
+
+def build_docs(blocks: List[Union[str, Chunk]], file_name: str) -> Tuple[List[str], List[Dict], List[str]]:
     """
-    З блоків формує:
+    З блоків (або фрагментів Chunk) формує:
     - texts: вміст сторінок
-    - metadatas: метадані {file, block_title}
-    - ids: uuid4 для кожного блоку
+    - metadatas: метадані {file, block_title} (у фрагмента — заголовок його блоку)
+    - ids: MD5 вмісту для кожного блоку (однакові блоки пропускаються)
     """
     texts, metas, ids = [], [], []
+    seen = set()
     for b in blocks:
-        t = title_of_block(b)
-        doc_id = str(uuid.uuid4())
-        texts.append(b)
+        text = text_of(b)
+        doc_id = stable_id_from_text(text)
+        if doc_id in seen:
+            continue
+        seen.add(doc_id)
+        t = b.title if isinstance(b, Chunk) else title_of_block(b)
+        texts.append(text)
         metas.append({"file": file_name, "block_title": t})
         ids.append(doc_id)
     return texts, metas, ids
 
 
-def append_ids_json(ids: List[str], metas: List[Dict], json_path: Path):
+def get_vectorstore(persist_dir: Path, collection: str):
     """
-    Додає нові ID у JSON. Формат:
-    {
-      "items": [
-        {"id": "...", "file": "...", "block_title": "..."},
-        ...
-      ]
-    }
+    Повертає існуючу/створює Chroma‑колекцію з EMB_MODEL (через кеш ембедінгів).
+    Тут і вантажаться важкі залежності (langchain_community, модель).
     """
-    payload = {"items": []}
-    if json_path.exists():
-        try:
-            payload = json.loads(json_path.read_text(encoding="utf-8"))
-            if not isinstance(payload, dict) or "items" not in payload or not isinstance(payload["items"], list):
-                payload = {"items": []}
-        except Exception:
-            payload = {"items": []}
-
-    for i, m in zip(ids, metas):
-        payload["items"].append({"id": i, "file": m.get("file"), "block_title": m.get("block_title")})
-
-    json_path.parent.mkdir(parents=True, exist_ok=True)
-    json_path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+    from langchain_community.vectorstores import Chroma
 
+    from common.embedding_cache import cached_embeddings
+    from common.parallel_embed import ParallelEmbeddings
 
-def get_vectorstore(persist_dir: Path, collection: str):
-    """
-    Повертає існуючу/створює Chroma‑колекцію з EMB_MODEL.
-    """
-    embeddings = HuggingFaceEmbeddings(model_name=EMB_MODEL)
+    if EMB_WORKERS == 0:
+        inner = HuggingFaceEmbeddings(model_name=EMB_MODEL)
+    else:
+        inner = ParallelEmbeddings(EMB_MODEL, workers=EMB_WORKERS, batch_size=EMB_BATCH_SIZE)
+    embeddings = cached_embeddings(
+        inner,
+        model_name=EMB_MODEL,
+        db_path=EMB_CACHE_PATH,
+        max_entries=EMB_CACHE_MAX_ENTRIES,
+    )
     vs = Chroma(
         collection_name=collection,
         embedding_function=embeddings,
         persist_directory=str(persist_dir),
+        collection_metadata=hnsw_metadata(**HNSW_PARAMS) if HNSW_PARAMS else None,
     )
     return vs
 
 
-def quick_verify(vs: Chroma, query: str = "What are key restrictions in Google Terms of Service?"):
+def write_batches(vs: "Chroma", doc_batches: Iterable[Tuple[List[str], List[Dict], List[str]]],
+                  bm25: Optional[BM25Index] = None) -> Iterator[Tuple[List[str], List[Dict]]]:
+    """
+    Записує пачки (texts, metas, ids) у Chroma (і в BM25-індекс, якщо є) в тому ж порядку
+    і віддає (ids, metas) кожної.
+    Якщо ембедер вміє embed_stream (паралельний/кешований), наступні пачки
+    ембедяться, поки поточна пишеться в БД; інакше — звичайний add_texts.
+    """
+    embed_stream = getattr(vs.embeddings, "embed_stream", None)
+    if embed_stream is None:
+        for texts, metas, ids in doc_batches:
+            vs.add_texts(texts=texts, metadatas=metas, ids=ids)
+            if bm25 is not None:
+                bm25.add(ids, texts)
+            yield ids, metas
+        return
+
+    pending = deque()
+
+    def texts_only():
+        for docs in doc_batches:
+            pending.append(docs)
+            yield docs[0]
+
+    for vectors in embed_stream(texts_only()):
+        texts, metas, ids = pending.popleft()
+        vs._collection.upsert(ids=ids, embeddings=vectors, metadatas=metas, documents=texts)
+        if bm25 is not None:
+            bm25.add(ids, texts)
+        yield ids, metas
+
+
+def ingest_streaming(vs: "Chroma", txt_path: Path, file_name: str, batch_size: int = BATCH_SIZE,
+                     bm25: Optional[BM25Index] = None, chunker: Optional[Chunker] = None) -> Tuple[List[str], List[Dict]]:
+    """
+    Потокова індексація: блоки з iter_blocks (або фрагменти chunker-а) пачками по batch_size
+    проходять build_docs -> ембедінг -> запис у Chroma.
+    Тексти не накопичуються; повертає лише ids та метадані (для ids.json).
+    """
+    all_ids, all_metas = [], []
+    done = 0
+    doc_batches = (build_docs(batch, file_name=file_name) for batch in batched(iter_docs(txt_path, chunker), batch_size))
+    for ids, metas in write_batches(vs, doc_batches, bm25):
+        all_ids.extend(ids)
+        all_metas.extend(metas)
+        done += len(ids)
+        print(f"  … проіндексовано {done} блоків", end="\r")
+    print()
+    return all_ids, all_metas
+
+
+def file_key(path: Path) -> str:
+    """
+    Значення поля file у метаданих: шлях відносно робочої теки (або абсолютний, якщо файл поза нею).
+    Не лише назва файлу — інакше a/readme.txt і b/readme.txt вважались би одним файлом, і
+    інкрементальна індексація другого видаляла б блоки першого як застарілі.
+    """
+    path = Path(path).resolve()
+    try:
+        return path.relative_to(Path.cwd().resolve()).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+
+def relabel_file(vs: "Chroma", ids: List[str], file_name: str) -> List[Dict]:
+    """Переносить блоки на новий ключ file (без повторного ембедінгу); повертає їхні метадані."""
+    metas_out = []
+    for chunk in batched(ids, DELETE_BATCH):
+        res = vs._collection.get(ids=chunk, include=["metadatas"])
+        metas = [dict(m or {}, file=file_name) for m in res["metadatas"]]
+        vs._collection.update(ids=res["ids"], metadatas=metas)
+        metas_out += [{"id": i, **m} for i, m in zip(res["ids"], metas)]
+    return metas_out
+
+
+def existing_ids_for_file(vs: "Chroma", file_name: str) -> set:
+    """
+    ID усіх блоків цього файлу, що вже є в колекції (без документів і векторів).
+    """
+    res = vs.get(where={"file": file_name}, include=[])
+    return set(res.get("ids", []))
+
+
+def ingest_incremental(vs: "Chroma", txt_path: Path, file_name: str, batch_size: int = BATCH_SIZE,
+                       bm25: Optional[BM25Index] = None, chunker: Optional[Chunker] = None) -> Dict:
+    """
+    Інкрементальна індексація файлу:
+    - блоки, чий MD5 уже є в колекції, пропускаються (без ембедінгу);
+    - нові/змінені блоки ембедяться та додаються пачками по batch_size;
+    - блоки, яких більше немає у файлі, видаляються з колекції.
+    Колекції, проіндексовані до file_key (file — лише назва файлу), переходять на новий ключ
+    при першій індексації: блоки зі старим ключем вважаються блоками цього файлу.
+    Повертає статистику: added_ids, added_metas, unchanged, deleted_ids, relabeled_metas.
+    """
+    existing = existing_ids_for_file(vs, file_name)
+    legacy_name = txt_path.name
+    if not existing and legacy_name != file_name:
+        existing = existing_ids_for_file(vs, legacy_name)
+    else:
+        legacy_name = None
+    seen = set()
+    added_ids, added_metas = [], []
+    counts = {"unchanged": 0}
+
+    def fresh_batches():
+        for batch in batched(iter_docs(txt_path, chunker), batch_size):
+            fresh = []
+            for b in batch:
+                bid = stable_id_from_text(text_of(b))
+                if bid in seen:
+                    continue
+                seen.add(bid)
+                if bid in existing:
+                    counts["unchanged"] += 1
+                else:
+                    fresh.append(b)
+            if fresh:
+                yield build_docs(fresh, file_name=file_name)
+
+    for ids, metas in write_batches(vs, fresh_batches(), bm25):
+        added_ids.extend(ids)
+        added_metas.extend(metas)
+        print(f"  … нових блоків: {len(added_ids)}, без змін: {counts['unchanged']}", end="\r")
+    print()
+
+    stale = list(existing - seen)
+    for chunk in batched(stale, DELETE_BATCH):
+        vs.delete(ids=chunk)
+    if bm25 is not None:
+        bm25.delete(stale)
+    relabeled = relabel_file(vs, list(existing & seen), file_name) if legacy_name else []
+
+    return {"added_ids": added_ids, "added_metas": added_metas, "unchanged": counts["unchanged"], "deleted_ids": stale,
+            "relabeled_metas": relabeled}
+
+
+def quick_verify(vs: "Chroma", query: str = "What are key restrictions in Google Terms of Service?",
+                 searcher: Optional[HybridSearcher] = None, mode: str = SEARCH_MODE):
     """
     Друк топ‑3 результатів для ручної перевірки.
     """
-    print("\n[Verify] Top-3 matches for query:\n", query)
-    docs = vs.similarity_search(query, k=3)
+    print(f"\n[Verify] Top-3 matches ({mode if searcher else 'dense'}) for query:\n", query)
+    docs = searcher.similarity_search(query, k=3, mode=mode) if searcher else vs.similarity_search(query, k=3)
     for i, d in enumerate(docs, 1):
         meta = d.metadata or {}
         print(f"\n{i}. {meta.get('block_title', 'Untitled')}")
@@ -115,30 +348,94 @@ def quick_verify(vs: Chroma, query: str = "What are key restrictions in Google T
         print("   Snippet:", snippet.replace("\n", " ")[:300])
 
 
+def batch_search(vs: "Chroma", queries: List[str], k: int = 5) -> List[List[Tuple[str, float]]]:
+    """
+    Пакетний пошук для оцінювання (тисячі запитів): усі запити ембедяться одним викликом,
+    top-k для кожного — точний пошук матричним множенням по вивантаженню векторів.
+    Повертає для кожного запиту [(id, distance)], найближчі першими.
+    """
+    if VECTORS_EXPORT is None:
+        return query_collection_batch(vs, queries, k)
+    index = VectorIndex.open_export(vs._collection, VECTORS_EXPORT)
+    return AnnSearcher(vs, index).batch_search_ids(queries, k)
+
+
+def open_bm25(vs: "Chroma") -> Optional[BM25Index]:
+    bm25 = BM25Index(collection_db_path(BM25_DB, PERSIST_DIR, COLLECTION_NAME)) if BM25_DB else None
+    if bm25 is not None and bm25.count() != vs._collection.count():
+        # індекс зʼявився пізніше за колекцію (або розійшовся з нею) — дотягуємо
+        print(f"[BM25] синхронізація з колекцією: {bm25.sync_from_collection(vs._collection)}")
+    return bm25
+
+
+def ingest_file(vs: "Chroma", txt_path: Path, registry: IdRegistry, bm25: Optional[BM25Index] = None,
+                chunker: Optional[Chunker] = None) -> Dict:
+    """
+    Один файл у колекцію (режим за INCREMENTAL / STREAM_MODE) + BM25 + реєстр ID.
+    Спільне для main() і rag_cli.py (у т.ч. демона, де vs/bm25/chunker уже "теплі").
+    Повертає {file, added, unchanged, deleted, seconds}.
+    """
+    t0 = time.perf_counter()
+    file_name = file_key(txt_path)
+    stats = {"deleted_ids": [], "unchanged": 0, "relabeled_metas": []}
+    if INCREMENTAL:
+        print(f"Інкрементальний режим, пачки по {BATCH_SIZE} блоків")
+        stats = ingest_incremental(vs, txt_path, file_name=file_name, bm25=bm25, chunker=chunker)
+        ids, metas = stats["added_ids"], stats["added_metas"]
+        print(f"Нових/змінених: {len(ids)}, без змін: {stats['unchanged']}, видалено: {len(stats['deleted_ids'])}")
+    elif STREAM_MODE:
+        print(f"Потоковий режим, пачки по {BATCH_SIZE} блоків")
+        ids, metas = ingest_streaming(vs, txt_path, file_name=file_name, bm25=bm25, chunker=chunker)
+        print(f"Блоків проіндексовано: {len(ids)}")
+    else:
+        blocks = read_blocks(txt_path)
+        print(f"Блоків знайдено: {len(blocks)}")
+        if chunker is not None:
+            blocks = chunker.chunks(blocks)
+
+        texts, metas, ids = build_docs(blocks, file_name=file_name)
+        print(f"Готую до індексації: {len(texts)} документів")
+
+        # upsert у Chroma: додаємо нові документи + метадані + id
+        vs.add_texts(texts=texts, metadatas=metas, ids=ids)
+        if bm25 is not None:
+            bm25.add(ids, texts)
+    vs.persist()
+    if VECTORS_EXPORT and (ids or stats["deleted_ids"]):
+        shutil.rmtree(VECTORS_EXPORT, ignore_errors=True)  # batch_search вивантажить заново
+
+    # оновлюємо реєстр ID
+    registry.upsert({"id": i, "file": m.get("file"), "block_title": m.get("block_title")} for i, m in zip(ids, metas))
+    registry.upsert({"id": m["id"], "file": m.get("file"), "block_title": m.get("block_title")}
+                    for m in stats["relabeled_metas"])
+    registry.delete(stats["deleted_ids"])
+    return {"file": file_name, "added": len(ids), "unchanged": stats["unchanged"],
+            "deleted": len(stats["deleted_ids"]), "seconds": round(time.perf_counter() - t0, 3)}
+
+
 def main():
     if not TXT_PATH.exists():
         raise FileNotFoundError(f"Не знайдено файл: {TXT_PATH}")
 
-    print(f"Читаю файл: {TXT_PATH}")
-    blocks = read_blocks(TXT_PATH)
-    print(f"Блоків знайдено: {len(blocks)}")
-
-    texts, metas, ids = build_docs(blocks, file_name=TXT_PATH.name)
-    print(f"Готую до індексації: {len(texts)} документів")
-
     vs = get_vectorstore(PERSIST_DIR, COLLECTION_NAME)
+    bm25 = open_bm25(vs)
+    registry = IdRegistry(IDS_DB, legacy_json=IDS_JSON)
 
-    # upsert у Chroma: додаємо нові документи + метадані + id
-    vs.add_texts(texts=texts, metadatas=metas, ids=ids)
-    vs.persist()
+    chunker = make_chunker()
+    print(f"Читаю файл: {TXT_PATH}")
+    ingest_file(vs, TXT_PATH, registry, bm25=bm25, chunker=chunker)
+    if chunker is not None:
+        print(f"[Розбиття] {chunker.report()}")
     print(f"✅ Додано до колекції '{COLLECTION_NAME}'. Папка БД: {PERSIST_DIR}")
-
-    # оновлюємо ids.json
-    append_ids_json(ids, metas, IDS_JSON)
-    print(f"✅ Оновлено JSON з ID: {IDS_JSON}")
+    print(f"✅ Оновлено реєстр ID: {IDS_DB} (записів: {registry.count()})")
 
     # швидка перевірка семплом запиту
-    quick_verify(vs, query="What actions are prohibited by Google Terms of Service?")
+    searcher = HybridSearcher(vs, bm25) if bm25 is not None else None
+    quick_verify(vs, query="What actions are prohibited by Google Terms of Service?", searcher=searcher)
+
+    emb = vs.embeddings
+    if hasattr(emb, "stats"):
+        print(f"\n[Кеш ембедінгів] {emb.stats()}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,68 @@
+"""
+Бенчмарк ANN-пошуку: recall@k та p50/p99 латентності одного запиту для різних ef_search
+(HNSW через hnswlib) проти точного перебору.
+
+За замовчуванням — синтетичні кластеризовані вектори (dim=384, як у MiniLM);
+з --persist-dir вектори беруться з реальної Chroma-колекції.
+
+Приклади:
+    python bench_ann.py --n 100000
+    python bench_ann.py --n 1000000 --M 32 --ef 64 128 256
+    python bench_ann.py --persist-dir chroma_db --collection lesson_rag_docs
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.ann_search import VectorIndex
+
+
+def synthetic_vectors(n: int, dim: int, clusters: int = 200, seed: int = 0) -> np.ndarray:
+    rnd = np.random.default_rng(seed)
+    centers = rnd.normal(size=(clusters, dim)).astype(np.float32)
+    x = centers[rnd.integers(0, clusters, n)] + 0.6 * rnd.normal(size=(n, dim)).astype(np.float32)
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--n", type=int, default=100_000, help="к-сть синтетичних векторів")
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--persist-dir", help="взяти вектори з Chroma замість синтетики")
+    ap.add_argument("--collection", default="lesson_rag_docs")
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--M", type=int, default=16)
+    ap.add_argument("--ef-construction", type=int, default=200)
+    ap.add_argument("--ef", type=int, nargs="+", default=[16, 32, 64, 128, 256])
+    args = ap.parse_args()
+
+    if args.persist_dir:
+        import chromadb
+
+        col = chromadb.PersistentClient(path=args.persist_dir).get_collection(args.collection)
+        index = VectorIndex.from_collection(col)
+    else:
+        index = VectorIndex([str(i) for i in range(args.n)], synthetic_vectors(args.n, args.dim))
+    print(f"Векторів: {len(index.ids)}, dim={index.vectors.shape[1]}, space={index.space}")
+
+    t0 = time.perf_counter()
+    index.build_hnsw(M=args.M, ef_construction=args.ef_construction)
+    print(f"Побудова HNSW (M={args.M}, ef_construction={args.ef_construction}): {time.perf_counter() - t0:.1f} с")
+
+    # запити — трохи зашумлені вектори з колекції
+    rnd = np.random.default_rng(1)
+    base = index.vectors[rnd.integers(0, len(index.ids), args.queries)]
+    queries = base + 0.05 * rnd.normal(size=base.shape).astype(np.float32)
+
+    print(f"\n{'ef_search':>10}{'recall@' + str(args.k):>12}{'p50, мс':>10}{'p99, мс':>10}")
+    for row in index.sweep(queries, k=args.k, ef_values=args.ef):
+        print(f"{row['ef_search']:>10}{row['recall_at_k']:>12}{row['p50_ms']:>10}{row['p99_ms']:>10}")
+
+
+if __name__ == "__main__":
+    main()
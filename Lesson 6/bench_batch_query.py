@@ -0,0 +1,102 @@
+"""
+Бенчмарк пакетного пошуку для оцінювання: N запитів по одному (embed_query + пошук)
+проти одного пакетного проходу (embed_queries для всіх запитів + матричне множення
+порціями по memory-mapped вивантаженню векторів).
+
+Офлайн (за замовчуванням): синтетичні блоки + HashEmbeddings; послідовний режим
+міряється на --sequential-sample запитах і екстраполюється на всі.
+З --persist-dir — реальна колекція і модель; додатково міряється collection.query
+з кількома query_embeddings (пакетний API самої Chroma).
+
+Приклади:
+    python bench_batch_query.py --n 20000 --queries 10000
+    python bench_batch_query.py --persist-dir chroma_db --collection lesson_rag_docs --queries 10000
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from bench_utils import WORDS, HashEmbeddings
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.ann_search import VectorIndex, query_collection_batch
+from common.embedding_cache import embed_queries
+
+
+class _Store:
+    """Мінімум від LangChain Chroma для офлайн-режиму: лише .embeddings."""
+
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+
+
+def random_texts(n: int, rnd: random.Random, lo: int, hi: int):
+    return [" ".join(rnd.choice(WORDS) for _ in range(rnd.randint(lo, hi))) for _ in range(n)]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--n", type=int, default=20_000, help="блоків у синтетичному корпусі")
+    ap.add_argument("--queries", type=int, default=10_000)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--sequential-sample", type=int, default=500, help="скільки запитів міряти по одному")
+    ap.add_argument("--persist-dir", help="реальна Chroma-колекція замість синтетики")
+    ap.add_argument("--collection", default="lesson_rag_docs")
+    ap.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    args = ap.parse_args()
+
+    rnd = random.Random(0)
+    queries = random_texts(args.queries, rnd, 4, 10)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.persist_dir:
+            from langchain_community.embeddings import HuggingFaceEmbeddings
+            from langchain_community.vectorstores import Chroma
+
+            vs = Chroma(collection_name=args.collection, persist_directory=args.persist_dir,
+                        embedding_function=HuggingFaceEmbeddings(model_name=args.model))
+            t0 = time.perf_counter()
+            index = VectorIndex.open_export(vs._collection, Path(tmp) / "vectors")
+        else:
+            vs = _Store(HashEmbeddings())
+            texts = random_texts(args.n, rnd, 30, 120)
+            VectorIndex([f"b{i}" for i in range(args.n)],
+                        np.asarray(vs.embeddings.embed_documents(texts), dtype=np.float32)).save(Path(tmp) / "vectors")
+            t0 = time.perf_counter()
+            index = VectorIndex.load(Path(tmp) / "vectors")
+        print(f"Векторів: {len(index.ids)}, відкриття вивантаження: {time.perf_counter() - t0:.2f} с; запитів: {len(queries)}")
+
+        sample = queries[:args.sequential_sample]
+        t0 = time.perf_counter()
+        one_by_one = [index.search_vectors(vs.embeddings.embed_query(q), args.k, exact=True)[0] for q in sample]
+        seq = (time.perf_counter() - t0) / len(sample)
+        print(f"По одному:  {seq * 1000:.2f} мс/запит -> ~{seq * len(queries):.1f} с на {len(queries)} "
+              f"({1 / seq:.0f} запитів/с)")
+
+        t0 = time.perf_counter()
+        embs = embed_queries(vs.embeddings, queries)
+        t_emb = time.perf_counter() - t0
+        batched = index.search_vectors(embs, args.k, exact=True)
+        total = time.perf_counter() - t0
+        print(f"Пакетом:    {total:.2f} с на {len(queries)} (ембедінг {t_emb:.2f} с, пошук {total - t_emb:.2f} с; "
+              f"{len(queries) / total:.0f} запитів/с, x{seq * len(queries) / total:.1f})")
+
+        # порівнюємо відстані, а не ID: у рівновіддалених блоків порядок може відрізнятися
+        same = np.mean([np.allclose([d for _, d in a], [d for _, d in b], atol=1e-4)
+                        for a, b in zip(one_by_one, batched)])
+        print(f"Збіг top-{args.k} з пошуком по одному: {same:.3f}")
+
+        if args.persist_dir:
+            t0 = time.perf_counter()
+            query_collection_batch(vs, queries, args.k)
+            total = time.perf_counter() - t0
+            print(f"collection.query пакетом: {total:.2f} с ({len(queries) / total:.0f} запитів/с)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Бенчмарк розбиття блоків (common/chunker.py) на корпусі у форматі huge_file.txt.
+
+Порівнює "один блок = один вектор" (як було) з Chunker для кількох налаштувань:
+к-сть векторів, скільки токенів модель мовчки обрізала б (понад max_tokens),
+розподіл токенів на вектор і швидкість розбиття (блоків/с, потоково з iter_blocks).
+
+За замовчуванням токени оцінюються approx_token_count (без моделі);
+з --model — токенізатором самої моделі (потрібен transformers).
+
+Приклади:
+    python bench_chunker.py --blocks 20000
+    python bench_chunker.py --file data/lesson_rag/huge_file.txt --model sentence-transformers/all-MiniLM-L6-v2
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from bench_utils import WORDS, load_hw6
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.chunker import Chunker, token_counter
+
+CONFIGS = [
+    dict(target_tokens=200, max_tokens=256, overlap_tokens=0),
+    dict(target_tokens=200, max_tokens=256, overlap_tokens=32),
+    dict(target_tokens=128, max_tokens=256, overlap_tokens=32),
+    dict(target_tokens=200, max_tokens=256, overlap_tokens=32, pack=True),
+]
+
+
+def write_corpus(path: Path, n_blocks: int, seed: int = 7) -> Path:
+    """
+    Блоки з реченнями різної довжини, як у ToS: чимало коротких розділів-заголовків
+    (кілька слів) і довгі розділи на сотні слів, що не влазять у вікно моделі.
+    """
+    rnd = random.Random(seed)
+    with path.open("w", encoding="utf-8") as f:
+        for i in range(n_blocks):
+            kind = rnd.random()
+            n_words = rnd.randint(5, 30) if kind < 0.35 else rnd.randint(60, 180) if kind < 0.9 else rnd.randint(250, 600)
+            sentences, left = [], n_words
+            while left > 0:
+                m = min(left, rnd.randint(8, 30))
+                sentences.append(" ".join(rnd.choice(WORDS) for _ in range(m)).capitalize() + ".")
+                left -= m
+            paras, j = [], 0
+            while j < len(sentences):
+                step = rnd.randint(2, 6)
+                paras.append(" ".join(sentences[j:j + step]))
+                j += step
+            title = f"Section {i}: " + " ".join(rnd.choice(WORDS) for _ in range(3)).title()
+            f.write(title + "\n" + "\n\n".join(paras) + "\n\n\n")
+    return path
+
+
+def describe(name: str, tokens, budget: int, blocks: int, seconds: float) -> dict:
+    tokens = np.asarray(tokens)
+    over = np.clip(tokens - budget, 0, None)
+    return {"config": name, "vectors": int(len(tokens)), "truncated_vectors": int((over > 0).sum()),
+            "truncated_tokens": int(over.sum()), "p50_tokens": int(np.percentile(tokens, 50)),
+            "p95_tokens": int(np.percentile(tokens, 95)), "tiny_vectors(<64)": int((tokens < 64).sum()),
+            "blocks_per_s": round(blocks / seconds) if seconds else None}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--blocks", type=int, default=20_000)
+    ap.add_argument("--file", type=Path, help="готовий файл замість синтетики")
+    ap.add_argument("--model", help="токенізатор моделі замість approx_token_count")
+    args = ap.parse_args()
+
+    hw6 = load_hw6()
+    count = token_counter(args.model)
+    with tempfile.TemporaryDirectory() as tmp:
+        txt = args.file or write_corpus(Path(tmp) / "corpus.txt", args.blocks)
+
+        t0 = time.perf_counter()
+        tokens = [count(b) for b in hw6.iter_blocks(txt)]
+        n_blocks = len(tokens)
+        baseline = describe("блок = вектор", tokens, 254, n_blocks, time.perf_counter() - t0)
+        print(f"Блоків: {n_blocks}")
+        print(baseline)
+
+        for cfg in CONFIGS:
+            chunker = Chunker(count, title_fn=hw6.title_of_block, **cfg)
+            t0 = time.perf_counter()
+            chunks = list(chunker.chunk_stream(hw6.iter_blocks(txt)))
+            elapsed = time.perf_counter() - t0
+            name = f"target={cfg['target_tokens']} overlap={cfg['overlap_tokens']}" + (" pack" if cfg.get("pack") else "")
+            row = describe(name, [c.tokens for c in chunks], chunker.budget_max, n_blocks, elapsed)
+            report = chunker.report()
+            row["merged_blocks"], row["split_blocks"] = report["merged_blocks"], report["split_blocks"]
+            row["vectors_vs_blocks"] = f"{(row['vectors'] - n_blocks) / n_blocks:+.1%}"
+            print(row)
+
+
+if __name__ == "__main__":
+    main()
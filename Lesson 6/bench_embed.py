@@ -0,0 +1,62 @@
+"""
+Бенчмарк пропускної здатності ембедінгу на CPU: docs/sec залежно від кількості процесів.
+
+Базова лінія (workers=0) — HuggingFaceEmbeddings в одному процесі, як у HW 6 за замовчуванням.
+Далі — ParallelEmbeddings з 1, 2, 4, ... процесами (до кількості ядер).
+
+Приклад:
+    python bench_embed.py --blocks 5000 --batch-size 64
+"""
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from bench_utils import load_hw6, write_synthetic_corpus
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--file", type=Path, help="готовий TXT; інакше генерується синтетичний")
+    ap.add_argument("--blocks", type=int, default=5000)
+    ap.add_argument("--batch-size", type=int, default=64, help="текстів на один model.encode")
+    ap.add_argument("--workers", type=int, nargs="*", help="списки к-сті процесів, напр. 1 2 4 8")
+    args = ap.parse_args()
+
+    hw6 = load_hw6()
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+    from common.parallel_embed import ParallelEmbeddings
+
+    cores = os.cpu_count() or 1
+    workers_list = args.workers or sorted({1, 2, 4, 8, 16, 32, cores} & set(range(1, cores + 1)))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        txt = args.file or write_synthetic_corpus(Path(tmp) / "huge_file.txt", args.blocks)
+        blocks = hw6.read_blocks(txt)
+    print(f"Блоків: {len(blocks)}, ядер: {cores}")
+
+    # одна пачка на запис у Chroma = BATCH_SIZE блоків з HW 6
+    ingest_batches = list(hw6.batched(blocks, max(hw6.BATCH_SIZE, args.batch_size * max(workers_list))))
+
+    print(f"\n{'workers':>8}{'сек':>10}{'docs/s':>10}{'speedup':>10}")
+    emb = HuggingFaceEmbeddings(model_name=hw6.EMB_MODEL)
+    emb.embed_documents(blocks[:8])  # прогрів
+    t0 = time.perf_counter()
+    for b in ingest_batches:
+        emb.embed_documents(b)
+    base = time.perf_counter() - t0
+    print(f"{'0 (HF)':>8}{base:>10.2f}{len(blocks) / base:>10.1f}{1.0:>10.2f}")
+
+    for w in workers_list:
+        with ParallelEmbeddings(hw6.EMB_MODEL, workers=w, batch_size=args.batch_size) as pe:
+            # прогрів: усі процеси завантажують модель до старту заміру
+            pe.embed_documents(blocks[:w * args.batch_size])
+            t0 = time.perf_counter()
+            n = sum(len(v) for v in pe.embed_stream(ingest_batches))
+            dt = time.perf_counter() - t0
+        print(f"{w:>8}{dt:>10.2f}{n / dt:>10.1f}{base / dt:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
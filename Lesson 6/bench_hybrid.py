@@ -0,0 +1,130 @@
+"""
+Бенчмарк режимів пошуку: BM25 (lexical), векторний (dense) і гібрид RRF (hybrid).
+
+Для кожного режиму: p50/p99 латентності запиту, recall@k (чи є потрібний блок у top-k)
+і MRR. Лексичний режим не викликає модель — лише інвертований індекс у памʼяті.
+
+Офлайн (за замовчуванням): синтетичний корпус із тематичних блоків, де кожен блок містить
+кілька рідкісних "юридичних" термінів; запит — 1-2 рідкісні терміни блоку + слова його теми.
+Dense тут — HashEmbeddings (хешований bag-of-words) з точним перебором, тобто грубий
+замінник MiniLM: якість dense/hybrid на реальних даних міряйте з --persist-dir.
+
+Реальна колекція: --persist-dir + --queries (JSONL: {"query": ..., "relevant_ids": [...]}).
+
+Приклади:
+    python bench_hybrid.py --n 20000
+    python bench_hybrid.py --persist-dir chroma_db --collection lesson_rag_docs --queries qrels.jsonl
+"""
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from bench_utils import WORDS, HashEmbeddings
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.ann_search import VectorIndex
+from common.bm25_index import BM25Index, HybridSearcher
+
+
+def rare_vocab(n: int, rnd: random.Random):
+    syll = ["ar", "bi", "con", "de", "ex", "fi", "gra", "in", "ju", "lex", "mo", "nu", "or", "pre", "qui", "re",
+            "sub", "tor", "ul", "ve"]
+    vocab = set()
+    while len(vocab) < n:
+        vocab.add("".join(rnd.choice(syll) for _ in range(rnd.randint(3, 4))))
+    return sorted(vocab)
+
+
+def synthetic(n_blocks: int, n_queries: int, seed: int, n_topics: int = 40):
+    """
+    Блоки згруповані за темами (кожна тема — кілька переважних загальних слів, як розділи ToS),
+    у кожному блоці 3 рідкісні терміни. Запит — 1-2 рідкісні терміни блоку + 2-3 слова його теми.
+    """
+    rnd = random.Random(seed)
+    rare = rare_vocab(max(1000, n_blocks * 3 // 2), rnd)
+    topics = [rnd.sample(WORDS, 6) for _ in range(n_topics)]
+    ids, texts, block_meta = [], [], []
+    for i in range(n_blocks):
+        topic = topics[rnd.randrange(n_topics)]
+        terms = rnd.sample(rare, 3)
+        words = [rnd.choice(topic) if rnd.random() < 0.7 else rnd.choice(WORDS) for _ in range(rnd.randint(30, 120))]
+        for t in terms:
+            words.insert(rnd.randrange(len(words)), t)
+        ids.append(f"b{i}")
+        texts.append(f"Section {i}: {topic[0]} {topic[1]}\n" + " ".join(words))
+        block_meta.append((terms, topic))
+    queries = []
+    for _ in range(n_queries):
+        i = rnd.randrange(n_blocks)
+        terms, topic = block_meta[i]
+        q = rnd.sample(terms, rnd.randint(1, 2)) + rnd.sample(topic, rnd.randint(2, 3))
+        rnd.shuffle(q)
+        queries.append({"query": " ".join(q), "relevant_ids": [ids[i]]})
+    return ids, texts, queries
+
+
+def evaluate(searcher: HybridSearcher, queries, k: int, mode: str, label: str = ""):
+    lat, recall, rr = [], [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        hits = [i for i, _ in searcher.search_ids(q["query"], k, mode)]
+        lat.append(time.perf_counter() - t0)
+        rel = set(q["relevant_ids"])
+        recall.append(len(rel & set(hits)) / len(rel))
+        rr.append(next((1 / r for r, i in enumerate(hits, 1) if i in rel), 0.0))
+    ms = np.array(lat) * 1000
+    return {"mode": label or mode, "p50_ms": round(float(np.percentile(ms, 50)), 3), "p99_ms": round(float(np.percentile(ms, 99)), 3),
+            f"recall@{k}": round(float(np.mean(recall)), 3), "mrr": round(float(np.mean(rr)), 3)}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--n", type=int, default=20_000, help="блоків у синтетичному корпусі")
+    ap.add_argument("--queries-n", type=int, default=500)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--lexical-weight", type=float, default=3.0, help="вага BM25 у зваженому RRF (dense = 1)")
+    ap.add_argument("--persist-dir", help="реальна Chroma-колекція замість синтетики")
+    ap.add_argument("--collection", default="lesson_rag_docs")
+    ap.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    ap.add_argument("--queries", type=Path, help="JSONL з query і relevant_ids (для --persist-dir)")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bm25 = BM25Index(Path(tmp) / "bm25.sqlite")
+        if args.persist_dir:
+            from langchain_community.embeddings import HuggingFaceEmbeddings
+            from langchain_community.vectorstores import Chroma
+
+            vs = Chroma(collection_name=args.collection, persist_directory=args.persist_dir,
+                        embedding_function=HuggingFaceEmbeddings(model_name=args.model))
+            t0 = time.perf_counter()
+            print(f"BM25 з колекції: {bm25.sync_from_collection(vs._collection)}, {time.perf_counter() - t0:.1f} с")
+            queries = [json.loads(line) for line in args.queries.read_text(encoding="utf-8").splitlines() if line.strip()]
+            searcher = HybridSearcher(vs, bm25)
+        else:
+            ids, texts, queries = synthetic(args.n, args.queries_n, args.seed)
+            emb = HashEmbeddings()
+            t0 = time.perf_counter()
+            for s in range(0, len(ids), 1000):
+                bm25.add(ids[s:s + 1000], texts[s:s + 1000])
+            print(f"Блоків: {len(ids)}, запис BM25: {time.perf_counter() - t0:.1f} с")
+            index = VectorIndex(ids, np.asarray(emb.embed_documents(texts), dtype=np.float32))
+            searcher = HybridSearcher(None, bm25, dense=lambda q, k: index.search_vectors(emb.embed_query(q), k, exact=True)[0])
+
+        bm25.search("warmup")
+        print(f"Завантаження BM25 у памʼять: {bm25.load_seconds:.2f} с; запитів: {len(queries)}")
+        for mode in HybridSearcher.MODES:
+            print(evaluate(searcher, queries, args.k, mode))
+        searcher.weights = (args.lexical_weight, 1.0)
+        print(evaluate(searcher, queries, args.k, "hybrid", f"hybrid w={args.lexical_weight:g}:1"))
+
+
+if __name__ == "__main__":
+    main()
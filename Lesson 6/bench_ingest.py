@@ -0,0 +1,80 @@
+"""
+Бенчмарк індексації HW 6: поточний шлях (read_blocks + build_docs + один add_texts)
+проти потокового (iter_blocks + пачки по BATCH_SIZE).
+
+Кожен режим запускається в окремому процесі, щоб пікова RSS не змішувалась.
+
+Приклади:
+    python bench_ingest.py --blocks 50000 --fake-emb
+    python bench_ingest.py --file data/lesson_rag/huge_file.txt
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bench_utils import HashEmbeddings, load_hw6, peak_rss_mb, write_synthetic_corpus
+
+
+def run_one(mode: str, txt_path: Path, fake_emb: bool, batch_size: int) -> dict:
+    hw6 = load_hw6()
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+    from langchain_community.vectorstores import Chroma
+
+    emb = HashEmbeddings() if fake_emb else HuggingFaceEmbeddings(model_name=hw6.EMB_MODEL)
+    with tempfile.TemporaryDirectory() as db_dir:
+        vs = Chroma(collection_name="bench", embedding_function=emb, persist_directory=db_dir)
+        rss_before = peak_rss_mb()
+        t0 = time.perf_counter()
+        if mode == "full":
+            blocks = hw6.read_blocks(txt_path)
+            texts, metas, ids = hw6.build_docs(blocks, file_name=txt_path.name)
+            vs.add_texts(texts=texts, metadatas=metas, ids=ids)
+        else:
+            ids, metas = hw6.ingest_streaming(vs, txt_path, file_name=txt_path.name, batch_size=batch_size)
+        elapsed = time.perf_counter() - t0
+    return {
+        "mode": mode,
+        "docs": len(ids),
+        "seconds": round(elapsed, 3),
+        "docs_per_sec": round(len(ids) / elapsed, 1) if elapsed else None,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "baseline_rss_mb": round(rss_before, 1),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--file", type=Path, help="готовий TXT; інакше генерується синтетичний")
+    ap.add_argument("--blocks", type=int, default=20000, help="розмір синтетичного корпусу")
+    ap.add_argument("--batch-size", type=int, default=256)
+    ap.add_argument("--fake-emb", action="store_true", help="детерміністичні ембедінги замість моделі")
+    ap.add_argument("--mode", choices=["full", "stream"], help="(внутрішнє) запустити один режим")
+    args = ap.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_one(args.mode, args.file, args.fake_emb, args.batch_size)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        txt = args.file or write_synthetic_corpus(Path(tmp) / "huge_file.txt", args.blocks)
+        print(f"Корпус: {txt} ({txt.stat().st_size / 1e6:.1f} МБ)")
+        results = []
+        for mode in ("full", "stream"):
+            cmd = [sys.executable, __file__, "--mode", mode, "--file", str(txt),
+                   "--batch-size", str(args.batch_size)]
+            if args.fake_emb:
+                cmd.append("--fake-emb")
+            out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+            results.append(json.loads(out.strip().splitlines()[-1]))
+
+    print(f"\n{'режим':<8}{'блоків':>10}{'сек':>10}{'docs/s':>10}{'peak RSS, МБ':>15}")
+    for r in results:
+        print(f"{r['mode']:<8}{r['docs']:>10}{r['seconds']:>10}{r['docs_per_sec']:>10}{r['peak_rss_mb']:>15}")
+
+
+if __name__ == "__main__":
+    main()
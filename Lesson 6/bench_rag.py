@@ -0,0 +1,145 @@
+"""
+Бенчмарк RAG-сховища lesson_rag_docs (офлайн).
+
+Для кожного розміру корпусу (за замовчуванням 10k, 100k, 1M блоків):
+1. генерує синтетичний huge_file.txt (блоки через два порожні рядки, перший рядок — назва);
+2. індексує його шляхом HW 6 (iter_blocks -> build_docs -> write_batches) у тимчасову Chroma;
+3. міряє: docs/sec індексації, час ембедінгу vs час запису, розмір БД на диску,
+   перцентилі латентності similarity_search;
+4. пише результати в JSON (--out) і, якщо задано --baseline, порівнює з попереднім
+   прогоном: код виходу 1, якщо щось погіршилось більше ніж на --tolerance.
+
+Ембедінги: --emb hash (детерміністична заміна, за замовчуванням) або --emb model
+(локальна sentence-transformers модель з HW 6, без мережі, якщо вона вже в кеші HF).
+
+Приклади:
+    python bench_rag.py --sizes 10000 --out bench_results.json
+    python bench_rag.py --sizes 10000 100000 --baseline bench_results.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bench_utils import HashEmbeddings, TimedEmbeddings, dir_size_mb, load_hw6, peak_rss_mb, write_synthetic_corpus, WORDS
+
+# метрика -> True, якщо "більше = краще"
+TRACKED = {"ingest_docs_per_sec": True, "query_p50_ms": False, "query_p95_ms": False, "query_p99_ms": False}
+
+
+def percentile(samples, q):
+    s = sorted(samples)
+    if not s:
+        return 0.0
+    i = min(len(s) - 1, max(0, int(round(q / 100 * (len(s) - 1)))))
+    return s[i]
+
+
+def bench_size(hw6, n_blocks: int, emb_kind: str, batch_size: int, n_queries: int, k: int, workdir: Path) -> dict:
+    from langchain_community.vectorstores import Chroma
+
+    txt = write_synthetic_corpus(workdir / f"huge_file_{n_blocks}.txt", n_blocks)
+    if emb_kind == "model":
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+        inner = HuggingFaceEmbeddings(model_name=hw6.EMB_MODEL)
+    else:
+        inner = HashEmbeddings()
+    emb = TimedEmbeddings(inner)
+    db_dir = workdir / f"chroma_{n_blocks}"
+    vs = Chroma(collection_name="bench", embedding_function=emb, persist_directory=str(db_dir))
+
+    t0 = time.perf_counter()
+    ids, _ = hw6.ingest_streaming(vs, txt, file_name=txt.name, batch_size=batch_size)
+    ingest_s = time.perf_counter() - t0
+    embed_s = emb.seconds
+
+    rnd = random.Random(7)
+    queries = [" ".join(rnd.choice(WORDS) for _ in range(6)) for _ in range(n_queries)]
+    vs.similarity_search(queries[0], k=k)  # прогрів
+    lat = []
+    for q in queries:
+        t = time.perf_counter()
+        vs.similarity_search(q, k=k)
+        lat.append((time.perf_counter() - t) * 1000)
+
+    return {
+        "blocks": len(ids),
+        "corpus_mb": round(txt.stat().st_size / 1e6, 2),
+        "ingest_s": round(ingest_s, 2),
+        "ingest_docs_per_sec": round(len(ids) / ingest_s, 1),
+        "embed_s": round(embed_s, 2),
+        "write_s": round(ingest_s - embed_s, 2),
+        "db_size_mb": round(dir_size_mb(db_dir), 2),
+        "query_p50_ms": round(percentile(lat, 50), 3),
+        "query_p95_ms": round(percentile(lat, 95), 3),
+        "query_p99_ms": round(percentile(lat, 99), 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> bool:
+    """Друкує відхилення від baseline; True, якщо регресій немає."""
+    ok = True
+    base_runs = {str(r["size"]): r for r in baseline.get("runs", [])}
+    for run in current["runs"]:
+        old = base_runs.get(str(run["size"]))
+        if not old:
+            continue
+        for metric, higher_is_better in TRACKED.items():
+            a, b = old.get(metric), run.get(metric)
+            if not a or b is None:
+                continue
+            change = (b - a) / a
+            worse = -change if higher_is_better else change
+            flag = "❌" if worse > tolerance else "  "
+            ok &= worse <= tolerance
+            print(f"{flag} size={run['size']:<8} {metric:<22} {a:>10} -> {b:<10} ({change:+.1%})")
+    return ok
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    ap.add_argument("--emb", choices=["hash", "model"], default="hash")
+    ap.add_argument("--batch-size", type=int, default=256)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--k", type=int, default=5)
+    ap.add_argument("--out", type=Path, default=Path("bench_results.json"))
+    ap.add_argument("--baseline", type=Path, help="попередній JSON для порівняння")
+    ap.add_argument("--tolerance", type=float, default=0.15, help="допустиме погіршення (частка)")
+    args = ap.parse_args()
+
+    hw6 = load_hw6()
+    result = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "emb": args.emb,
+        "batch_size": args.batch_size,
+        "k": args.k,
+        "runs": [],
+    }
+    for n in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            print(f"\n=== {n} блоків ===")
+            run = {"size": n, **bench_size(hw6, n, args.emb, args.batch_size, args.queries, args.k, Path(tmp))}
+        print(json.dumps(run, ensure_ascii=False, indent=2))
+        result["runs"].append(run)
+
+    args.out.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"\n✅ Результати: {args.out}")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        if not compare(result, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Бенчмарк переранжування (common/reranker.py): приріст якості проти доданих мілісекунд.
+
+Перший етап — векторний пошук top-N, другий — cross-encoder по N кандидатах.
+Для кожного бюджету кандидатів (і з лімітом часу): recall@k, MRR, скільки мс
+додає переранжування (p50/p99), і другий прохід тими самими запитами — з кешу оцінок.
+
+Офлайн (за замовчуванням): синтетичний корпус із bench_hybrid.py, перший етап —
+HashEmbeddings з точним перебором, а "cross-encoder" — IDF-зважений збіг термінів
+запиту в блоці з імітацією вартості моделі (--pair-ms на пару, пачками). Це показує
+механіку бюджету, ліміту й кешу; реальний приріст якості міряйте з --model
+(потрібен sentence-transformers) і --persist-dir + --queries.
+
+Приклади:
+    python bench_rerank.py --n 20000 --pair-ms 1.5
+    python bench_rerank.py --model cross-encoder/ms-marco-MiniLM-L-6-v2 --persist-dir chroma_db --queries qrels.jsonl
+"""
+import argparse
+import json
+import math
+import re
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+from langchain_core.documents import Document
+
+from bench_hybrid import synthetic
+from bench_utils import HashEmbeddings
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.ann_search import VectorIndex
+from common.reranker import CrossEncoderScorer, Reranker, content_id
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+class TermScorer:
+    """Офлайн-замінник cross-encoder-а: сума IDF термінів запиту, що є в блоці; + імітація часу моделі."""
+
+    def __init__(self, texts, pair_ms: float):
+        df = Counter(t for text in texts for t in set(TOKEN_RE.findall(text.lower())))
+        self.idf = {t: math.log(len(texts) / n) for t, n in df.items()}
+        self.pair_ms = pair_ms
+
+    def __call__(self, pairs):
+        time.sleep(self.pair_ms * len(pairs) / 1000)
+        out = []
+        for query, text in pairs:
+            words = set(TOKEN_RE.findall(text.lower()))
+            out.append(sum(self.idf.get(t, 0.0) for t in set(TOKEN_RE.findall(query.lower())) if t in words))
+        return out
+
+
+def quality(ranked_ids, relevant, k: int):
+    rel = set(relevant)
+    top = ranked_ids[:k]
+    return len(rel & set(top)) / len(rel), next((1 / r for r, i in enumerate(top, 1) if i in rel), 0.0)
+
+
+def evaluate(label, queries, first_stage, k, reranker=None):
+    recall, rr, added = [], [], []
+    for q in queries:
+        docs = first_stage(q["query"], reranker.candidates if reranker else k)
+        if reranker is not None:
+            t0 = time.perf_counter()
+            docs = [d for d, _ in reranker.rerank(q["query"], docs, k)]
+            added.append((time.perf_counter() - t0) * 1000)
+        r, m = quality([d.metadata["id"] for d in docs], q["relevant_ids"], k)
+        recall.append(r)
+        rr.append(m)
+    row = {"mode": label, f"recall@{k}": round(float(np.mean(recall)), 3), "mrr": round(float(np.mean(rr)), 3)}
+    if added:
+        row.update({"added_p50_ms": round(float(np.percentile(added, 50)), 2),
+                    "added_p99_ms": round(float(np.percentile(added, 99)), 2),
+                    "skipped_per_query": round(reranker.totals["skipped"] / reranker.totals["queries"], 1)})
+    return row
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--n", type=int, default=20_000, help="блоків у синтетичному корпусі")
+    ap.add_argument("--queries-n", type=int, default=300)
+    ap.add_argument("--k", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--budgets", default="10,20,50", help="кандидатів для переранжування, через кому")
+    ap.add_argument("--cap-ms", type=float, default=30.0, help="ліміт часу для рядка з обмеженням")
+    ap.add_argument("--batch-size", type=int, default=16)
+    ap.add_argument("--pair-ms", type=float, default=1.0, help="імітована вартість пари для офлайн-скорера")
+    ap.add_argument("--model", help="справжній cross-encoder замість офлайн-скорера")
+    ap.add_argument("--persist-dir", help="реальна Chroma-колекція замість синтетики")
+    ap.add_argument("--collection", default="lesson_rag_docs")
+    ap.add_argument("--emb-model", default="sentence-transformers/all-MiniLM-L6-v2")
+    ap.add_argument("--queries", type=Path, help="JSONL з query і relevant_ids (для --persist-dir)")
+    args = ap.parse_args()
+    if args.persist_dir and not args.model:
+        ap.error("для --persist-dir потрібен --model (офлайн-скорер рахує IDF по синтетичному корпусу)")
+
+    if args.persist_dir:
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+        from langchain_community.vectorstores import Chroma
+
+        vs = Chroma(collection_name=args.collection, persist_directory=args.persist_dir,
+                    embedding_function=HuggingFaceEmbeddings(model_name=args.emb_model))
+        queries = [json.loads(line) for line in args.queries.read_text(encoding="utf-8").splitlines() if line.strip()]
+
+        def first_stage(query, n):
+            # ID блоку в колекції — MD5 вмісту; у метадані кладемо для оцінки
+            docs = [d for d, _ in vs.similarity_search_with_score(query, k=n)]
+            for d in docs:
+                d.metadata["id"] = content_id(d)
+            return docs
+        texts = None
+    else:
+        ids, texts, queries = synthetic(args.n, args.queries_n, args.seed)
+        emb = HashEmbeddings()
+        index = VectorIndex(ids, np.asarray(emb.embed_documents(texts), dtype=np.float32))
+        by_id = dict(zip(ids, texts))
+
+        def first_stage(query, n):
+            hits = index.search_vectors(emb.embed_query(query), n, exact=True)[0]
+            return [Document(page_content=by_id[i], metadata={"id": i}) for i, _ in hits]
+
+    scorer = CrossEncoderScorer(args.model) if args.model else TermScorer(texts, args.pair_ms)
+    print(f"Запитів: {len(queries)}, скорер: {args.model or f'офлайн, {args.pair_ms} мс/пара'}")
+    print(evaluate("лише вектори", queries, first_stage, args.k))
+    for n in [int(x) for x in args.budgets.split(",")]:
+        print(evaluate(f"rerank top-{n}", queries, first_stage, args.k,
+                       Reranker(scorer, candidates=n, batch_size=args.batch_size)))
+    n = max(int(x) for x in args.budgets.split(","))
+    capped = Reranker(scorer, candidates=n, batch_size=args.batch_size, max_latency_ms=args.cap_ms)
+    print(evaluate(f"rerank top-{n}, ліміт {args.cap_ms:g} мс", queries, first_stage, args.k, capped))
+    cached = Reranker(scorer, candidates=n, batch_size=args.batch_size)
+    evaluate("прогрів", queries, first_stage, args.k, cached)
+    print(evaluate(f"rerank top-{n}, повтор (кеш)", queries, first_stage, args.k, cached))
+    print(cached.stats())
+
+
+if __name__ == "__main__":
+    main()
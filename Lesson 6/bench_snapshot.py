@@ -0,0 +1,118 @@
+"""
+Бенчмарк знімків колекції (common/vector_snapshot.py): float32 проти float16 та int8.
+
+Для кожного типу векторів: час запису, розмір на диску (вектори / усього),
+памʼять процесу після відкриття і після пошуку (RssAnon — власна памʼять,
+RssFile — сторінки файлів у page cache, спільні й витіснювані), час пакетного
+точного пошуку і recall@k відносно float32.
+
+За замовчуванням — 1M синтетичних кластеризованих векторів (dim=384, як у MiniLM)
+з короткими текстами й метаданими; з --persist-dir — реальна колекція.
+
+Приклади:
+    python bench_snapshot.py --n 1000000
+    python bench_snapshot.py --persist-dir chroma_db --collection lesson_rag_docs
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from bench_utils import WORDS, dir_size_mb
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.vector_snapshot import DTYPES, VectorSnapshot, export_snapshot, write_snapshot
+
+CHUNK = 50_000
+
+
+def rss_mb() -> dict:
+    """RssAnon / RssFile поточного процесу в МБ (Linux, /proc/self/status)."""
+    out = {}
+    for line in Path("/proc/self/status").read_text().splitlines():
+        key, _, value = line.partition(":")
+        if key in ("RssAnon", "RssFile"):
+            out[key] = round(int(value.split()[0]) / 1024, 1)
+    return out
+
+
+def synthetic_batches(n: int, dim: int, clusters: int = 200, seed: int = 0):
+    """Ті самі (ids, vectors, documents, metadatas) при кожному виклику — порціями по CHUNK."""
+    rnd = np.random.default_rng(seed)
+    centers = rnd.normal(size=(clusters, dim)).astype(np.float32)
+    words = np.array(WORDS)
+    for start in range(0, n, CHUNK):
+        m = min(CHUNK, n - start)
+        x = centers[rnd.integers(0, clusters, m)] + 0.6 * rnd.normal(size=(m, dim)).astype(np.float32)
+        x /= np.linalg.norm(x, axis=1, keepdims=True)
+        picks = rnd.integers(0, len(words), (m, 24))
+        ids = [f"b{start + i}" for i in range(m)]
+        docs = [" ".join(words[p]) for p in picks]
+        metas = [{"file": f"part_{(start + i) % 16}.txt", "block_title": f"Section {start + i}"} for i in range(m)]
+        yield ids, x, docs, metas
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--n", type=int, default=1_000_000)
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--dtypes", nargs="+", default=list(DTYPES), choices=DTYPES)
+    ap.add_argument("--persist-dir", help="реальна Chroma-колекція замість синтетики")
+    ap.add_argument("--collection", default="lesson_rag_docs")
+    ap.add_argument("--out", type=Path, help="де лишити знімки (за замовчуванням — тимчасовий каталог)")
+    args = ap.parse_args()
+
+    dtypes = ["float32"] + [d for d in args.dtypes if d != "float32"]  # float32 — еталон для recall
+    with tempfile.TemporaryDirectory() as tmp:
+        root = args.out or Path(tmp)
+        col = None
+        if args.persist_dir:
+            import chromadb
+
+            col = chromadb.PersistentClient(path=args.persist_dir).get_collection(args.collection)
+            print(f"Колекція {args.collection}: {col.count()} блоків, каталог Chroma: {dir_size_mb(args.persist_dir):.0f} МБ")
+
+        queries, reference = None, None
+        print(f"\n{'тип':>8}{'запис, с':>10}{'вектори, МБ':>13}{'усього, МБ':>12}{'відкриття, мс':>15}"
+              f"{'anon/file після пошуку, МБ':>28}{'пошук, с':>10}{'recall@' + str(args.k):>11}")
+        for dtype in dtypes:
+            path = root / f"snapshot_{dtype}"
+            t0 = time.perf_counter()
+            if col is not None:
+                export_snapshot(col, path, dtype=dtype)
+            else:
+                write_snapshot(path, synthetic_batches(args.n, args.dim), args.n, args.dim, dtype=dtype)
+            t_write = time.perf_counter() - t0
+
+            before = rss_mb()
+            t0 = time.perf_counter()
+            snap = VectorSnapshot.open(path)
+            t_open = (time.perf_counter() - t0) * 1000
+            if queries is None:
+                # запити — трохи зашумлені вектори з колекції
+                rnd = np.random.default_rng(1)
+                rows = np.sort(rnd.integers(0, len(snap), args.queries))
+                base = np.vstack([snap.vectors_f32(int(r), int(r) + 1) for r in rows])
+                queries = base + 0.05 * rnd.normal(size=base.shape).astype(np.float32)
+
+            t0 = time.perf_counter()
+            found, _ = snap.search_rows(queries, args.k)
+            t_search = time.perf_counter() - t0
+            after = rss_mb()
+            if reference is None:
+                reference = found
+            recall = np.mean([len(set(a) & set(b)) / len(b) for a, b in zip(found, reference)])
+            size = snap.nbytes()
+            mem = f"{after['RssAnon'] - before['RssAnon']:+.0f} / {after['RssFile'] - before['RssFile']:+.0f}"
+            print(f"{dtype:>8}{t_write:>10.1f}{size['vectors'] / 1e6:>13.0f}{size['total'] / 1e6:>12.0f}{t_open:>15.1f}"
+                  f"{mem:>28}{t_search:>10.2f}{recall:>11.4f}")
+            del snap
+
+
+if __name__ == "__main__":
+    main()
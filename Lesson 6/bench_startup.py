@@ -0,0 +1,111 @@
+"""
+Бенчмарк старту: скільки коштує один виклик індексації/пошуку окремим процесом.
+
+Кожен рядок — медіана --repeat запусків окремого процесу (повний wall time):
+- інтерпретатор без нічого (нижня межа);
+- імпорт важкого стеку (langchain_community + sentence_transformers) — те, що HW 6.py
+  раніше платив на самому import, ще до першого байта huge_file.txt;
+- import HW 6.py тепер (важкі залежності — ліниво, у get_vectorstore);
+- rag_cli.py --help (лише stdlib).
+
+З --files N: N маленьких TXT індексуються окремими викликами rag_cli.py — спершу
+--local (кожен виклик вантажить модель і Chroma), потім через демон (serve), а також
+по N запитів query тими самими двома шляхами. Усе — у тимчасовій робочій теці,
+тож справжні chroma_db / data/ не зачіпаються (потрібні chromadb і sentence-transformers).
+
+Приклади:
+    python bench_startup.py
+    python bench_startup.py --files 20 --repeat 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent))
+from common.local_daemon import is_running
+
+CLI = HERE / "rag_cli.py"
+HEAVY_IMPORTS = "import langchain_community.embeddings, langchain_community.vectorstores, sentence_transformers"
+LOAD_HW6 = f"import sys; sys.path.insert(0, {str(HERE)!r}); from rag_cli import load_hw6; load_hw6()"
+
+
+def timed(cmd, cwd=None) -> float:
+    """Секунди на процес; None, якщо він завершився з помилкою."""
+    t0 = time.perf_counter()
+    proc = subprocess.run(cmd, cwd=cwd, capture_output=True, text=True)
+    elapsed = time.perf_counter() - t0
+    if proc.returncode != 0:
+        timed.errors.add(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"код {proc.returncode}")
+        return None
+    return elapsed
+
+
+timed.errors = set()
+
+
+def row(label: str, samples) -> dict:
+    ok = [s for s in samples if s is not None]
+    errors, timed.errors = timed.errors, set()
+    if not ok:
+        return {"case": label, "median_ms": "недоступно", "error": "; ".join(sorted(errors))}
+    return {"case": label, "median_ms": round(statistics.median(ok) * 1000), "max_ms": round(max(ok) * 1000), "n": len(ok)}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--files", type=int, default=0, help="скільки маленьких файлів індексувати окремими викликами")
+    args = ap.parse_args()
+    py = sys.executable
+
+    print(row("python -c pass", [timed([py, "-c", "pass"]) for _ in range(args.repeat)]))
+    print(row("імпорт важкого стеку (раніше — на import HW 6)", [timed([py, "-c", HEAVY_IMPORTS]) for _ in range(args.repeat)]))
+    print(row("import HW 6 (ліниві імпорти)", [timed([py, "-c", LOAD_HW6]) for _ in range(args.repeat)]))
+    print(row("rag_cli.py --help", [timed([py, str(CLI), "--help"]) for _ in range(args.repeat)]))
+    if not args.files:
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        files = []
+        for i in range(args.files):
+            path = Path(tmp) / f"doc_{i}.txt"
+            path.write_text(f"Section {i}: Small File\nUsers must not misuse the service number {i}.\n\n\n"
+                            f"Section {i}b: Refunds\nRefund requests are handled within {i + 7} days.\n", encoding="utf-8")
+            files.append(path)
+        query = [str(CLI), "query", "What is prohibited?", "-k", "3"]
+
+        local_ingest = [timed([py, str(CLI), "--local", "ingest", str(f)], cwd=tmp) for f in files]
+        local_query = [timed([py, *query[:1], "--local", *query[1:]], cwd=tmp) for _ in range(args.repeat)]
+        print(row("ingest, окремий процес --local", local_ingest))
+        print(row("query, окремий процес --local", local_query))
+
+        sock = Path(tmp) / "rag.sock"
+        t0 = time.perf_counter()
+        daemon = subprocess.Popen([py, str(CLI), "--socket", str(sock), "serve"], cwd=tmp,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, env=dict(os.environ))
+        try:
+            while not is_running(sock):
+                if daemon.poll() is not None:
+                    print("   ! демон не стартував:", daemon.stderr.read().decode().strip().splitlines()[-1:])
+                    return
+                time.sleep(0.05)
+            print({"case": "старт демона (один раз)", "ms": round((time.perf_counter() - t0) * 1000)})
+            for f in files:  # ті самі файли вже є — змінюємо вміст, щоб демон справді ембедив
+                f.write_text(f.read_text(encoding="utf-8") + "\n\n\nSection extra\nChanged block.\n", encoding="utf-8")
+            print(row("ingest, окремий процес -> демон",
+                      [timed([py, str(CLI), "--socket", str(sock), "ingest", str(f)], cwd=tmp) for f in files]))
+            print(row("query, окремий процес -> демон",
+                      [timed([py, str(CLI), "--socket", str(sock), *query[1:]], cwd=tmp) for _ in range(args.repeat)]))
+        finally:
+            subprocess.run([py, str(CLI), "--socket", str(sock), "stop"], cwd=tmp, capture_output=True)
+            daemon.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Спільні утиліти для бенчмарків Lesson 6:
+- синтетичний корпус у форматі huge_file.txt (блоки через два порожні рядки, перший рядок — назва);
+- детерміністичні "ембедінги" без моделі (для офлайн-запусків);
+- завантаження HW 6.py як модуля (у назві файлу є пробіл);
+- пікова памʼять процесу (RSS), заміри часу ембедінгу, розмір каталогу.
+"""
+import importlib.util
+import random
+import resource
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent))
+from common.hash_embeddings import HashEmbeddings  # реекспорт для бенчмарків
+
+WORDS = (
+    "service terms account content user google rights license privacy data "
+    "agreement policy termination liability warranty dispute law court notice "
+    "access software update payment refund subscription restriction prohibited "
+    "abuse security intellectual property trademark copyright feedback consent "
+    "third party provider business consumer jurisdiction arbitration modification"
+).split()
+
+
+def write_synthetic_corpus(path: Path, n_blocks: int, seed: int = 42,
+                           min_words: int = 40, max_words: int = 220) -> Path:
+    """
+    Генерує файл із n_blocks блоків, схожих на huge_file.txt:
+    рядок-назва, далі 1-4 абзаци тексту; між блоками — два порожні рядки.
+    """
+    rnd = random.Random(seed)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as f:
+        for i in range(n_blocks):
+            title = f"Section {i}: " + " ".join(rnd.choice(WORDS) for _ in range(4)).title()
+            paras = []
+            for _ in range(rnd.randint(1, 4)):
+                n = rnd.randint(min_words, max_words) // 2
+                paras.append(" ".join(rnd.choice(WORDS) for _ in range(n)) + ".")
+            f.write(title + "\n" + "\n\n".join(paras) + "\n\n\n")
+    return path
+
+
+def load_hw6():
+    """
+    Імпортує 'HW 6.py' як модуль hw6 (звичайний import не працює через пробіл у назві).
+    """
+    if "hw6" in sys.modules:
+        return sys.modules["hw6"]
+    spec = importlib.util.spec_from_file_location("hw6", HERE / "HW 6.py")
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules["hw6"] = mod
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def peak_rss_mb() -> float:
+    """Пікова RSS поточного процесу в МБ (ru_maxrss: КБ на Linux, байти на macOS)."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        rss /= 1024
+    return rss / 1024
+
+
+class TimedEmbeddings(Embeddings):
+    """Обгортка, що підсумовує час, витрачений на ембедінг (щоб відділити його від запису в БД)."""
+
+    def __init__(self, inner: Embeddings):
+        self.inner = inner
+        self.seconds = 0.0
+        self.calls = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        t0 = time.perf_counter()
+        try:
+            return self.inner.embed_documents(texts)
+        finally:
+            self.seconds += time.perf_counter() - t0
+            self.calls += 1
+
+    def embed_query(self, text: str) -> List[float]:
+        t0 = time.perf_counter()
+        try:
+            return self.inner.embed_query(text)
+        finally:
+            self.seconds += time.perf_counter() - t0
+            self.calls += 1
+
+
+def dir_size_mb(path: Path) -> float:
+    return sum(f.stat().st_size for f in Path(path).rglob("*") if f.is_file()) / 1e6
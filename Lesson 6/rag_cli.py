@@ -0,0 +1,157 @@
+"""
+Легкий CLI для HW 6: індексація файлів і пошук без секунд на старт.
+
+Сам CLI імпортує лише stdlib; HW 6.py (а з ним langchain_community, модель і Chroma)
+вантажиться тільки коли справді треба працювати локально. Якщо запущений демон
+(serve), команди йдуть йому через Unix-сокет — модель і колекція в нього вже "теплі",
+тож виклик коштує лише старт інтерпретатора + сам запит.
+
+    python rag_cli.py serve &                        # демон: модель і Chroma вантажаться один раз
+    python rag_cli.py ingest docs/a.txt docs/b.txt   # через демон, якщо він слухає, інакше — у цьому процесі
+    python rag_cli.py query "What is prohibited?" -k 5 --mode hybrid
+    python rag_cli.py status
+    python rag_cli.py stop
+    python rag_cli.py --local ingest docs/a.txt      # без демона
+
+Шляхи БД (chroma_db, data/lesson_rag/...) — з конфігу HW 6.py, відносно робочої теки
+процесу, що виконує команду: запускайте демон з тієї ж теки, що й HW 6.py.
+"""
+import argparse
+import importlib.util
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent))
+from common.local_daemon import DaemonUnavailable, call, is_running, serve
+
+DEFAULT_SOCKET = Path("data/lesson_rag/rag.sock")
+SNIPPET_CHARS = 300
+
+
+def load_hw6():
+    """'HW 6.py' як модуль hw6 (у назві файлу пробіл); важкі залежності він імпортує ліниво."""
+    if "hw6" in sys.modules:
+        return sys.modules["hw6"]
+    spec = importlib.util.spec_from_file_location("hw6", HERE / "HW 6.py")
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules["hw6"] = mod
+    spec.loader.exec_module(mod)
+    return mod
+
+
+class Backend:
+    """Колекція з моделлю, BM25, реєстр ID і chunker HW 6 — створюються один раз на процес."""
+
+    def __init__(self):
+        t0 = time.perf_counter()
+        hw6 = self.hw6 = load_hw6()
+        self.vs = hw6.get_vectorstore(hw6.PERSIST_DIR, hw6.COLLECTION_NAME)
+        self.bm25 = hw6.open_bm25(self.vs)
+        self.registry = hw6.IdRegistry(hw6.IDS_DB, legacy_json=hw6.IDS_JSON)
+        self.chunker = hw6.make_chunker()
+        self.vs.embeddings.embed_query("warmup")  # модель вантажиться тут, а не на першому запиті
+        self.load_seconds = time.perf_counter() - t0
+        self._write_lock = threading.Lock()  # індексації — по черзі, пошук — паралельно
+
+    def ingest(self, req: Dict) -> List[Dict]:
+        paths = [Path(p) for p in req["paths"]]
+        missing = [str(p) for p in paths if not p.is_file()]
+        if missing:
+            raise FileNotFoundError(", ".join(missing))
+        with self._write_lock:
+            return [self.hw6.ingest_file(self.vs, p, self.registry, bm25=self.bm25, chunker=self.chunker)
+                    for p in paths]
+
+    def query(self, req: Dict) -> List[Dict]:
+        k = int(req.get("k") or 5)
+        mode = req.get("mode") or self.hw6.SEARCH_MODE
+        if self.bm25 is not None and mode != "dense":
+            docs = self.hw6.HybridSearcher(self.vs, self.bm25).similarity_search(req["text"], k=k, mode=mode)
+        else:
+            docs = self.vs.similarity_search(req["text"], k=k)
+        return [{"block_title": (d.metadata or {}).get("block_title", "Untitled"),
+                 "file": (d.metadata or {}).get("file"),
+                 "snippet": d.page_content[:SNIPPET_CHARS].replace("\n", " ")} for d in docs]
+
+    def stats(self, req: Dict) -> Dict:
+        emb = self.vs.embeddings
+        return {"backend_load_s": round(self.load_seconds, 2), "collection": self.hw6.COLLECTION_NAME,
+                "count": self.vs._collection.count(),
+                "embeddings_cache": emb.stats() if hasattr(emb, "stats") else None,
+                "chunking": self.chunker.report() if self.chunker is not None else None}
+
+    def handlers(self) -> Dict:
+        return {"ingest": self.ingest, "query": self.query, "stats": self.stats}
+
+
+def run(args, cmd: str, **params):
+    """Через демон, якщо він слухає (і не --local), інакше — у цьому процесі. -> (результат, де, мс)."""
+    t0 = time.perf_counter()
+    if not args.local:
+        try:
+            return call(args.socket, cmd, **params), "демон", (time.perf_counter() - t0) * 1000
+        except DaemonUnavailable:
+            print(f"[rag_cli] демон не запущений ({args.socket}) — працюю локально", file=sys.stderr)
+    result = getattr(Backend(), cmd)(params)
+    return result, "локально", (time.perf_counter() - t0) * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--socket", type=Path, default=DEFAULT_SOCKET)
+    ap.add_argument("--local", action="store_true", help="не звертатися до демона")
+    ap.add_argument("--json", action="store_true", help="результат одним JSON")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("serve", help="запустити демон (блокує; зупинка — stop або Ctrl+C)")
+    ing = sub.add_parser("ingest", help="проіндексувати TXT-файли")
+    ing.add_argument("paths", nargs="+", type=Path)
+    q = sub.add_parser("query", help="пошук у колекції")
+    q.add_argument("text")
+    q.add_argument("-k", type=int, default=5)
+    q.add_argument("--mode", choices=["lexical", "dense", "hybrid"])
+    sub.add_parser("status", help="чи працює демон і його статистика")
+    sub.add_parser("stop", help="зупинити демон")
+    args = ap.parse_args()
+
+    if args.cmd == "serve":
+        backend = Backend()
+        serve(args.socket, backend.handlers(),
+              on_ready=lambda: print(f"[rag_cli] демон готовий за {backend.load_seconds:.1f} с: {args.socket}",
+                                     flush=True))
+        return
+    if args.cmd in ("status", "stop"):
+        if not is_running(args.socket):
+            print(f"Демон не запущений ({args.socket})")
+            return
+        result = call(args.socket, "ping" if args.cmd == "stop" else "stats")
+        if args.cmd == "stop":
+            call(args.socket, "shutdown")
+            result = {"stopped": True, **result}
+        else:
+            result = {**call(args.socket, "ping"), **result}
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return
+
+    if args.cmd == "ingest":
+        result, where, ms = run(args, "ingest", paths=[str(p.resolve()) for p in args.paths])
+    else:
+        result, where, ms = run(args, "query", text=args.text, k=args.k, mode=args.mode)
+    if args.json:
+        print(json.dumps({"result": result, "where": where, "ms": round(ms, 1)}, ensure_ascii=False))
+        return
+    if args.cmd == "ingest":
+        for r in result:
+            print(f"✅ {r['file']}: нових {r['added']}, без змін {r['unchanged']}, видалено {r['deleted']} ({r['seconds']} с)")
+    else:
+        for i, r in enumerate(result, 1):
+            print(f"{i}. {r['block_title']}  [{r['file']}]\n   {r['snippet']}")
+    print(f"⏱ {ms:.0f} мс ({where})")
+
+
+if __name__ == "__main__":
+    main()
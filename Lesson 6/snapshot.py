@@ -0,0 +1,58 @@
+"""
+Знімок Chroma-колекції у компактні плоскі файли (common/vector_snapshot.py) і назад.
+
+    python snapshot.py export --persist-dir chroma_db --collection lesson_rag_docs --out snapshots/rag_int8 --dtype int8
+    python snapshot.py import --snapshot snapshots/rag_int8 --persist-dir chroma_db_copy --collection lesson_rag_docs
+    python snapshot.py info --snapshot snapshots/rag_int8
+
+Знімок переносять між машинами замість каталогу chroma_db; для read-only пошуку
+(VectorSnapshot.search_vectors / AnnSearcher(vs, snapshot)) сама Chroma не потрібна.
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.vector_snapshot import DTYPES, VectorSnapshot, export_snapshot, import_snapshot
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    exp = sub.add_parser("export", help="Chroma -> знімок")
+    exp.add_argument("--persist-dir", default="chroma_db")
+    exp.add_argument("--collection", default="lesson_rag_docs")
+    exp.add_argument("--out", type=Path, required=True)
+    exp.add_argument("--dtype", default="int8", choices=DTYPES)
+    imp = sub.add_parser("import", help="знімок -> Chroma")
+    imp.add_argument("--snapshot", type=Path, required=True)
+    imp.add_argument("--persist-dir", default="chroma_db")
+    imp.add_argument("--collection", default="lesson_rag_docs")
+    info = sub.add_parser("info", help="опис знімка")
+    info.add_argument("--snapshot", type=Path, required=True)
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    if args.cmd == "info":
+        snap = VectorSnapshot.open(args.snapshot)
+        print(json.dumps({**snap.manifest, "bytes": snap.nbytes()}, ensure_ascii=False, indent=2))
+        return
+
+    import chromadb
+
+    client = chromadb.PersistentClient(path=args.persist_dir)
+    if args.cmd == "export":
+        manifest = export_snapshot(client.get_collection(args.collection), args.out, dtype=args.dtype)
+        print(f"✅ {manifest['count']} блоків -> {args.out} ({args.dtype}, "
+              f"{VectorSnapshot.open(args.out).nbytes()['total'] / 1e6:.1f} МБ), {time.perf_counter() - t0:.1f} с")
+    else:
+        space = VectorSnapshot.open(args.snapshot).space
+        col = client.get_or_create_collection(args.collection, metadata={"hnsw:space": space})
+        n = import_snapshot(args.snapshot, col)
+        print(f"✅ {n} блоків -> колекція '{args.collection}' у {args.persist_dir}, {time.perf_counter() - t0:.1f} с")
+
+
+if __name__ == "__main__":
+    main()
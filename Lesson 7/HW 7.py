@@ -1,25 +1,76 @@
 import os
 import re
-import json
+import sys
+import time
 import hashlib
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional, Union
 
+import dotenv
 import streamlit as st
+from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_community.vectorstores import Chroma
 
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.embedding_cache import cached_embeddings
+from common.id_registry import IdRegistry
+from common.ann_search import AnnSearcher
+from common.bm25_index import BM25Index, HybridSearcher, collection_db_path
+from common.chunker import Chunk, Chunker, token_counter
+from common.doc_browser import Page, browse, fetch_many
+from common.reranker import DEFAULT_MODEL as DEFAULT_RERANK_MODEL, CrossEncoderScorer, Reranker
+from common.streaming import TimedStream
+from ingest_jobs import IngestJobs
+
 
 # ===================== КОНФІГ (можна змінити у сайдбарі) =====================
 DEFAULT_PERSIST_DIR = "chroma_db"
 DEFAULT_COLLECTION = "lesson_rag_docs"
-DEFAULT_IDS_JSON = "data/lesson_rag/ids.json"
+DEFAULT_IDS_DB = "data/lesson_rag/ids.sqlite"
+DEFAULT_IDS_JSON = "data/lesson_rag/ids.json"  # старий формат — імпортується в реєстр один раз
 DEFAULT_EMB_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+DEFAULT_EMB_CACHE = "data/emb_cache.sqlite"
+DEFAULT_BM25_DB = "data/lesson_rag/bm25.sqlite"
+DEFAULT_LLM_MODEL = "gemini-2.0-flash"
+UPLOAD_SPOOL_DIR = Path("data/uploads")  # завантаження чекають тут на фонову індексацію
+INGEST_WORKERS = 2                       # скільки задач індексації йде одночасно
+
+ANSWER_PROMPT = """Дай відповідь на питання, спираючись лише на фрагменти документів нижче.
+Якщо відповіді у фрагментах немає — так і скажи.
+
+Фрагменти:
+{context}
+
+Питання: {question}
+Відповідь:"""
+
+dotenv.load_dotenv()
+
+
+# Streamlit перезапускає весь скрипт на кожну дію, тому модель і Chroma-клієнт
+# кешуються на рівні процесу (st.cache_resource) за аргументами функції:
+# зміна налаштувань у сайдбарі = новий ключ. max_entries обмежує памʼять,
+# коли користувач перемикається між кількома моделями/колекціями.
+MAX_CACHED_MODELS = 2
+MAX_CACHED_STORES = 8
+MAX_BROWSE_PAGE = 500      # рядків на сторінці перегляду
+MAX_CACHED_PAGES = 32
 
 
 # ===================== УТИЛІТИ =====================
-def get_vectorstore(persist_dir: str, collection_name: str, model_name: str):
-    embeddings = HuggingFaceEmbeddings(model_name=model_name)
+@st.cache_resource(max_entries=MAX_CACHED_MODELS, show_spinner="Завантажую модель ембедінгів…")
+def get_embeddings(model_name: str, emb_cache: str = ""):
+    return cached_embeddings(
+        HuggingFaceEmbeddings(model_name=model_name),
+        model_name=model_name,
+        db_path=Path(emb_cache) if emb_cache else None,
+    )
+
+@st.cache_resource(max_entries=MAX_CACHED_STORES, show_spinner="Відкриваю колекцію…")
+def get_vectorstore(persist_dir: str, collection_name: str, model_name: str, emb_cache: str = ""):
+    embeddings = get_embeddings(model_name, emb_cache)
     vs = Chroma(
         collection_name=collection_name,
         embedding_function=embeddings,
@@ -44,34 +95,84 @@ def stable_id_from_text(text: str) -> str:
     """Детерміністичний ID: MD5 від вмісту блоку."""
     return hashlib.md5(text.encode("utf-8")).hexdigest()
 
-def append_ids_json(ids_path: Path, items: List[Dict]):
-    payload = {"items": []}
-    if ids_path.exists():
-        try:
-            payload = json.loads(ids_path.read_text(encoding="utf-8"))
-            if not isinstance(payload, dict) or "items" not in payload or not isinstance(payload["items"], list):
-                payload = {"items": []}
-        except Exception:
-            payload = {"items": []}
-    payload["items"].extend(items)
-    ids_path.parent.mkdir(parents=True, exist_ok=True)
-    ids_path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
-
-def add_blocks_to_db(vs: Chroma, blocks: List[str], filename_for_meta: str, ids_json_path: Path):
+@st.cache_resource(max_entries=2, show_spinner="Будую HNSW-індекс з колекції…")
+def get_ann_searcher(persist_dir: str, collection_name: str, model_name: str, emb_cache: str,
+                     M: int, ef_construction: int):
+    vs = get_vectorstore(persist_dir, collection_name, model_name, emb_cache)
+    return AnnSearcher.from_vectorstore(vs, M=M, ef_construction=ef_construction)
+
+@st.cache_resource(max_entries=MAX_CACHED_MODELS, show_spinner="Завантажую токенізатор…")
+def get_token_counter(model_name: str):
+    return token_counter(model_name)
+
+@st.cache_resource
+def get_ingest_jobs():
+    """Один пул фонових задач на процес: задачі й прогрес переживають перезапуски скрипта."""
+    return IngestJobs(workers=INGEST_WORKERS, spool_dir=UPLOAD_SPOOL_DIR, id_fn=stable_id_from_text)
+
+@st.cache_resource(max_entries=MAX_CACHED_MODELS, show_spinner="Завантажую cross-encoder…")
+def get_reranker(model_name: str):
+    """Модель і кеш оцінок (запит, блок) — одні на процес; бюджет і ліміт задаються на кожен запит."""
+    return Reranker(CrossEncoderScorer(model_name))
+
+@st.cache_resource
+def get_llm(model_name: str):
+    return ChatGoogleGenerativeAI(model=model_name, google_api_key=os.getenv("GEMINI_API_KEY"))
+
+@st.cache_resource
+def get_registry(ids_db: str, legacy_json: str = ""):
+    return IdRegistry(Path(ids_db), legacy_json=Path(legacy_json) if legacy_json else None)
+
+@st.cache_resource(max_entries=MAX_CACHED_STORES, show_spinner="Синхронізую BM25-індекс з колекцією…")
+def get_bm25(bm25_db: str, persist_dir: str, collection_name: str, model_name: str, emb_cache: str = ""):
+    """BM25-індекс для колекції (свій файл на колекцію); блоки, додані до його появи, дотягуються з Chroma."""
+    if not bm25_db:
+        return None
+    bm25 = BM25Index(collection_db_path(Path(bm25_db), persist_dir, collection_name))
+    vs = get_vectorstore(persist_dir, collection_name, model_name, emb_cache)
+    if bm25.count() != vs._collection.count():
+        bm25.sync_from_collection(vs._collection)
+    return bm25
+
+@st.cache_data(max_entries=MAX_CACHED_PAGES, show_spinner=False)
+def browse_page(persist_dir: str, collection_name: str, model_name: str, emb_cache: str, ids_db: str,
+                ids_json: str, file: Optional[str], title_prefix: str, limit: int, cursor: Optional[str],
+                generation: int) -> Page:
+    """
+    Сторінка перегляду; Streamlit перезапускає скрипт на кожну дію, тож get до колекції
+    йде лише при зміні сторінки/фільтрів або generation реєстру (хтось додав/видалив блоки).
+    """
+    collection = get_vectorstore(persist_dir, collection_name, model_name, emb_cache)._collection
+    return browse(collection, get_registry(ids_db, ids_json), file=file, title_prefix=title_prefix,
+                  limit=limit, cursor=cursor)
+
+@st.cache_data(max_entries=MAX_CACHED_STORES, show_spinner=False)
+def registry_files(ids_db: str, ids_json: str, generation: int) -> List[str]:
+    return get_registry(ids_db, ids_json).files()
+
+def add_blocks_to_db(vs: Chroma, blocks: List[Union[str, Chunk]], filename_for_meta: str, registry: IdRegistry,
+                     bm25: Optional[BM25Index] = None):
     texts, metadatas, ids = [], [], []
+    seen = set()
     for b in blocks:
-        bid = stable_id_from_text(b)
-        metadatas.append({"file": filename_for_meta, "block_title": title_of_block(b)})
-        texts.append(b)
+        text, title = (b.text, b.title) if isinstance(b, Chunk) else (b, title_of_block(b))
+        bid = stable_id_from_text(text)
+        if bid in seen:
+            continue  # однакові блоки дають однаковий id — Chroma не приймає дублі в одному upsert
+        seen.add(bid)
+        metadatas.append({"file": filename_for_meta, "block_title": title})
+        texts.append(text)
         ids.append(bid)
 
     # upsert (Chroma сам оновить/додасть за id)
     vs.add_texts(texts=texts, metadatas=metadatas, ids=ids)
     vs.persist()
+    if bm25 is not None:
+        bm25.add(ids, texts)  # ті самі ID — лексичний індекс не відстає від колекції
 
-    # у JSON пишемо лише нові ідентифікатори з метаданими
+    # реєстр робить upsert за id, тож повторне додавання не плодить дублікатів
     items = [{"id": i, "file": m["file"], "block_title": m["block_title"]} for i, m in zip(ids, metadatas)]
-    append_ids_json(Path(ids_json_path), items)
+    registry.upsert(items)
 
     return ids, metadatas
 
@@ -85,71 +186,168 @@ with st.sidebar:
     st.header("Налаштування БД")
     persist_dir = st.text_input("Chroma persist_directory", DEFAULT_PERSIST_DIR)
     collection_name = st.text_input("Collection name", DEFAULT_COLLECTION)
-    ids_json = st.text_input("Шлях до ids.json", DEFAULT_IDS_JSON)
+    ids_db = st.text_input("Реєстр ID (SQLite)", DEFAULT_IDS_DB)
+    ids_json = st.text_input("Старий ids.json для імпорту", DEFAULT_IDS_JSON)
     emb_model = st.text_input("Модель ембедінгів", DEFAULT_EMB_MODEL)
+    emb_cache = st.text_input("Кеш ембедінгів (порожньо — вимкнено)", DEFAULT_EMB_CACHE)
+    bm25_db = st.text_input("BM25-індекс (порожньо — вимкнено)", DEFAULT_BM25_DB)
+    use_chunker = st.checkbox("Ділити блоки під вікно моделі", value=True,
+                              help="Довгі блоки — на фрагменти за токенами моделі, короткі сусідні — зливати")
+    if use_chunker:
+        c1, c2, c3 = st.columns(3)
+        chunk_target = c1.number_input("target", 32, 512, 200, step=8)
+        chunk_max = c2.number_input("max", 32, 512, 256, step=8)
+        chunk_overlap = c3.number_input("overlap", 0, 128, 32, step=8)
     st.caption("Переконайтеся, що цей набір налаштувань відповідає тому, що ви використовували на попередньому занятті.")
+    if st.button("Скинути кеш моделей і БД"):
+        # лише моделі й підключення: get_ingest_jobs не чіпаємо — пул із задачами в роботі має пережити скидання
+        for cached in (get_embeddings, get_vectorstore, get_ann_searcher, get_token_counter, get_reranker,
+                       get_llm, get_registry, get_bm25, browse_page, registry_files):
+            cached.clear()
 
-vs = get_vectorstore(persist_dir, collection_name, emb_model)
+vs = get_vectorstore(persist_dir, collection_name, emb_model, emb_cache)
+registry = get_registry(ids_db, ids_json)
+bm25 = get_bm25(bm25_db, persist_dir, collection_name, emb_model, emb_cache)
+if hasattr(vs.embeddings, "stats"):
+    st.sidebar.caption(f"Кеш ембедінгів: {vs.embeddings.stats()}")
 
 tab_get, tab_add, tab_search = st.tabs(["📄 Отримати документ", "➕ Додати документ", "🔎 Пошук (перевірка)"])
 
 # -------------------- Отримати документ --------------------
 with tab_get:
-    st.subheader("Отримати документ за ID")
-    get_id = st.text_input("Введіть ID документа", "")
-    if st.button("Завантажити документ"):
-        if not get_id:
-            st.warning("Введіть ID.")
+    collection = vs._collection  # low-level chromadb.Collection: get за ID і where-фільтри без similarity-костилів
+
+    st.subheader("Отримати документи за ID")
+    raw_ids = st.text_area("ID документів (через кому, пробіл або з нового рядка)", "", height=100)
+    if st.button("Завантажити документи"):
+        wanted = [i for i in re.split(r"[\s,;]+", raw_ids) if i]
+        if not wanted:
+            st.warning("Введіть хоча б один ID.")
         else:
             try:
-                # У Chroma немає прямого get_by_id у LangChain-обгортці — але можна через similarity на сам ID (як костиль),
-                # або через внутрішній клієнт. Найпростіше: пошук exact id через raw API:
-                collection = vs._collection  # low-level chromadb.Collection
-                res = collection.get(ids=[get_id])
-                ids_ret = res.get("ids", [])
-                if ids_ret:
-                    meta = res.get("metadatas", [{}])[0] or {}
-                    cont = res.get("documents", [""])[0]
-                    st.success("Документ знайдено.")
-                    st.write(f"**ID:** `{get_id}`")
-                    st.write(f"**Файл:** {meta.get('file', '—')}")
-                    st.write(f"**Назва блоку:** {meta.get('block_title', '—')}")
-                    st.text_area("Вміст", cont, height=300)
-                else:
-                    st.error("Документ з таким ID не знайдено.")
+                found = fetch_many(collection, wanted)  # один get на всі ID
+                missing = [i for i in dict.fromkeys(wanted) if i not in {r["id"] for r in found}]
+                if found:
+                    st.success(f"Знайдено {len(found)} з {len(found) + len(missing)}.")
+                for row in found:
+                    with st.expander(f"{row['block_title'] or '—'} · {row['file'] or '—'} · {row['id']}",
+                                     expanded=len(found) == 1):
+                        st.text_area("Вміст", row["document"], height=300, key=f"doc_{row['id']}")
+                if missing:
+                    st.error("Не знайдено: " + ", ".join(f"`{i}`" for i in missing))
             except Exception as e:
                 st.error(f"Помилка: {e}")
 
+    st.subheader("Перегляд за файлом і назвою блоку")
+    generation = registry.generation()
+    c1, c2, c3 = st.columns([2, 2, 1])
+    browse_file = c1.selectbox("Файл", ["(усі)"] + registry_files(ids_db, ids_json, generation))
+    browse_prefix = c2.text_input("Назва блоку починається з", "", help="З урахуванням регістру; шукає реєстр ID")
+    page_size = c3.number_input("На сторінці", 10, MAX_BROWSE_PAGE, 50, step=10)
+    browse_key = (browse_file, browse_prefix, page_size)
+    # стек курсорів: [None, курсор 2-ї сторінки, ...]; нові фільтри — знову з першої сторінки
+    if st.session_state.get("browse_key") != browse_key:
+        st.session_state.browse_key = browse_key
+        st.session_state.browse_cursors = [None]
+    cursors = st.session_state.browse_cursors
+    try:
+        page = browse_page(persist_dir, collection_name, emb_model, emb_cache, ids_db, ids_json,
+                           None if browse_file == "(усі)" else browse_file, browse_prefix, int(page_size),
+                           cursors[-1], generation)
+        st.caption(f"Сторінка {len(cursors)}: {len(page.items)} блоків")
+        st.dataframe(page.items, use_container_width=True, hide_index=True)
+        b1, b2, _ = st.columns([1, 1, 6])
+        if b1.button("← Попередня", disabled=len(cursors) == 1):
+            cursors.pop()
+            st.rerun()
+        if b2.button("Наступна →", disabled=page.next_cursor is None):
+            cursors.append(page.next_cursor)
+            st.rerun()
+    except Exception as e:
+        st.error(f"Помилка: {e}")
+
 # -------------------- Додати документ --------------------
 with tab_add:
     st.subheader("Додати новий документ")
-    st.markdown("**Варіант 1:** завантажити TXT‑файл")
-    up = st.file_uploader("Оберіть TXT", type=["txt"])
+
+    def new_chunker(count_tokens=None) -> Optional[Chunker]:
+        if not use_chunker:
+            return None
+        return Chunker(count_tokens or get_token_counter(emb_model), target_tokens=min(chunk_target, chunk_max),
+                       max_tokens=chunk_max, overlap_tokens=min(chunk_overlap, chunk_target // 2),
+                       title_fn=title_of_block)
+
+    def existing_ids(ids: List[str]) -> set:
+        return set(vs._collection.get(ids=ids, include=[])["ids"]) if ids else set()
+
+    st.markdown("**Варіант 1:** завантажити TXT‑файли або ZIP з ними (індексуються у фоні)")
+    ups = st.file_uploader("Оберіть TXT / ZIP", type=["txt", "zip"], accept_multiple_files=True)
+    if st.button("Індексувати файли у фоні", disabled=not ups):
+        count_tokens = get_token_counter(emb_model) if use_chunker else None  # токенізатор — з основного потоку
+        job = get_ingest_jobs().submit(
+            [(u.name, u) for u in ups],
+            sink=lambda blocks, name: add_blocks_to_db(vs, blocks, name, registry, bm25),
+            exists=existing_ids,
+            chunker_factory=lambda: new_chunker(count_tokens),
+            on_done=lambda job: get_ann_searcher.clear(),  # локальний HNSW-індекс перебудується з новими блоками
+        )
+        st.success(f"Задачу `{job.id}` поставлено в чергу: файлів {len(job.files)}, {job.bytes_total / 1e6:.1f} МБ.")
+
+    def render_jobs():
+        jobs = get_ingest_jobs()
+        all_jobs = jobs.jobs()
+        if not all_jobs:
+            return
+        st.markdown("#### Фонові задачі")
+        for job in all_jobs:
+            snap = job.snapshot()
+            label = {"queued": "⏳ у черзі", "running": "⚙️ виконується", "done": "✅ готово", "error": "❌ помилка"}
+            st.write(f"`{snap['id']}` — {label[snap['status']]} — файлів {snap['files']}"
+                     + (f", зараз: {snap['current_file']}" if snap["current_file"] else ""))
+            if snap["status"] in ("queued", "running"):
+                st.progress(min(snap["progress"], 1.0))
+            st.caption(f"блоків: {snap['blocks_seen']} (додано {snap['added']}, дублікатів {snap['duplicates']}), "
+                       f"{snap['blocks_per_s']} блоків/с, {snap['elapsed_s']} с")
+            if snap["error"]:
+                st.error(snap["error"])
+        if not jobs.active() and st.button("Прибрати завершені задачі"):
+            jobs.forget_finished()
+            st.rerun()
+
+    # поки є активні задачі, блок із прогресом перемальовується щосекунди (сама сторінка — ні)
+    if hasattr(st, "fragment"):
+        st.fragment(run_every=1.0 if get_ingest_jobs().active() else None)(render_jobs)()
+    else:
+        render_jobs()
+        if get_ingest_jobs().active() and st.button("Оновити прогрес"):
+            st.rerun()
+
     st.markdown("**Варіант 2:** вставити текст вручну")
     manual_text = st.text_area("Текст (за бажанням)", height=200, placeholder="Вставте сюди текст, якщо не завантажуєте файл…")
     filename_for_meta = st.text_input("Назва файлу для метаданих", value="manual_input.txt")
 
     if st.button("Додати до БД"):
         try:
-            raw_text = ""
-            used_filename = filename_for_meta
-
-            if up is not None:
-                raw_text = up.read().decode("utf-8", errors="ignore")
-                used_filename = up.name
-            elif manual_text.strip():
-                raw_text = manual_text
-            else:
-                st.warning("Додайте файл або текст.")
+            raw_text = manual_text
+            if not raw_text.strip():
+                st.warning("Додайте текст (або файли у варіанті 1).")
                 st.stop()
 
             blocks = split_into_blocks(raw_text) if ("\n\n\n" in raw_text or "\r\n\r\n\r\n" in raw_text) else [raw_text.strip()]
             if not blocks:
                 st.warning("Порожній вміст.")
                 st.stop()
+            chunker = new_chunker()
+            if chunker is not None:
+                blocks = chunker.chunks(blocks)
 
-            ids, metas = add_blocks_to_db(vs, blocks, used_filename, ids_json)
+            ids, metas = add_blocks_to_db(vs, blocks, filename_for_meta, registry, bm25)
+            get_ann_searcher.clear()  # локальний HNSW-індекс перебудується з новими блоками
             st.success(f"Додано {len(ids)} блок(и/ів).")
+            if chunker is not None:
+                report = chunker.report()
+                st.caption(f"Розбиття: блоків {report['blocks']} -> фрагментів {report['chunks']}; "
+                           f"обрізалося б токенів: {report['truncated_tokens_before']} -> {report['truncated_tokens_after']}")
             with st.expander("Показати додані ID"):
                 for i, m in zip(ids, metas):
                     st.write(f"- `{i}` — **{m.get('block_title','Untitled')}** (файл: {m.get('file','—')})")
@@ -162,15 +360,73 @@ with tab_search:
     st.subheader("Семантичний пошук (перевірка)")
     q = st.text_input("Пошуковий запит", value="What actions are prohibited by Google Terms of Service?")
     k = st.slider("Скільки результатів показати", 1, 10, 5)
+    modes = ["Chroma (за замовчуванням)", "HNSW з параметрами", "Точний перебір"]
+    if bm25 is not None:
+        modes += ["BM25 (лексичний)", "Гібрид BM25 + вектори (RRF)"]
+    search_mode = st.radio("Режим пошуку", modes, horizontal=True)
+    if search_mode in ("HNSW з параметрами", "Точний перебір"):
+        c1, c2, c3 = st.columns(3)
+        ef_search = c1.slider("ef_search (більше — точніше, але повільніше)", 10, 512, 64)
+        hnsw_m = c2.number_input("M (при побудові)", 4, 64, 16)
+        hnsw_efc = c3.number_input("ef_construction (при побудові)", 16, 800, 200)
+    use_rerank = st.checkbox("Переранжувати cross-encoder-ом",
+                             help="Бере більше кандидатів з обраного режиму і переоцінює пари (запит, блок)")
+    if use_rerank:
+        c1, c2, c3 = st.columns(3)
+        rerank_model = c1.text_input("Модель cross-encoder", DEFAULT_RERANK_MODEL)
+        rerank_candidates = c2.slider("Кандидатів (бюджет)", 5, 100, 30)
+        rerank_cap = c3.number_input("Ліміт часу, мс (0 — без ліміту)", 0, 10_000, 300, step=50)
+    with_answer = st.checkbox("Згенерувати відповідь LLM за знайденими блоками (потоково)")
+    if with_answer:
+        llm_model = st.text_input("Модель LLM", DEFAULT_LLM_MODEL)
     if st.button("Шукати"):
         try:
-            docs = vs.similarity_search(q, k=k)
+            if search_mode == "Chroma (за замовчуванням)":
+                retrieve = lambda query, n: vs.similarity_search(query, k=n)
+            elif search_mode in ("BM25 (лексичний)", "Гібрид BM25 + вектори (RRF)"):
+                # лексичний режим не ембедить запит — лише інвертований індекс
+                mode = "lexical" if search_mode == "BM25 (лексичний)" else "hybrid"
+                retrieve = lambda query, n: HybridSearcher(vs, bm25).similarity_search(query, k=n, mode=mode)
+            else:
+                searcher = get_ann_searcher(persist_dir, collection_name, emb_model, emb_cache,
+                                            int(hnsw_m), int(hnsw_efc))
+                retrieve = lambda query, n: searcher.similarity_search(
+                    query, k=n, exact=search_mode == "Точний перебір", ef_search=ef_search)
+            scores = None
+            if use_rerank:
+                reranker = get_reranker(rerank_model)  # модель вантажиться до заміру часу
+            t0 = time.perf_counter()
+            if use_rerank:
+                candidates = retrieve(q, max(rerank_candidates, k))
+                t1 = time.perf_counter()
+                # бюджет і ліміт — на цей виклик: reranker спільний для всіх сесій (cache_resource)
+                ranked = reranker.rerank(q, candidates, k, candidates=rerank_candidates,
+                                         max_latency_ms=rerank_cap or None) if candidates else []
+                docs, scores = map(list, zip(*ranked)) if ranked else ([], [])
+                r = reranker.last
+                st.caption(f"⏱ {(time.perf_counter() - t0) * 1000:.1f} мс: кандидати {(t1 - t0) * 1000:.1f} мс + "
+                           f"cross-encoder {r['total_ms']} мс (оцінено {r['scored']}, з кешу {r['cached']}, "
+                           f"поза лімітом {r['skipped']} з {r['candidates']})")
+            else:
+                docs = retrieve(q, k)
+                st.caption(f"⏱ {(time.perf_counter() - t0) * 1000:.1f} мс")
+            if search_mode == "HNSW з параметрами":
+                st.caption(f"recall@{k} відносно точного перебору: {searcher.recall_at_k([q], k):.2f}")
             if not docs:
                 st.info("Нічого не знайдено.")
             else:
-                for d in docs:
+                if with_answer:
+                    st.markdown("#### 🤖 Відповідь")
+                    context = "\n\n---\n\n".join(d.page_content for d in docs)
+                    stream = TimedStream(get_llm(llm_model).stream(ANSWER_PROMPT.format(context=context, question=q)))
+                    st.write_stream(stream)
+                    m = stream.metrics()
+                    st.caption(f"TTFT {m['ttft_ms']} мс, повна відповідь {m['total_ms']} мс")
+                    st.markdown("#### Знайдені блоки")
+                for n, d in enumerate(docs):
                     meta = d.metadata or {}
-                    st.markdown(f"**{meta.get('block_title','Untitled')}**  \n*Файл:* {meta.get('file','—')}")
+                    score = f"  \n*Оцінка cross-encoder:* {scores[n]:.3f}" if scores and scores[n] is not None else ""
+                    st.markdown(f"**{meta.get('block_title','Untitled')}**  \n*Файл:* {meta.get('file','—')}{score}")
                     st.code(d.page_content[:1200])
         except Exception as e:
             st.error(f"Помилка: {e}")
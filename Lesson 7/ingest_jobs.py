@@ -0,0 +1,202 @@
+"""
+Фонова індексація завантажених файлів для адмінки (HW 7.py).
+
+IngestJobs — пул потоків на рівні процесу (у Streamlit тримається через
+st.cache_resource, тож задачі переживають перезапуски скрипта):
+- submit() зберігає завантаження на диск (spool_dir/<job_id>/) і одразу
+  повертає Job; файли не декодуються в памʼяті цілком;
+- TXT і ZIP (усі .txt усередині) читаються потоково (iter_text_blocks),
+  за потреби ріжуться chunker-ом і пачками по batch_size ідуть у sink —
+  той самий шлях запису, що й у ручному додаванні (Chroma + BM25 + реєстр ID);
+- блоки, чий ID уже бачили в цій задачі або вже є в колекції, не ембедяться
+  повторно, а рахуються як дублікати;
+- Job.snapshot() — прогрес, швидкість (блоків/с) і підсумок для UI.
+"""
+import hashlib
+import io
+import shutil
+import threading
+import time
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple, Union
+
+from common.chunker import Chunk, Chunker, iter_text_blocks
+
+BATCH_SIZE = 256
+COPY_BUFFER = 1 << 20
+
+# sink(blocks, file_name) записує пачку в БД; exists(ids) -> які з цих ID уже є в колекції
+Sink = Callable[[List[Union[str, Chunk]], str], object]
+Exists = Callable[[List[str]], Set[str]]
+
+
+@dataclass
+class Job:
+    id: str
+    files: List[Path]
+    status: str = "queued"          # queued | running | done | error
+    bytes_total: int = 0
+    bytes_done: int = 0
+    files_done: int = 0
+    current_file: str = ""
+    blocks_seen: int = 0
+    added: int = 0
+    duplicates: int = 0
+    created: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    error: Optional[str] = None
+    chunk_report: Optional[Dict] = None
+
+    @property
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    def snapshot(self) -> Dict:
+        elapsed = self.elapsed
+        return {
+            "id": self.id,
+            "status": self.status,
+            "files": f"{self.files_done}/{len(self.files)}",
+            "current_file": self.current_file,
+            "progress": round(self.bytes_done / self.bytes_total, 3) if self.bytes_total else 0.0,
+            "blocks_seen": self.blocks_seen,
+            "added": self.added,
+            "duplicates": self.duplicates,
+            "blocks_per_s": round(self.blocks_seen / elapsed, 1) if elapsed else 0.0,
+            "elapsed_s": round(elapsed, 1),
+            "error": self.error,
+            "chunking": self.chunk_report,
+        }
+
+
+def _text_members(path: Path) -> Iterator[Tuple[str, int, Callable[[], BinaryIO]]]:
+    """(назва, розмір у байтах, відкрити) для TXT або кожного .txt у ZIP."""
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as zf:
+            for info in zf.infolist():
+                if not info.is_dir() and info.filename.lower().endswith(".txt"):
+                    yield Path(info.filename).name, info.file_size, lambda info=info: zf.open(info)
+    else:
+        yield path.name, path.stat().st_size, lambda: path.open("rb")
+
+
+def md5_id(text: str) -> str:
+    """Той самий ID, що й stable_id_from_text у HW 6/HW 7: MD5 вмісту."""
+    return hashlib.md5(text.encode("utf-8")).hexdigest()
+
+
+class IngestJobs:
+    def __init__(self, workers: int = 2, spool_dir: Path = Path("data/uploads"), batch_size: int = BATCH_SIZE,
+                 id_fn: Callable[[str], str] = md5_id):
+        self.spool_dir = Path(spool_dir)
+        self.batch_size = batch_size
+        self.id_fn = id_fn
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ingest")
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    # ---------- постановка задач ----------
+    def submit(self, uploads: Sequence[Tuple[str, BinaryIO]], sink: Sink, exists: Exists,
+               chunker_factory: Optional[Callable[[], Optional[Chunker]]] = None,
+               on_done: Optional[Callable[[Job], None]] = None) -> Job:
+        """uploads — [(назва файлу, двійковий потік)]; копіюються на диск шматками до повернення."""
+        job_id = uuid.uuid4().hex[:12]
+        job_dir = self.spool_dir / job_id
+        job_dir.mkdir(parents=True, exist_ok=True)
+        files = []
+        for n, (name, stream) in enumerate(uploads):
+            dest = job_dir / str(n) / Path(name).name  # окремий підкаталог: однакові назви не перезаписуються
+            dest.parent.mkdir()
+            with dest.open("wb") as out:
+                shutil.copyfileobj(stream, out, COPY_BUFFER)
+            files.append(dest)
+        job = Job(id=job_id, files=files)
+        job.bytes_total = sum(size for f in files for _, size, _ in _text_members(f))
+        with self._lock:
+            self._jobs[job_id] = job
+        self._pool.submit(self._run, job, sink, exists, chunker_factory, on_done)
+        return job
+
+    def jobs(self) -> List[Job]:
+        """Усі задачі процесу, новіші першими."""
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda j: -j.created)
+
+    def active(self) -> bool:
+        return any(j.status in ("queued", "running") for j in self.jobs())
+
+    def forget_finished(self):
+        with self._lock:
+            for job_id in [i for i, j in self._jobs.items() if j.status in ("done", "error")]:
+                del self._jobs[job_id]
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)
+
+    # ---------- виконання ----------
+    def _run(self, job: Job, sink: Sink, exists: Exists, chunker_factory, on_done):
+        job.status, job.started = "running", time.time()
+        chunker: Optional[Chunker] = None
+        seen: Set[str] = set()
+        try:
+            # фабрика може впасти (токенізатор, модель) — тоді задача "error", а не вічне "running"
+            chunker = chunker_factory() if chunker_factory else None
+            for path in job.files:
+                for name, _, open_member in _text_members(path):
+                    job.current_file = name
+                    with open_member() as raw:
+                        text = io.TextIOWrapper(raw, encoding="utf-8", errors="ignore")
+                        self._ingest_stream(job, name, text, sink, exists, chunker, seen)
+                job.files_done += 1
+            job.status = "done"
+            job.bytes_done = job.bytes_total  # прогрес рахується за довжиною блоків — наприкінці вирівнюємо
+        except Exception as e:
+            job.status, job.error = "error", f"{type(e).__name__}: {e}"
+        finally:
+            job.finished = time.time()
+            job.current_file = ""
+            if chunker is not None:
+                job.chunk_report = chunker.report()
+            shutil.rmtree(self.spool_dir / job.id, ignore_errors=True)
+            if on_done is not None:
+                on_done(job)
+
+    def _ingest_stream(self, job: Job, name: str, text, sink: Sink, exists: Exists,
+                       chunker: Optional[Chunker], seen: Set[str]):
+        def counted_blocks():
+            for block in iter_text_blocks(text):
+                job.bytes_done += len(block.encode("utf-8")) + 3  # + розділювач
+                yield block
+
+        docs = chunker.chunk_stream(counted_blocks()) if chunker is not None else counted_blocks()
+        batch: List[Union[str, Chunk]] = []
+        for doc in docs:
+            batch.append(doc)
+            if len(batch) >= self.batch_size:
+                self._write(job, name, batch, sink, exists, seen)
+                batch = []
+        if batch:
+            self._write(job, name, batch, sink, exists, seen)
+
+    def _write(self, job: Job, name: str, batch: List[Union[str, Chunk]], sink: Sink, exists: Exists,
+               seen: Set[str]):
+        job.blocks_seen += len(batch)
+        ids = [self.id_fn(d.text if isinstance(d, Chunk) else d) for d in batch]
+        known = exists([i for i in ids if i not in seen])
+        fresh = []
+        for doc, doc_id in zip(batch, ids):
+            if doc_id in seen or doc_id in known:
+                job.duplicates += 1
+                continue
+            seen.add(doc_id)
+            fresh.append(doc)
+        if fresh:
+            sink(fresh, name)
+            job.added += len(fresh)
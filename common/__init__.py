@@ -0,0 +1,6 @@
+"""
+Спільні модулі для домашніх завдань (кеші, індекси, утиліти для LLM та RAG).
+
+Скрипти уроків лежать у папках з пробілами, тому підключають цей пакет так:
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+"""
@@ -0,0 +1,277 @@
+"""
+Пошук найближчих сусідів з контролем компромісу точність/швидкість.
+
+VectorIndex будується з векторів Chroma-колекції і має два режими:
+- HNSW (hnswlib — та сама бібліотека, що всередині Chroma) з параметрами
+  M / ef_construction (при побудові) та ef_search (можна міняти будь-коли);
+- точний пошук перебором (NumPy) — еталон для recall@k і запасний варіант.
+
+hnsw_metadata() дає ті самі параметри для нативного індексу Chroma
+(задаються лише при створенні колекції).
+
+Пакетні запити (оцінювання на тисячах питань): усі запити ембедяться одним
+викликом embed_queries (семантика embed_query, а не embed_documents), а точні відстані рахуються матричним множенням
+порціями по QUERY_CHUNK запитів — над векторами в памʼяті або над
+memory-mapped вивантаженням колекції (VectorIndex.open_export).
+"""
+import hashlib
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from common.embedding_cache import embed_queries
+
+PAGE = 5000  # скільки записів тягнути з Chroma за один get
+QUERY_CHUNK = 256  # запитів на одне матричне множення (обмежує памʼять під матрицю відстаней)
+
+
+def hnsw_metadata(M: int = 16, construction_ef: int = 200, search_ef: int = 64, space: str = "l2") -> Dict:
+    """collection_metadata для Chroma(...) — параметри її вбудованого HNSW."""
+    return {"hnsw:space": space, "hnsw:M": M, "hnsw:construction_ef": construction_ef, "hnsw:search_ef": search_ef}
+
+
+def ids_fingerprint(ids: Sequence[str]) -> str:
+    """Відбиток набору ID (порядок не важливий); ID блоків — хеші їх тексту, тож це й відбиток вмісту."""
+    h = hashlib.sha1()
+    for i in sorted(ids):
+        h.update(i.encode("utf-8") + b"\n")
+    return h.hexdigest()
+
+
+def collection_fingerprint(collection, page: int = PAGE) -> str:
+    """ids_fingerprint колекції: лише ID, посторінково, без ембедінгів і документів."""
+    ids, offset = [], 0
+    while True:
+        res = collection.get(limit=page, offset=offset, include=[])
+        if not res["ids"]:
+            break
+        ids.extend(res["ids"])
+        offset += len(res["ids"])
+    return ids_fingerprint(ids)
+
+
+def _percentile_ms(samples: List[float], q: float) -> float:
+    return round(float(np.percentile(np.array(samples) * 1000, q)), 3) if samples else 0.0
+
+
+class VectorIndex:
+    def __init__(self, ids: Sequence[str], vectors: np.ndarray, space: str = "l2"):
+        self.ids = list(ids)
+        self.vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self.space = space
+        self._sq_norms = (self.vectors ** 2).sum(axis=1)
+        self._hnsw = None
+
+    # ---------- побудова ----------
+    @classmethod
+    def from_collection(cls, collection, page: int = PAGE) -> "VectorIndex":
+        """Вивантажує ids + ембедінги з chromadb.Collection посторінково."""
+        ids, chunks = [], []
+        offset = 0
+        while True:
+            res = collection.get(limit=page, offset=offset, include=["embeddings"])
+            if not res["ids"]:
+                break
+            ids.extend(res["ids"])
+            chunks.append(np.asarray(res["embeddings"], dtype=np.float32))
+            offset += len(res["ids"])
+        space = (collection.metadata or {}).get("hnsw:space", "l2")
+        dim = chunks[0].shape[1] if chunks else 0
+        return cls(ids, np.vstack(chunks) if chunks else np.zeros((0, dim), np.float32), space=space)
+
+    def build_hnsw(self, M: int = 16, ef_construction: int = 200, ef_search: int = 64, threads: int = -1):
+        import hnswlib  # пакет chroma-hnswlib, ставиться разом із chromadb
+
+        index = hnswlib.Index(space=self.space, dim=self.vectors.shape[1])
+        index.init_index(max_elements=max(len(self.ids), 1), M=M, ef_construction=ef_construction)
+        index.add_items(self.vectors, np.arange(len(self.ids)), num_threads=threads)
+        index.set_ef(ef_search)
+        self._hnsw = index
+        return self
+
+    def set_ef(self, ef_search: int):
+        if self._hnsw is not None:
+            self._hnsw.set_ef(ef_search)
+
+    def save(self, dir_path: Path):
+        """Зберігає HNSW-граф та ids, щоб не перебудовувати індекс при кожному запуску."""
+        dir_path = Path(dir_path)
+        dir_path.mkdir(parents=True, exist_ok=True)
+        np.save(dir_path / "vectors.npy", self.vectors)
+        (dir_path / "ids.txt").write_text("\n".join(self.ids), encoding="utf-8")
+        (dir_path / "space.txt").write_text(self.space, encoding="utf-8")
+        (dir_path / "fingerprint.txt").write_text(ids_fingerprint(self.ids), encoding="utf-8")
+        if self._hnsw is not None:
+            self._hnsw.save_index(str(dir_path / "hnsw.bin"))
+
+    @classmethod
+    def load(cls, dir_path: Path, ef_search: int = 64) -> "VectorIndex":
+        dir_path = Path(dir_path)
+        ids = (dir_path / "ids.txt").read_text(encoding="utf-8").split("\n")
+        idx = cls(ids, np.load(dir_path / "vectors.npy", mmap_mode="r"),
+                  space=(dir_path / "space.txt").read_text(encoding="utf-8").strip())
+        if (dir_path / "hnsw.bin").exists():
+            import hnswlib
+
+            idx._hnsw = hnswlib.Index(space=idx.space, dim=idx.vectors.shape[1])
+            idx._hnsw.load_index(str(dir_path / "hnsw.bin"), max_elements=len(ids))
+            idx._hnsw.set_ef(ef_search)
+        return idx
+
+    @classmethod
+    def open_export(cls, collection, dir_path: Path, ef_search: int = 64) -> "VectorIndex":
+        """
+        Вектори колекції з вивантаження на диску (np.load з mmap_mode="r").
+        Якщо вивантаження немає або його відбиток ID не збігається з колекцією (блоки
+        додали/видалили, навіть за тієї ж кількості) — вивантажує заново.
+        """
+        dir_path = Path(dir_path)
+        fp_file = dir_path / "fingerprint.txt"
+        if fp_file.exists() and (dir_path / "vectors.npy").exists():
+            if fp_file.read_text(encoding="utf-8").strip() == collection_fingerprint(collection):
+                return cls.load(dir_path, ef_search=ef_search)
+        cls.from_collection(collection).save(dir_path)
+        return cls.load(dir_path, ef_search=ef_search)
+
+    # ---------- пошук ----------
+    def _exact(self, q: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        # одне матричне множення на порцію запитів, далі лише операції на місці (без тимчасових матриць)
+        dist = q @ self.vectors.T
+        if self.space == "l2":
+            # ||x - q||^2 = ||x||^2 - 2 x·q + ||q||^2 (так само рахує hnswlib, без sqrt);
+            # ||q||^2 не впливає на порядок — додаємо лише до відібраних k
+            dist *= -2.0
+            dist += self._sq_norms[None, :]
+            shift = (q ** 2).sum(axis=1)[:, None]
+        elif self.space == "cosine":
+            xn = np.sqrt(self._sq_norms)
+            dist /= -np.where(xn == 0, 1.0, xn)[None, :] * np.linalg.norm(q, axis=1, keepdims=True)
+            shift = 1.0
+        else:  # "ip"
+            dist *= -1.0
+            shift = 1.0
+        k = min(k, dist.shape[1])
+        part = np.argpartition(dist, k - 1, axis=1)[:, :k]
+        rows = np.arange(len(q))[:, None]
+        order = np.argsort(dist[rows, part], axis=1)
+        labels = part[rows, order]
+        return labels, dist[rows, labels] + shift
+
+    def search_vectors(self, query_vectors, k: int = 5, exact: bool = False) -> List[List[Tuple[str, float]]]:
+        """Для кожного вектора-запиту — список (id, distance), найближчі першими."""
+        q = np.atleast_2d(np.asarray(query_vectors, dtype=np.float32))
+        k = min(k, len(self.ids))
+        if k == 0:
+            return [[] for _ in range(len(q))]
+        if exact or self._hnsw is None:
+            parts = [self._exact(q[i:i + QUERY_CHUNK], k) for i in range(0, len(q), QUERY_CHUNK)]
+            labels, dists = np.vstack([p[0] for p in parts]), np.vstack([p[1] for p in parts])
+        else:
+            labels, dists = self._hnsw.knn_query(q, k=k)
+        return [[(self.ids[int(l)], float(d)) for l, d in zip(lr, dr)] for lr, dr in zip(labels, dists)]
+
+    # ---------- якість і латентність ----------
+    def recall_at_k(self, query_vectors, k: int = 10) -> float:
+        """Частка точних top-k сусідів, які знайшов HNSW (усереднено по запитах)."""
+        ann = self.search_vectors(query_vectors, k)
+        exact = self.search_vectors(query_vectors, k, exact=True)
+        hits = [len({i for i, _ in a} & {i for i, _ in e}) / max(len(e), 1) for a, e in zip(ann, exact)]
+        return float(np.mean(hits)) if hits else 0.0
+
+    def sweep(self, query_vectors, k: int = 10, ef_values: Sequence[int] = (16, 32, 64, 128, 256)) -> List[Dict]:
+        """Recall@k та p50/p99 латентності одного запиту для кожного ef_search (+ точний пошук)."""
+        q = np.atleast_2d(np.asarray(query_vectors, dtype=np.float32))
+        exact = self.search_vectors(q, k, exact=True)
+        rows = []
+        for ef in list(ef_values) + [None]:
+            if ef is not None:
+                if self._hnsw is None:
+                    continue
+                self.set_ef(max(ef, k))
+            lat, found = [], []
+            for v in q:
+                t0 = time.perf_counter()
+                found.append(self.search_vectors(v, k, exact=ef is None)[0])
+                lat.append(time.perf_counter() - t0)
+            recall = np.mean([len({i for i, _ in a} & {i for i, _ in e}) / max(len(e), 1) for a, e in zip(found, exact)])
+            rows.append({"ef_search": ef if ef is not None else "exact", "recall_at_k": round(float(recall), 4),
+                         "p50_ms": _percentile_ms(lat, 50), "p99_ms": _percentile_ms(lat, 99)})
+        return rows
+
+
+class AnnSearcher:
+    """
+    Текстовий пошук поверх VectorIndex для LangChain Chroma:
+    ембедимо запит моделлю колекції, шукаємо id, документи дотягуємо одним get.
+    """
+
+    def __init__(self, vs, index: VectorIndex):
+        self.vs = vs
+        self.index = index
+
+    @classmethod
+    def from_vectorstore(cls, vs, M: int = 16, ef_construction: int = 200, ef_search: int = 64) -> "AnnSearcher":
+        index = VectorIndex.from_collection(vs._collection)
+        if index.ids:
+            index.build_hnsw(M=M, ef_construction=ef_construction, ef_search=ef_search)
+        return cls(vs, index)
+
+    def search_ids(self, query: str, k: int = 5, exact: bool = False,
+                   ef_search: Optional[int] = None) -> List[Tuple[str, float]]:
+        if ef_search is not None:
+            self.index.set_ef(max(ef_search, k))
+        return self.index.search_vectors(self.vs.embeddings.embed_query(query), k, exact=exact)[0]
+
+    def similarity_search_with_score(self, query: str, k: int = 5, exact: bool = False,
+                                     ef_search: Optional[int] = None) -> List[Tuple[Document, float]]:
+        hits = self.search_ids(query, k, exact=exact, ef_search=ef_search)
+        return _hydrate(self.vs, [hits])[0] if hits else []
+
+    def similarity_search(self, query: str, k: int = 5, exact: bool = False,
+                          ef_search: Optional[int] = None) -> List[Document]:
+        return [d for d, _ in self.similarity_search_with_score(query, k, exact=exact, ef_search=ef_search)]
+
+    def batch_search_ids(self, queries: Sequence[str], k: int = 5,
+                         exact: bool = True) -> List[List[Tuple[str, float]]]:
+        """Top-k (id, distance) для кожного запиту: один пакетний ембедінг + матричний пошук."""
+        if not queries:
+            return []
+        return self.index.search_vectors(embed_queries(self.vs.embeddings, list(queries)), k, exact=exact)
+
+    def batch_similarity_search_with_score(self, queries: Sequence[str], k: int = 5,
+                                           exact: bool = True) -> List[List[Tuple[Document, float]]]:
+        hits = self.batch_search_ids(queries, k, exact=exact)
+        return _hydrate(self.vs, hits)
+
+    def recall_at_k(self, queries: List[str], k: int = 10) -> float:
+        return self.index.recall_at_k(embed_queries(self.vs.embeddings, queries), k)
+
+
+def query_collection_batch(vs, queries: Sequence[str], k: int = 5,
+                           batch_size: int = 1000) -> List[List[Tuple[str, float]]]:
+    """
+    Пакетний пошук через API самої Chroma (без локального індексу):
+    ембедінги всіх запитів одним викликом, далі collection.query з кількома query_embeddings.
+    """
+    if not queries:
+        return []
+    embs = embed_queries(vs.embeddings, list(queries))
+    out = []
+    for i in range(0, len(embs), batch_size):
+        res = vs._collection.query(query_embeddings=embs[i:i + batch_size], n_results=k, include=["distances"])
+        out.extend(list(zip(ids, dists)) for ids, dists in zip(res["ids"], res["distances"]))
+    return out
+
+
+def _hydrate(vs, hits: List[List[Tuple[str, float]]]) -> List[List[Tuple[Document, float]]]:
+    """Дотягує тексти й метадані для всіх знайдених ID одним get (дублікати між запитами — один раз)."""
+    wanted = list(dict.fromkeys(i for row in hits for i, _ in row))
+    by_id = {}
+    for s in range(0, len(wanted), PAGE):
+        res = vs.get(ids=wanted[s:s + PAGE], include=["documents", "metadatas"])
+        by_id.update({i: Document(page_content=d, metadata=m or {})
+                      for i, d, m in zip(res["ids"], res["documents"], res["metadatas"])})
+    return [[(by_id[i], dist) for i, dist in row if i in by_id] for row in hits]
@@ -0,0 +1,281 @@
+"""
+Лексичний пошук BM25 поруч із Chroma-колекцією + гібрид із векторним (RRF).
+
+BM25Index — інвертований індекс у SQLite (ті самі ID блоків, що й у Chroma):
+- add(ids, texts) / delete(ids) викликаються під час індексації разом із записом у Chroma;
+- sync_from_collection() дотягує блоки, додані до появи індексу, і прибирає зайві;
+- для пошуку індекс один раз завантажується в памʼять як NumPy-масиви з уже
+  порахованою вагою BM25 кожної пари (термін, документ): запит — це склеїти
+  списки документів кількох термінів і скласти ваги, без моделі й без SQL.
+  Знімок (ID, постинги) публікується одним кортежем, тож пошук з інших потоків
+  під час add/delete бачить або старий, або новий індекс, а не суміш. Кожен запис
+  збільшує лічильник версії в самій SQLite (таблиця meta), тож знімок
+  перебудовується й після записів з інших процесів (rag_cli, демон);
+- один файл — одна колекція (collection_db_path): sync_from_collection видаляє
+  все, чого немає в колекції, тож спільний файл на кілька колекцій стирав би чужі блоки.
+
+HybridSearcher відповідає на запит у трьох режимах: "lexical" (лише BM25),
+"dense" (ембедінг запиту + пошук у Chroma) і "hybrid" — обидва списки
+зливаються через Reciprocal Rank Fusion: score(d) = Σ 1 / (rrf_k + rank(d)).
+"""
+import hashlib
+import math
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+SQL_BATCH = 500
+PAGE = 5000  # скільки записів тягнути з Chroma за один get
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+STOPWORDS = frozenset((
+    "a an and are as at be but by for from has have if in into is it its of on or that the their there these "
+    "they this to was were which will with you your we our not no can may any all such "
+    "і й та а але в у на з із до від що як це ці той та чи не ні же би по за для про при"
+).split())
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN_RE.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def rrf_fuse(rankings: Sequence[Sequence[str]], rrf_k: int = 60,
+             weights: Optional[Sequence[float]] = None) -> List[Tuple[str, float]]:
+    """Reciprocal Rank Fusion кількох ранжованих списків ID -> [(id, score)], найкращі першими."""
+    scores: Dict[str, float] = {}
+    for ranking, w in zip(rankings, weights or [1.0] * len(rankings)):
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + w / (rrf_k + rank)
+    return sorted(scores.items(), key=lambda x: -x[1])
+
+
+def collection_db_path(base: Path, persist_dir, collection: str) -> Path:
+    """Файл індексу для колекції: bm25.sqlite -> bm25.<колекція>.<хеш шляху persist_dir>.sqlite."""
+    base = Path(base)
+    tag = hashlib.md5(str(Path(persist_dir).resolve()).encode("utf-8")).hexdigest()[:8]
+    safe = re.sub(r"[^\w.-]+", "_", collection)
+    return base.with_name(f"{base.stem}.{safe}.{tag}{base.suffix}")
+
+
+class BM25Index:
+    def __init__(self, db_path: Path, k1: float = 1.5, b: float = 0.75):
+        db_path = Path(db_path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.k1, self.b = k1, b
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=30000")
+        with self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS docs (id TEXT PRIMARY KEY, length INTEGER NOT NULL)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS postings ("
+                " term TEXT NOT NULL, id TEXT NOT NULL, tf INTEGER NOT NULL, PRIMARY KEY (term, id)) WITHOUT ROWID"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS postings_id ON postings(id)")
+            # версія вмісту: +1 у тій самій транзакції, що й запис; знімок у памʼяті валідний для своєї версії
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            self._conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0)")
+        self._index: Optional[Tuple[int, List[str], Dict[str, Tuple[np.ndarray, np.ndarray]]]] = None
+        self._load_lock = threading.Lock()  # перебудовує знімок лише один потік
+        self.load_seconds = 0.0
+
+    # ---------- запис ----------
+    def _delete_rows(self, ids: List[str]) -> int:
+        """Видалення в поточній транзакції (викликається під self._lock)."""
+        deleted = 0
+        for i in range(0, len(ids), SQL_BATCH):
+            chunk = ids[i:i + SQL_BATCH]
+            marks = ",".join("?" * len(chunk))
+            self._conn.execute(f"DELETE FROM postings WHERE id IN ({marks})", chunk)
+            deleted += self._conn.execute(f"DELETE FROM docs WHERE id IN ({marks})", chunk).rowcount
+        return deleted
+
+    def _bump_version(self):
+        self._conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+
+    def _db_version(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+
+    def add(self, ids: Sequence[str], texts: Sequence[str]) -> int:
+        """Додає/оновлює блоки (повторний ID перезаписує старі терміни) — однією транзакцією."""
+        docs, postings = [], []
+        for doc_id, text in zip(ids, texts):
+            tokens = tokenize(text)
+            docs.append((doc_id, len(tokens)))
+            postings.extend((term, doc_id, tf) for term, tf in Counter(tokens).items())
+        with self._lock, self._conn:
+            self._delete_rows(list(ids))
+            self._conn.executemany("INSERT INTO docs (id, length) VALUES (?, ?)", docs)
+            self._conn.executemany("INSERT INTO postings (term, id, tf) VALUES (?, ?, ?)", postings)
+            self._bump_version()
+        return len(docs)
+
+    def delete(self, ids: Iterable[str]) -> int:
+        with self._lock, self._conn:
+            deleted = self._delete_rows(list(ids))
+            if deleted:
+                self._bump_version()
+        return deleted
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def all_ids(self) -> set:
+        with self._lock:
+            return {r[0] for r in self._conn.execute("SELECT id FROM docs")}
+
+    def sync_from_collection(self, collection, page: int = PAGE) -> Dict[str, int]:
+        """Приводить індекс у відповідність до chromadb.Collection (ті самі ID)."""
+        known = self.all_ids()
+        seen, added = set(), 0
+        offset = 0
+        while True:
+            res = collection.get(limit=page, offset=offset, include=[])
+            if not res["ids"]:
+                break
+            offset += len(res["ids"])
+            seen.update(res["ids"])
+            missing = [i for i in res["ids"] if i not in known]
+            if missing:
+                docs = collection.get(ids=missing, include=["documents"])
+                added += self.add(docs["ids"], docs["documents"])
+        removed = self.delete(known - seen)
+        return {"added": added, "removed": removed, "total": self.count()}
+
+    # ---------- пошук ----------
+    def _load(self):
+        """
+        SQLite -> для кожного терміну масиви (номер документа, вага BM25). Усе будується
+        в локальних змінних і публікується одним присвоєнням self._index = (версія, ID, постинги).
+        """
+        t0 = time.perf_counter()
+        with self._lock:
+            self._conn.execute("BEGIN")  # одна транзакція читання: версія й рядки — з одного стану БД
+            try:
+                version = self._conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+                docs = self._conn.execute("SELECT id, length FROM docs").fetchall()
+                rows = self._conn.execute("SELECT term, id, tf FROM postings ORDER BY term").fetchall()
+            finally:
+                self._conn.commit()
+        ids = [d[0] for d in docs]
+        pos = {doc_id: i for i, doc_id in enumerate(ids)}
+        lengths = np.array([d[1] for d in docs], dtype=np.float32)
+        n = len(docs)
+        avgdl = float(lengths.mean()) if n else 1.0
+        norm = self.k1 * (1 - self.b + self.b * lengths / max(avgdl, 1e-9))
+
+        postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        start = 0
+        while start < len(rows):
+            term = rows[start][0]
+            end = start
+            while end < len(rows) and rows[end][0] == term:
+                end += 1
+            idx = np.fromiter((pos[r[1]] for r in rows[start:end]), dtype=np.int32, count=end - start)
+            tf = np.fromiter((r[2] for r in rows[start:end]), dtype=np.float32, count=end - start)
+            df = end - start
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            postings[term] = (idx, (idf * tf * (self.k1 + 1) / (tf + norm[idx])).astype(np.float32))
+            start = end
+        with self._lock:
+            self._index = (version, ids, postings)
+        self.load_seconds = time.perf_counter() - t0
+
+    def _snapshot(self) -> Tuple[int, List[str], Dict[str, Tuple[np.ndarray, np.ndarray]]]:
+        """
+        Актуальний знімок індексу; якщо після нього був запис (будь-яким процесом) — перебудова
+        (один потік, решта чекають).
+        """
+        index = self._index
+        if index is None or index[0] != self._db_version():
+            with self._load_lock:
+                index = self._index
+                if index is None or index[0] != self._db_version():
+                    self._load()
+                    index = self._index
+        return index
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, float]]:
+        """[(id, bm25_score)], найкращі першими."""
+        _, ids, postings = self._snapshot()
+        hits = [postings[t] for t in set(tokenize(query)) if t in postings]
+        if not hits:
+            return []
+        if len(hits) == 1:
+            idx, scores = hits[0]
+        elif sum(len(h[0]) for h in hits) * 8 < len(ids):
+            # лише рідкісні терміни: складаємо ваги на обʼєднанні їхніх документів
+            uniq, inv = np.unique(np.concatenate([h[0] for h in hits]), return_inverse=True)
+            idx, scores = uniq, np.bincount(inv, weights=np.concatenate([h[1] for h in hits]))
+        else:
+            # є часті терміни: суматор на всі документи (у межах одного терміну номери не повторюються)
+            acc = np.zeros(len(ids), dtype=np.float32)
+            for term_idx, weights in hits:
+                acc[term_idx] += weights
+            idx, scores = np.arange(len(acc)), acc
+        k = min(k, len(idx))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(ids[int(idx[i])], float(scores[i])) for i in top if scores[i] > 0]
+
+
+class HybridSearcher:
+    """
+    Пошук по Chroma-колекції у режимах lexical / dense / hybrid.
+    dense — функція (query, k) -> [(id, distance)], напр. AnnSearcher.search_ids;
+    за замовчуванням — запит до самої Chroma.
+    weights — ваги (lexical, dense) у RRF: якщо один зі способів на ваших даних
+    помітно слабший, зменшіть його вагу (перевіряйте bench_hybrid.py).
+    """
+
+    MODES = ("lexical", "dense", "hybrid")
+
+    def __init__(self, vs, bm25: BM25Index, dense=None, rrf_k: int = 60, candidates: int = 50,
+                 weights: Tuple[float, float] = (1.0, 1.0)):
+        self.vs = vs
+        self.bm25 = bm25
+        self.dense = dense
+        self.rrf_k = rrf_k
+        self.candidates = candidates
+        self.weights = weights
+
+    def dense_ids(self, query: str, k: int) -> List[Tuple[str, float]]:
+        if self.dense is not None:
+            return self.dense(query, k)
+        res = self.vs._collection.query(query_embeddings=[self.vs.embeddings.embed_query(query)],
+                                        n_results=k, include=["distances"])
+        return list(zip(res["ids"][0], res["distances"][0]))
+
+    def search_ids(self, query: str, k: int = 5, mode: str = "hybrid") -> List[Tuple[str, float]]:
+        if mode == "lexical":
+            return self.bm25.search(query, k)
+        if mode == "dense":
+            return self.dense_ids(query, k)
+        if mode != "hybrid":
+            raise ValueError(f"невідомий режим пошуку: {mode} (є: {', '.join(self.MODES)})")
+        n = max(k, self.candidates)
+        lexical = [i for i, _ in self.bm25.search(query, n)]
+        dense = [i for i, _ in self.dense_ids(query, n)]
+        return rrf_fuse([lexical, dense], self.rrf_k, self.weights)[:k]
+
+    def similarity_search_with_score(self, query: str, k: int = 5, mode: str = "hybrid") -> List[Tuple[Document, float]]:
+        hits = self.search_ids(query, k, mode)
+        if not hits:
+            return []
+        res = self.vs.get(ids=[i for i, _ in hits], include=["documents", "metadatas"])
+        by_id = {i: Document(page_content=d, metadata=m or {})
+                 for i, d, m in zip(res["ids"], res["documents"], res["metadatas"])}
+        return [(by_id[i], score) for i, score in hits if i in by_id]
+
+    def similarity_search(self, query: str, k: int = 5, mode: str = "hybrid") -> List[Document]:
+        return [d for d, _ in self.similarity_search_with_score(query, k, mode)]
@@ -0,0 +1,117 @@
+"""
+Виконавець ланцюгів як DAG.
+
+Етап = назва + що виконати (LangChain Runnable, async- чи звичайна функція)
++ від яких етапів залежить + як з контексту зібрати його вхід.
+Етапи без спільних залежностей виконуються одночасно; результат етапу
+кладеться в контекст під його назвою.
+
+batch() проганяє багато вхідних даних разом: не більше max_concurrency
+конвеєрів одночасно, а кожен виклик етапу проходить через rate limiter.
+Для кожного прогону записується трасування (час початку/кінця етапів).
+
+    dag = ChainDAG(rate_limiter=TokenBucket(rate=10, burst=10))
+    dag.add("info", chain, inputs=lambda c: {"question": c["question"]})
+    dag.add("recommendation", chain_rec, deps=["info"], inputs=lambda c: c["info"])
+    results = dag.batch([{"question": q} for q in questions], max_concurrency=20)
+"""
+import asyncio
+import inspect
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from common.rate_limit import TokenBucket
+
+
+@dataclass
+class Stage:
+    name: str
+    run: Any
+    deps: List[str] = field(default_factory=list)
+    inputs: Optional[Callable[[Dict], Any]] = None
+
+
+class ChainDAG:
+    def __init__(self, rate_limiter: Optional[TokenBucket] = None):
+        self.stages: Dict[str, Stage] = {}
+        self.rate_limiter = rate_limiter
+        self.traces: List[List[Dict]] = []
+
+    def add(self, name: str, run, deps: Sequence[str] = (), inputs: Optional[Callable[[Dict], Any]] = None) -> "ChainDAG":
+        for d in deps:
+            if d not in self.stages:
+                raise ValueError(f"етап '{name}' залежить від невідомого етапу '{d}'")
+        self.stages[name] = Stage(name, run, list(deps), inputs)
+        return self
+
+    async def _call(self, stage: Stage, value):
+        if hasattr(stage.run, "ainvoke"):
+            return await stage.run.ainvoke(value)
+        if inspect.iscoroutinefunction(stage.run):
+            return await stage.run(value)
+        return await asyncio.to_thread(stage.run, value)
+
+    async def ainvoke(self, inputs: Dict) -> Dict:
+        ctx = dict(inputs)
+        trace: List[Dict] = []
+        t_start = time.perf_counter()
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_stage(stage: Stage):
+            if stage.deps:
+                await asyncio.gather(*(tasks[d] for d in stage.deps))
+            value = stage.inputs(ctx) if stage.inputs else ctx
+            t_wait = time.perf_counter()
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire()
+            t0 = time.perf_counter()
+            ctx[stage.name] = await self._call(stage, value)
+            t1 = time.perf_counter()
+            # ms — лише сам виклик; wait_ms — скільки етап простояв у rate limiter
+            trace.append({"stage": stage.name, "start_ms": round((t0 - t_start) * 1000, 1),
+                          "ms": round((t1 - t0) * 1000, 1), "wait_ms": round((t0 - t_wait) * 1000, 1)})
+
+        # етапи додаються лише після своїх залежностей, тож порядок dict — топологічний
+        for stage in self.stages.values():
+            tasks[stage.name] = asyncio.create_task(run_stage(stage))
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for t in tasks.values():
+                t.cancel()
+            raise
+        self.traces.append(trace)
+        return ctx
+
+    async def abatch(self, inputs_list: List[Dict], max_concurrency: int = 8,
+                     return_exceptions: bool = False) -> List[Any]:
+        sem = asyncio.Semaphore(max_concurrency)
+
+        async def one(inputs):
+            async with sem:
+                return await self.ainvoke(inputs)
+
+        return await asyncio.gather(*(one(x) for x in inputs_list), return_exceptions=return_exceptions)
+
+    def invoke(self, inputs: Dict) -> Dict:
+        return asyncio.run(self.ainvoke(inputs))
+
+    def batch(self, inputs_list: List[Dict], max_concurrency: int = 8, return_exceptions: bool = False) -> List[Any]:
+        return asyncio.run(self.abatch(inputs_list, max_concurrency, return_exceptions))
+
+    def trace_summary(self) -> Dict[str, Dict]:
+        """p50/p95/середня латентність кожного етапу за всі прогони."""
+        per_stage: Dict[str, List[float]] = {}
+        waits: Dict[str, float] = {}
+        for trace in self.traces:
+            for row in trace:
+                per_stage.setdefault(row["stage"], []).append(row["ms"])
+                waits[row["stage"]] = waits.get(row["stage"], 0.0) + row["wait_ms"]
+        out = {}
+        for name, ms in per_stage.items():
+            s = sorted(ms)
+            out[name] = {"runs": len(s), "avg_ms": round(sum(s) / len(s), 1),
+                         "p50_ms": s[len(s) // 2], "p95_ms": s[min(len(s) - 1, int(0.95 * len(s)))],
+                         "avg_wait_ms": round(waits[name] / len(s), 1)}
+        return out
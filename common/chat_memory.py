@@ -0,0 +1,117 @@
+"""
+Обмежена памʼять розмови для чат-ботів.
+
+- системна інструкція (напр. правила повернення) задається один раз і йде
+  окремим SystemMessage, а не дописується в історію;
+- у промпт потрапляє лише "вікно" останніх реплік у межах max_window_tokens;
+- репліки, що випали з вікна, періодично стискаються в короткий зміст
+  (summarizer), який додається до системної інструкції;
+- context — фрагменти, знайдені під конкретне питання (RAG), додаються до
+  системної інструкції лише на цей хід і в історію не потрапляють;
+- збірка промпту — O(розмір вікна), лічильники токенів ведуться інкрементально.
+"""
+import re
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+
+Turn = Tuple[str, str, int]  # (role: "human" | "ai", text, tokens)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Груба локальна оцінка к-сті токенів без виклику API:
+    слова та розділові знаки; кириличні слова зазвичай діляться на 2+ токени.
+    """
+    words = re.findall(r"\w+|[^\w\s]", text)
+    cyr = sum(1 for w in words if re.search(r"[а-яіїєґ]", w, re.IGNORECASE))
+    return len(words) + cyr
+
+
+SUMMARY_PROMPT = """Онови короткий зміст розмови клієнта з ботом підтримки.
+Збережи факти, важливі для подальших відповідей (товар, дати, проблема, що вже пообіцяли).
+Не більше 5 речень.
+
+Поточний зміст:
+{summary}
+
+Нові репліки:
+{turns}
+
+Оновлений зміст:"""
+
+
+def make_llm_summarizer(llm) -> Callable[[str, List[Turn]], str]:
+    """Summarizer, що стискає репліки тією ж LLM."""
+    def summarize(summary: str, turns: List[Turn]) -> str:
+        text = "\n".join(f"{'Human' if r == 'human' else 'AI'}: {t}" for r, t, _ in turns)
+        resp = llm.invoke(SUMMARY_PROMPT.format(summary=summary or "—", turns=text))
+        return getattr(resp, "content", resp).strip()
+    return summarize
+
+
+class ConversationMemory:
+    def __init__(self, system_instruction: str, max_window_tokens: int = 1500,
+                 summarizer: Optional[Callable[[str, List[Turn]], str]] = None, summarize_every: int = 4,
+                 token_counter: Callable[[str], int] = estimate_tokens):
+        self.system_instruction = system_instruction
+        self.max_window_tokens = max_window_tokens
+        self.summarizer = summarizer
+        self.summarize_every = summarize_every
+        self.count_tokens = token_counter
+
+        self.window: Deque[Turn] = deque()
+        self.window_tokens = 0
+        self.summary = ""
+        self.summary_tokens = 0
+        self._evicted: List[Turn] = []
+        self.system_tokens = token_counter(system_instruction)
+        self.last_prompt_tokens: Dict[str, int] = {}
+
+    def _push(self, role: str, text: str):
+        tokens = self.count_tokens(text)
+        self.window.append((role, text, tokens))
+        self.window_tokens += tokens
+        # ковзне вікно: старі репліки виходять, поки не вліземо в бюджет
+        while self.window_tokens > self.max_window_tokens and len(self.window) > 1:
+            old = self.window.popleft()
+            self.window_tokens -= old[2]
+            self._evicted.append(old)
+        if self.summarizer and len(self._evicted) >= self.summarize_every:
+            try:
+                self.summary = self.summarizer(self.summary, self._evicted)
+                self.summary_tokens = self.count_tokens(self.summary)
+            except Exception:
+                pass  # збій стиснення не має ламати розмову — лишаємо попередній зміст
+            self._evicted = []
+        elif not self.summarizer:
+            self._evicted = []
+
+    def add_turn(self, user_text: str, ai_text: str):
+        self._push("human", user_text)
+        self._push("ai", ai_text)
+
+    def build_messages(self, user_input: str, context: str = "") -> List[BaseMessage]:
+        """Системна інструкція (+ знайдені розділи, + зміст) + вікно + нове питання."""
+        system = self.system_instruction
+        if context:
+            system += f"\n\nРелевантні розділи документів:\n{context}"
+        if self.summary:
+            system += f"\n\nКороткий зміст попередньої розмови:\n{self.summary}"
+        messages: List[BaseMessage] = [SystemMessage(content=system)]
+        for role, text, _ in self.window:
+            messages.append(HumanMessage(content=text) if role == "human" else AIMessage(content=text))
+        messages.append(HumanMessage(content=user_input))
+
+        question_tokens = self.count_tokens(user_input)
+        context_tokens = self.count_tokens(context) if context else 0
+        self.last_prompt_tokens = {
+            "system": self.system_tokens,
+            "context": context_tokens,
+            "summary": self.summary_tokens,
+            "window": self.window_tokens,
+            "question": question_tokens,
+            "total": self.system_tokens + context_tokens + self.summary_tokens + self.window_tokens + question_tokens,
+        }
+        return messages
@@ -0,0 +1,268 @@
+"""
+Розбиття блоків на фрагменти під вікно моделі ембедінгів.
+
+Блоки (розділені порожніми рядками, перший рядок — заголовок) бувають і довшими
+за вікно MiniLM (256 токенів — решту модель мовчки відкидає), і зовсім
+короткими. Chunker міряє токени токенізатором самої моделі і:
+- ділить довгий блок на рівні фрагменти до target_tokens (ніколи не більше max_tokens):
+  за реченнями (зберігаючи межі абзаців), в крайньому разі — за словами;
+- за потреби повторює хвіст попереднього фрагмента на початку наступного (overlap_tokens);
+- додає заголовок блоку на початок кожного продовження (repeat_title), а в
+  метадані кожного фрагмента — title_fn(блок);
+- доклеює короткий блок (< min_tokens) до сусіднього цілого блоку, якщо разом
+  вони влазять у вікно; з pack=True — зливає й звичайні сусідні блоки, поки
+  разом вони не перевищують target_tokens (менше векторів, але фрагмент тоді
+  охоплює кілька розділів). Фрагмент перетинає межу блоку лише цілими блоками;
+  заголовок злитого фрагмента — заголовки його блоків через TITLE_SEP (підряд однакові —
+  один раз), а якщо це довше за MAX_TITLE_CHARS — перший заголовок і к-сть решти: "A (+5)".
+
+iter_text_blocks(f) — потокове читання блоків із текстового потоку (файл, член zip-архіву).
+
+Працює потоково: chunk_stream(блоки) віддає фрагменти одразу, тримаючи в памʼяті
+лише поточний блок і один ще не відданий (до нього може доклеїтись наступний). stats — скільки токенів обрізала б модель
+до і після розбиття.
+"""
+import json
+import math
+import re
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TextIO
+
+# розділювач блоків: два й більше порожніх рядки (переноси можуть різнитись)
+BLOCK_SEP_RE = re.compile(r"(?:\r?\n)\s*(?:\r?\n)\s*(?:\r?\n)+")
+READ_CHUNK_CHARS = 1 << 20
+PARA_SEP_RE = re.compile(r"\n\s*\n")
+SENTENCE_END_RE = re.compile(r"(?<=[.!?;:])\s+")
+APPROX_TOKEN_RE = re.compile(r"\w{1,8}|[^\w\s]", re.UNICODE)
+SPECIAL_TOKENS = 2  # [CLS] і [SEP], які токенізатор додає до кожного тексту
+TITLE_SEP = " | "   # між заголовками злитих блоків
+MAX_TITLE_CHARS = 180  # стільки ж, скільки default_title бере з першого рядка
+
+
+@dataclass
+class Chunk:
+    text: str
+    title: str
+    tokens: int
+    part: int = 0       # номер фрагмента в межах блоку
+    blocks: int = 1     # скільки коротких блоків злито в цей фрагмент
+
+
+def iter_text_blocks(f: TextIO, chunk_chars: int = READ_CHUNK_CHARS) -> Iterator[str]:
+    """
+    Блоки з текстового потоку по одному: читає шматками по chunk_chars символів,
+    у памʼяті — лише поточний шматок + незавершений хвіст.
+    """
+    buf = ""
+    while True:
+        chunk = f.read(chunk_chars)
+        if not chunk:
+            break
+        buf += chunk
+        # розділювач, що торкається кінця буфера, може продовжитись у
+        # наступному шматку — тому беремо лише збіги до хвоста з пробілів
+        safe_end = len(buf.rstrip())
+        start = 0
+        for m in BLOCK_SEP_RE.finditer(buf, 0, safe_end):
+            part = buf[start:m.start()].strip()
+            if part:
+                yield part
+            start = m.end()
+        buf = buf[start:]
+    tail = buf.strip()
+    if tail:
+        yield tail
+
+
+def approx_token_count(text: str) -> int:
+    """Оцінка к-сті WordPiece-токенів без токенізатора: слова (довгі — по 8 символів) + розділові знаки."""
+    return len(APPROX_TOKEN_RE.findall(text))
+
+
+def token_counter(model_name: Optional[str] = None) -> Callable[[str], int]:
+    """Лічильник токенів (без спецтокенів) токенізатором моделі; без model_name — approx_token_count."""
+    if not model_name:
+        return approx_token_count
+    from transformers import AutoTokenizer  # ставиться разом із sentence-transformers
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    return lambda text: len(tokenizer.encode(text, add_special_tokens=False, truncation=False, verbose=False))
+
+
+def model_max_tokens(model_name: str, default: int = 256) -> int:
+    """
+    Вікно моделі sentence-transformers: max_seq_length із її sentence_bert_config.json
+    (у токенізатора model_max_length часто більший — 512, а модель ріже по max_seq_length).
+    """
+    from huggingface_hub import hf_hub_download  # ставиться разом із sentence-transformers
+
+    try:
+        with open(hf_hub_download(model_name, "sentence_bert_config.json"), encoding="utf-8") as f:
+            return int(json.load(f)["max_seq_length"])
+    except Exception:
+        return default
+
+
+def merged_title(titles: List[str]) -> str:
+    """Заголовок злитого фрагмента: усі через TITLE_SEP або, якщо задовго, перший + к-сть решти."""
+    joined = TITLE_SEP.join(titles)
+    if len(joined) <= MAX_TITLE_CHARS:
+        return joined
+    return f"{titles[0][:MAX_TITLE_CHARS]} (+{len(titles) - 1})"
+
+
+def default_title(block: str) -> str:
+    for line in block.splitlines():
+        if line.strip():
+            return line.strip()[:180]
+    return "Untitled"
+
+
+class Chunker:
+    def __init__(self, count_tokens: Callable[[str], int] = approx_token_count, target_tokens: int = 200,
+                 max_tokens: int = 256, overlap_tokens: int = 0, min_tokens: int = 64, repeat_title: bool = True,
+                 pack: bool = False, title_fn: Callable[[str], str] = default_title):
+        if not 0 < target_tokens <= max_tokens:
+            raise ValueError("потрібно 0 < target_tokens <= max_tokens")
+        if overlap_tokens >= target_tokens:
+            raise ValueError("overlap_tokens має бути меншим за target_tokens")
+        self.count = count_tokens
+        self.max_tokens = max_tokens
+        self.budget_max = max_tokens - SPECIAL_TOKENS
+        self.target = min(target_tokens, self.budget_max)
+        self.overlap = overlap_tokens
+        self.min_tokens = min_tokens
+        self.repeat_title = repeat_title
+        self.pack = pack
+        self.title_fn = title_fn
+        self.stats = {"blocks": 0, "chunks": 0, "merged_blocks": 0, "split_blocks": 0,
+                      "truncated_tokens_before": 0, "truncated_tokens_after": 0,
+                      "truncated_blocks_before": 0, "truncated_chunks_after": 0}
+
+    # ---------- ділення довгого блоку ----------
+    def _units(self, text: str, budget: int) -> Iterator[tuple]:
+        """
+        (текст, токени, роздільник після) одиниць ≤ budget: речення (межі абзаців
+        зберігаються як роздільник), задовгі речення — шматками слів.
+        """
+        for para in PARA_SEP_RE.split(text):
+            sentences = [x for x in SENTENCE_END_RE.split(para.strip()) if x]
+            for i, sent in enumerate(sentences):
+                sep = "\n\n" if i == len(sentences) - 1 else " "
+                n = self.count(sent)
+                if n <= budget:
+                    yield sent, n, sep
+                    continue
+                piece, piece_n = [], 0
+                for w in sent.split():
+                    wn = self.count(w)
+                    if piece and piece_n + wn > budget:
+                        yield " ".join(piece), piece_n, " "
+                        piece, piece_n = [], 0
+                    piece.append(w)
+                    piece_n += wn
+                if piece:
+                    yield " ".join(piece), piece_n, sep
+
+    def _split(self, block: str, title: str) -> List[Chunk]:
+        # заголовок або повторюється в кожному фрагменті, або лишається лише в першому
+        lines = block.split("\n", 1)
+        repeat = self.repeat_title and len(lines) > 1 and lines[0].strip()[:180] == title
+        body = lines[1] if repeat else block
+        head = title + "\n" if repeat else ""
+        head_n = self.count(head) if head else 0
+        budget = self.budget_max - head_n
+        # рівні частини замість "повні + короткий хвіст": к-сть частин за target, розмір — порівну
+        total = self.count(body)
+        step = max(self.target - head_n - self.overlap, 1)
+        parts = max(math.ceil((total - self.overlap) / step), 1)
+        even = math.ceil((total - self.overlap) / parts) + self.overlap
+        target = max(min(self.target - head_n, even + self.target // 10), 1)
+
+        chunks: List[Chunk] = []
+        cur: List[tuple] = []
+        cur_n = 0
+
+        def flush():
+            text = "".join(t + sep for t, _, sep in cur).strip()
+            chunks.append(Chunk(text=head + text if head else text, title=title, tokens=head_n + cur_n,
+                                part=len(chunks)))
+
+        for unit in self._units(body, budget):
+            if cur and cur_n + unit[1] > target:
+                flush()
+                # хвіст попереднього фрагмента (цілими одиницями) на початок наступного
+                tail, tail_n = [], 0
+                for u in reversed(cur):
+                    if tail_n + u[1] > self.overlap or tail_n + u[1] + unit[1] > target:
+                        break
+                    tail.insert(0, u)
+                    tail_n += u[1]
+                cur, cur_n = tail, tail_n
+            cur.append(unit)
+            cur_n += unit[1]
+        if cur:
+            flush()
+        if len(chunks) == 1:
+            chunks[0] = Chunk(text=block, title=title, tokens=self.count(block))
+        return chunks
+
+    # ---------- потік ----------
+    def _mergeable(self, a: int, b: int) -> bool:
+        if min(a, b) < self.min_tokens:
+            return a + b <= self.budget_max
+        return self.pack and a + b <= self.target
+
+    def _note(self, chunk: Chunk) -> Chunk:
+        self.stats["chunks"] += 1
+        over = chunk.tokens - self.budget_max
+        if over > 0:
+            self.stats["truncated_tokens_after"] += over
+            self.stats["truncated_chunks_after"] += 1
+        return chunk
+
+    def chunk_stream(self, blocks: Iterable[str]) -> Iterator[Chunk]:
+        pending: Optional[Chunk] = None  # цілий блок (або злиті блоки), до якого ще можна доклеїти наступний
+        titles: List[str] = []           # заголовки блоків у pending (без повторів підряд)
+        for block in blocks:
+            block = block.strip()
+            if not block:
+                continue
+            title = self.title_fn(block)
+            n = self.count(block)
+            self.stats["blocks"] += 1
+            if n > self.budget_max:
+                self.stats["truncated_tokens_before"] += n - self.budget_max
+                self.stats["truncated_blocks_before"] += 1
+
+            # ділимо лише те, що не влазить у вікно; target — розмір частин довгого блоку
+            if n > self.budget_max:
+                if pending is not None:
+                    yield self._note(pending)
+                    pending = None
+                self.stats["split_blocks"] += 1
+                for chunk in self._split(block, title):
+                    yield self._note(chunk)
+                continue
+
+            if pending is not None and self._mergeable(pending.tokens, n):
+                if titles[-1] != title:
+                    titles.append(title)
+                pending = Chunk(text=pending.text + "\n\n" + block, title=merged_title(titles),
+                                tokens=pending.tokens + n, blocks=pending.blocks + 1)
+                self.stats["merged_blocks"] += 1
+                continue
+            if pending is not None:
+                yield self._note(pending)
+            pending = Chunk(text=block, title=title, tokens=n)
+            titles = [title]
+        if pending is not None:
+            yield self._note(pending)
+
+    def chunks(self, blocks: Iterable[str]) -> List[Chunk]:
+        return list(self.chunk_stream(blocks))
+
+    def report(self) -> Dict:
+        s = dict(self.stats)
+        s["vectors_saved"] = s["blocks"] - s["chunks"]
+        return s
@@ -0,0 +1,74 @@
+"""
+Перегляд документів Chroma-колекції для адмінки (HW 7.py) без повних сканів.
+
+- fetch_many(ids) — багато ID одним get (пачками по PAGE), порядок як у запиті;
+- browse(file=...) — фільтр у самій Chroma (where={"file": ...}), сторінка — один
+  get з limit/offset, тож 10k блоків одного файлу приходять за один виклик;
+- browse(title_prefix=...) — у Chroma немає префіксного оператора для метаданих,
+  тому ID сторінки бере реєстр (IdRegistry.find, індекс по block_title), а тексти
+  й метадані — один get(ids) до колекції;
+- курсор сторінки — непрозорий рядок: "o:<offset>" для where-сторінок і
+  "k:<json [block_title, id]>" для сторінок реєстру (keyset, без OFFSET).
+"""
+import json
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+from common.id_registry import IdRegistry
+
+PAGE = 5000  # скільки ID передавати в один get (обмеження на к-сть SQL-параметрів усередині Chroma)
+
+
+@dataclass
+class Page:
+    items: List[Dict] = field(default_factory=list)  # {id, file, block_title[, document]}
+    next_cursor: Optional[str] = None
+
+
+def _include(with_documents: bool) -> List[str]:
+    return ["metadatas", "documents"] if with_documents else ["metadatas"]
+
+
+def _rows(res: Dict, with_documents: bool) -> List[Dict]:
+    docs = res.get("documents") if with_documents else None
+    out = []
+    for n, (doc_id, meta) in enumerate(zip(res["ids"], res.get("metadatas") or [None] * len(res["ids"]))):
+        meta = meta or {}
+        row = {"id": doc_id, "file": meta.get("file"), "block_title": meta.get("block_title")}
+        if docs is not None:
+            row["document"] = docs[n]
+        out.append(row)
+    return out
+
+
+def fetch_many(collection, ids: Sequence[str], with_documents: bool = True) -> List[Dict]:
+    """Записи для списку ID (повтори — один раз); відсутні ID пропускаються."""
+    wanted = list(dict.fromkeys(i for i in ids if i))
+    by_id = {}
+    for s in range(0, len(wanted), PAGE):
+        res = collection.get(ids=wanted[s:s + PAGE], include=_include(with_documents))
+        by_id.update((row["id"], row) for row in _rows(res, with_documents))
+    return [by_id[i] for i in wanted if i in by_id]
+
+
+def browse(collection, registry: Optional[IdRegistry] = None, file: Optional[str] = None,
+           title_prefix: str = "", limit: int = 50, cursor: Optional[str] = None,
+           with_documents: bool = False) -> Page:
+    """Одна сторінка за фільтрами; next_cursor=None — це остання сторінка."""
+    if title_prefix:
+        if registry is None:
+            raise ValueError("пошук за префіксом назви блоку потребує реєстру ID")
+        after = tuple(json.loads(cursor[2:])) if cursor else None
+        found = registry.find(file=file, title_prefix=title_prefix, limit=limit + 1, after=after)
+        page, more = found[:limit], len(found) > limit
+        items = fetch_many(collection, [r["id"] for r in page], with_documents)
+        last = page[-1] if page else None
+        return Page(items, "k:" + json.dumps([last["block_title"], last["id"]], ensure_ascii=False) if more else None)
+
+    offset = int(cursor[2:]) if cursor else 0
+    # limit + 1: зайвий запис лише підказує, чи є наступна сторінка
+    res = collection.get(where={"file": file} if file is not None else None, limit=limit + 1, offset=offset,
+                         include=_include(with_documents))
+    items = _rows(res, with_documents)
+    more = len(items) > limit
+    return Page(items[:limit], f"o:{offset + limit}" if more else None)
@@ -0,0 +1,200 @@
+"""
+Персистентний кеш ембедінгів на диску (SQLite).
+
+Ключ — (назва моделі, SHA1 тексту), значення — вектор float32 у BLOB.
+Розмір обмежено max_entries: при переповненні видаляються записи,
+які найдовше не використовувались (LRU).
+"""
+import hashlib
+import sqlite3
+import threading
+import time
+from array import array
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+SQL_BATCH = 500  # ліміт кількості параметрів у запиті IN (...)
+QUERY_PREFIX = "\x00query:"  # окремий простір ключів: деякі моделі ембедять запити інакше, ніж документи
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def embed_queries(embeddings: Embeddings, texts: List[str]) -> List[List[float]]:
+    """
+    Пакет запитів із семантикою embed_query: одним викликом, якщо ембедер має embed_queries
+    (там, де запит ембедиться так само, як документ), інакше — embed_query для кожного.
+    """
+    batch = getattr(embeddings, "embed_queries", None)
+    return batch(list(texts)) if batch is not None else [embeddings.embed_query(t) for t in texts]
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Обгортка над будь-якими Embeddings: повторно бачені тексти беруться з кешу,
+    решта — рахуються моделлю (одним викликом на пачку) та зберігаються.
+    """
+
+    def __init__(self, inner: Embeddings, model_name: str, db_path: Path,
+                 max_entries: int = 1_000_000):
+        self.inner = inner
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        db_path = Path(db_path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS emb ("
+            " model TEXT NOT NULL, hash TEXT NOT NULL, vec BLOB NOT NULL, last_used INTEGER NOT NULL,"
+            " PRIMARY KEY (model, hash))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS emb_lru ON emb(last_used)")
+        self._conn.commit()
+        self._count = self._conn.execute("SELECT COUNT(*) FROM emb").fetchone()[0]
+
+    # ---------- зберігання ----------
+    def _lookup(self, hashes: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        now = time.time_ns()
+        for i in range(0, len(hashes), SQL_BATCH):
+            chunk = hashes[i:i + SQL_BATCH]
+            marks = ",".join("?" * len(chunk))
+            rows = self._conn.execute(
+                f"SELECT hash, vec FROM emb WHERE model = ? AND hash IN ({marks})",
+                [self.model_name, *chunk],
+            ).fetchall()
+            for h, blob in rows:
+                found[h] = array("f", blob).tolist()
+            if rows:
+                self._conn.execute(
+                    f"UPDATE emb SET last_used = ? WHERE model = ? AND hash IN ({marks})",
+                    [now, self.model_name, *chunk],
+                )
+        return found
+
+    def _store(self, items: Dict[str, List[float]]):
+        now = time.time_ns()
+        rows = [(self.model_name, h, array("f", v).tobytes(), now) for h, v in items.items()]
+        # вектор для (модель, хеш) той самий, тож уже наявні рядки (напр. від паралельного
+        # процесу) пропускаємо — і рахуємо лише справді нові
+        before = self._conn.total_changes
+        self._conn.executemany("INSERT OR IGNORE INTO emb VALUES (?, ?, ?, ?)", rows)
+        self._count += self._conn.total_changes - before
+        if self._count > self.max_entries:
+            self._evict(self._count - self.max_entries)
+
+    def _evict(self, n: int):
+        cur = self._conn.execute(
+            "DELETE FROM emb WHERE rowid IN (SELECT rowid FROM emb ORDER BY last_used LIMIT ?)", (n,)
+        )
+        self._count -= cur.rowcount
+
+    def _prepare(self, texts: List[str], prefix: str = "") -> Tuple[List[str], Dict[str, List[float]], Dict[str, str]]:
+        """Хеші текстів, знайдені в кеші вектори та унікальні тексти, яких немає в кеші."""
+        hashes = [text_hash(prefix + t) for t in texts]
+        todo = dict(zip(hashes, texts))  # однаковий хеш — однаковий текст
+        with self._lock:
+            cached = self._lookup(list(todo))
+            self._conn.commit()
+            hits = sum(h in cached for h in hashes)
+            self.hits += hits
+            self.misses += len(hashes) - hits
+        for h in cached:
+            del todo[h]
+        return hashes, cached, todo
+
+    def _save(self, fresh: Dict[str, List[float]]):
+        with self._lock:
+            self._store(fresh)
+            self._conn.commit()
+
+    # ---------- Embeddings API ----------
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        hashes, cached, todo = self._prepare(texts)
+        if todo:
+            fresh = dict(zip(todo.keys(), self.inner.embed_documents(list(todo.values()))))
+            self._save(fresh)
+            cached.update(fresh)
+        return [cached[h] for h in hashes]
+
+    def embed_stream(self, text_batches: Iterable[List[str]]) -> Iterator[List[List[float]]]:
+        """
+        Потоковий варіант embed_documents (див. ParallelEmbeddings.embed_stream):
+        у внутрішній ембедер ідуть лише промахи кешу, порядок пачок зберігається.
+        """
+        inner_stream = getattr(self.inner, "embed_stream", None)
+        if inner_stream is None:
+            for texts in text_batches:
+                yield self.embed_documents(texts)
+            return
+
+        pending = deque()
+
+        def misses():
+            for texts in text_batches:
+                hashes, cached, todo = self._prepare(texts)
+                pending.append((hashes, cached, list(todo.keys())))
+                yield list(todo.values())
+
+        for vectors in inner_stream(misses()):
+            hashes, cached, todo_hashes = pending.popleft()
+            if todo_hashes:
+                fresh = dict(zip(todo_hashes, vectors))
+                self._save(fresh)
+                cached.update(fresh)
+            yield [cached[h] for h in hashes]
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Пакетний embed_query: ключі з QUERY_PREFIX, промахи — через embed_queries внутрішнього ембедера."""
+        hashes, cached, todo = self._prepare(texts, QUERY_PREFIX)
+        if todo:
+            fresh = dict(zip(todo.keys(), embed_queries(self.inner, list(todo.values()))))
+            self._save(fresh)
+            cached.update(fresh)
+        return [cached[h] for h in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        h = text_hash(QUERY_PREFIX + text)
+        with self._lock:
+            cached = self._lookup([h])
+            self._conn.commit()
+            if h in cached:
+                self.hits += 1
+                return cached[h]
+            self.misses += 1
+        # модель — без блокування: інші потоки тим часом читають кеш і рахують свої запити
+        vec = self.inner.embed_query(text)
+        self._save({h: vec})
+        return vec
+
+    # ---------- статистика ----------
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else None,
+            "entries": self._count,
+            "max_entries": self.max_entries,
+        }
+
+    def close(self):
+        self._conn.close()
+
+
+def cached_embeddings(inner: Embeddings, model_name: str, db_path: Optional[Path],
+                      max_entries: int = 1_000_000) -> Embeddings:
+    """Обгортає inner кешем; якщо db_path=None — повертає inner без змін."""
+    if db_path is None:
+        return inner
+    return CachedEmbeddings(inner, model_name=model_name, db_path=db_path, max_entries=max_entries)
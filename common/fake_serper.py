@@ -0,0 +1,95 @@
+"""
+Локальна заглушка Serper Places API (aiohttp.web) для тестів і бенчмарків без ключа й мережі.
+
+POST /places {"q": ..., "num": k} -> {"places": [{title, website, rating}, ...]} —
+та сама форма відповіді, що й у google.serper.dev. Рахує запити, унікальні
+TCP-зʼєднання і максимальну к-сть одночасних запитів.
+
+    python -m common.fake_serper --port 8899 --latency 0.2
+    SERPER_BASE_URL=http://127.0.0.1:8899 SERPER_API_KEY=test python "Lesson 5/HW 5.py"
+"""
+import argparse
+import asyncio
+import hashlib
+from dataclasses import dataclass, field
+from typing import Optional, Set
+
+from aiohttp import web
+
+
+@dataclass
+class FakeSerper:
+    runner: web.AppRunner
+    url: str
+    requests: int = 0
+    in_flight: int = 0
+    max_in_flight: int = 0
+    peers: Set = field(default_factory=set)
+
+    async def close(self):
+        await self.runner.cleanup()
+
+
+def fake_places(query: str, num: int):
+    """Детерміновані "заклади" для запиту: ті самі q і num -> та сама відповідь."""
+    seed = int(hashlib.md5(query.encode("utf-8")).hexdigest()[:8], 16)
+    return [{
+        "title": f"{query} #{i + 1}",
+        "website": f"https://example.com/{seed % 1000}/{i}" if (seed + i) % 3 else None,
+        "rating": round(3.5 + ((seed >> i) % 15) / 10, 1),
+    } for i in range(num)]
+
+
+async def start_fake_serper(latency: float = 0.1, host: str = "127.0.0.1", port: int = 0,
+                            api_key: Optional[str] = None) -> FakeSerper:
+    """Піднімає заглушку; url — базова адреса (без /places)."""
+    state: Optional[FakeSerper] = None
+
+    async def places(request: web.Request):
+        if api_key is not None and request.headers.get("X-API-KEY") != api_key:
+            return web.json_response({"message": "Unauthorized."}, status=403)
+        state.requests += 1
+        state.in_flight += 1
+        state.max_in_flight = max(state.max_in_flight, state.in_flight)
+        state.peers.add(request.transport.get_extra_info("peername"))
+        try:
+            body = await request.json()
+            await asyncio.sleep(latency)
+            return web.json_response({"places": fake_places(body["q"], int(body.get("num", 10)))})
+        finally:
+            state.in_flight -= 1
+
+    app = web.Application()
+    app.router.add_post("/places", places)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    state = FakeSerper(runner, f"http://{host}:{port}")
+    return state
+
+
+async def _serve(args):
+    fake = await start_fake_serper(args.latency, args.host, args.port)
+    print(f"Заглушка Serper слухає {fake.url}/places (затримка {args.latency} с)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await fake.close()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Локальна заглушка Serper Places API")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8899)
+    ap.add_argument("--latency", type=float, default=0.2)
+    args = ap.parse_args()
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""
+Детерміністичні ембедінги без моделі — для офлайн-бенчмарків і тестів із фейковою LLM.
+"""
+import hashlib
+import math
+import re
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+
+class HashEmbeddings(Embeddings):
+    """
+    Детерміністична заміна sentence-transformer: хешований bag-of-words,
+    нормалізований до одиничної довжини. Швидко, офлайн, і схожі тексти
+    дають схожі вектори (тож пошук у бенчмарках має сенс).
+    """
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def _embed(self, text: str) -> List[float]:
+        vec = [0.0] * self.dim
+        for tok in re.findall(r"\w+", text.lower()):
+            h = int.from_bytes(hashlib.blake2b(tok.encode("utf-8"), digest_size=8).digest(), "little")
+            vec[h % self.dim] += 1.0 if (h >> 32) & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+        return [v / norm for v in vec]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_documents(texts)
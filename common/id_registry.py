@@ -0,0 +1,163 @@
+"""
+Реєстр ID блоків (заміна ids.json) на SQLite.
+
+- пошук за ID — по первинному ключу, за файлом і префіксом назви блоку — по індексах,
+  з посторінковим обходом за курсором (find);
+- upsert: повторне додавання того самого ID оновлює запис, а не дублює його;
+- кожна операція — окрема коротка транзакція, WAL + busy_timeout дозволяють
+  одночасно писати скрипту індексації та адмінці (різним процесам);
+- старий ids.json імпортується один раз при першому відкритті;
+- generation() — лічильник змін (у meta, тож спільний для всіх процесів): кеш
+  сторінок адмінки інвалідовується за ним, без перечитування колекції.
+"""
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+SQL_BATCH = 500
+GENERATION_KEY = "generation"
+
+
+class IdRegistry:
+    def __init__(self, db_path: Path, legacy_json: Optional[Path] = None):
+        db_path = Path(db_path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=30000")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS items ("
+                " id TEXT PRIMARY KEY, file TEXT, block_title TEXT, updated_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS items_file ON items(file)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS items_file_title ON items(file, block_title, id)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS items_title ON items(block_title, id)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            self._conn.execute("INSERT OR IGNORE INTO meta VALUES (?, 0)", (GENERATION_KEY,))
+        if legacy_json is not None:
+            self.migrate_json(Path(legacy_json))
+
+    # ---------- запис ----------
+    def upsert(self, items: Iterable[Dict]) -> int:
+        """Додає/оновлює записи {id, file, block_title}. Повертає кількість."""
+        now = time.time()
+        rows = [(it["id"], it.get("file"), it.get("block_title"), now) for it in items]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO items (id, file, block_title, updated_at) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT(id) DO UPDATE SET file = excluded.file,"
+                " block_title = excluded.block_title, updated_at = excluded.updated_at",
+                rows,
+            )
+            if rows:
+                self._bump_generation()
+        return len(rows)
+
+    def delete(self, ids: Iterable[str]) -> int:
+        ids = list(ids)
+        deleted = 0
+        with self._lock, self._conn:
+            for i in range(0, len(ids), SQL_BATCH):
+                chunk = ids[i:i + SQL_BATCH]
+                cur = self._conn.execute(f"DELETE FROM items WHERE id IN ({','.join('?' * len(chunk))})", chunk)
+                deleted += cur.rowcount
+            if deleted:
+                self._bump_generation()
+        return deleted
+
+    def _bump_generation(self):
+        # у тій самій транзакції, що й зміна записів
+        self._conn.execute("UPDATE meta SET value = value + 1 WHERE key = ?", (GENERATION_KEY,))
+
+    # ---------- читання ----------
+    def _rows(self, sql: str, params) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [{"id": r[0], "file": r[1], "block_title": r[2]} for r in rows]
+
+    def get(self, doc_id: str) -> Optional[Dict]:
+        rows = self._rows("SELECT id, file, block_title FROM items WHERE id = ?", (doc_id,))
+        return rows[0] if rows else None
+
+    def by_file(self, file_name: str) -> List[Dict]:
+        return self._rows("SELECT id, file, block_title FROM items WHERE file = ?", (file_name,))
+
+    def get_many(self, ids: Iterable[str]) -> List[Dict]:
+        ids = list(ids)
+        out = []
+        for i in range(0, len(ids), SQL_BATCH):
+            chunk = ids[i:i + SQL_BATCH]
+            out += self._rows(f"SELECT id, file, block_title FROM items WHERE id IN ({','.join('?' * len(chunk))})", chunk)
+        return out
+
+    def find(self, file: Optional[str] = None, title_prefix: str = "", limit: int = 100,
+             after: Optional[Tuple[str, str]] = None) -> List[Dict]:
+        """
+        Записи за файлом і/або префіксом block_title (з урахуванням регістру), впорядковані
+        за (block_title, id). after — (block_title, id) останнього запису попередньої сторінки.
+        """
+        where, params = [], []
+        if file is not None:
+            where.append("file = ?")
+            params.append(file)
+        if title_prefix:
+            # діапазон замість LIKE: так SQLite іде по індексу
+            where.append("block_title >= ? AND block_title < ?")
+            params += [title_prefix, title_prefix + "\U0010ffff"]
+        if after is not None:
+            where.append("(block_title, id) > (?, ?)")
+            params += list(after)
+        sql = "SELECT id, file, block_title FROM items"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        return self._rows(sql + " ORDER BY block_title, id LIMIT ?", params + [limit])
+
+    def files(self) -> List[str]:
+        with self._lock:
+            return [r[0] for r in self._conn.execute("SELECT DISTINCT file FROM items ORDER BY file")]
+
+    def generation(self) -> int:
+        """Номер поточної версії реєстру: росте з кожним upsert/delete (і з інших процесів)."""
+        with self._lock:
+            return int(self._conn.execute("SELECT value FROM meta WHERE key = ?", (GENERATION_KEY,)).fetchone()[0])
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+
+    # ---------- сумісність з ids.json ----------
+    def migrate_json(self, json_path: Path) -> int:
+        """
+        Одноразовий імпорт старого ids.json ({"items": [...]}); повторно не виконується.
+        Дублі ID схлопуються в один запис.
+        """
+        if not json_path.exists():
+            return 0
+        key = f"migrated:{json_path.resolve()}"
+        with self._lock:
+            done = self._conn.execute("SELECT 1 FROM meta WHERE key = ?", (key,)).fetchone()
+        if done:
+            return 0
+        try:
+            payload = json.loads(json_path.read_text(encoding="utf-8"))
+            items = [it for it in payload.get("items", []) if isinstance(it, dict) and it.get("id")]
+        except Exception:
+            items = []
+        n = self.upsert(items)
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, str(time.time())))
+        return n
+
+    def export_json(self, json_path: Path):
+        """Вивантажує реєстр у старому форматі ids.json (для ручного перегляду)."""
+        items = self._rows("SELECT id, file, block_title FROM items ORDER BY file, rowid", ())
+        json_path.parent.mkdir(parents=True, exist_ok=True)
+        json_path.write_text(json.dumps({"items": items}, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,244 @@
+"""
+Дворівневий кеш відповідей LLM (SQLite на диску).
+
+1. Точний кеш: однаковий (нормалізований) ключ -> та сама відповідь.
+2. Семантичний кеш: якщо точного збігу немає, ключ ембедиться і порівнюється
+   (косинусна схожість) з уже збереженими; при схожості >= threshold
+   повертається відповідь на "майже таке саме" питання.
+
+Обидва рівні мають TTL та обмеження розміру з витісненням LRU.
+Статистика: влучання по рівнях, промахи, зекономлений час (латентність
+оригінальних викликів, які не довелося повторювати).
+"""
+import asyncio
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+def normalize_key(text: str) -> str:
+    """Нижній регістр, без зайвих пробілів і кінцевої пунктуації."""
+    return re.sub(r"\s+", " ", text.strip().lower()).rstrip(" ?!.")
+
+
+def prompt_to_text(prompt) -> str:
+    """Рядок або список повідомлень LangChain -> текст для ключа кешу."""
+    if isinstance(prompt, str):
+        return prompt
+    if isinstance(prompt, (list, tuple)):
+        return "\n".join(f"{getattr(m, 'type', '')}: {getattr(m, 'content', m)}" for m in prompt)
+    return str(prompt)
+
+
+class ResponseCache:
+    def __init__(self, db_path: Path, namespace: str = "default", embeddings: Optional[Embeddings] = None,
+                 threshold: float = 0.92, ttl_seconds: float = 7 * 24 * 3600, max_entries: int = 10_000):
+        self.namespace = namespace
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self._lock = threading.Lock()
+
+        db_path = Path(db_path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " ns TEXT NOT NULL, key_hash TEXT NOT NULL, key TEXT NOT NULL, response TEXT NOT NULL,"
+                " vec BLOB, latency REAL NOT NULL, created REAL NOT NULL, last_used REAL NOT NULL,"
+                " PRIMARY KEY (ns, key_hash))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses(ns, last_used)")
+        self._purge_expired()
+        self._load_vectors()
+
+    # ---------- внутрішнє ----------
+    def _hash(self, key: str) -> str:
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    def _purge_expired(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses WHERE ns = ? AND created < ?",
+                               (self.namespace, time.time() - self.ttl))
+
+    def _load_vectors(self):
+        """
+        Матриця нормалізованих векторів для семантичного рівня (у памʼяті).
+        get/put викликаються з потоків (CachedLLM.ainvoke), тож матриця і список хешів
+        підміняються разом під замком.
+        """
+        hashes: List[str] = []
+        matrix = None
+        if self.embeddings is not None:
+            with self._lock:
+                rows = self._conn.execute("SELECT key_hash, vec FROM responses WHERE ns = ? AND vec IS NOT NULL",
+                                          (self.namespace,)).fetchall()
+            if rows:
+                hashes = [h for h, _ in rows]
+                matrix = np.vstack([np.frombuffer(v, dtype=np.float32) for _, v in rows])
+        with self._lock:
+            self._vec_hashes, self._matrix = hashes, matrix
+
+    def _hit(self, key_hash: str, latency: float, semantic: bool = False):
+        """Оновлює last_used і лічильники — під тим самим замком, що й решта стану (get з кількох потоків)."""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE ns = ? AND key_hash = ?",
+                               (time.time(), self.namespace, key_hash))
+            if semantic:
+                self.semantic_hits += 1
+            else:
+                self.exact_hits += 1
+            self.saved_seconds += latency
+
+    def _fetch(self, key_hash: str):
+        with self._lock:
+            row = self._conn.execute("SELECT response, latency, created FROM responses WHERE ns = ? AND key_hash = ?",
+                                     (self.namespace, key_hash)).fetchone()
+        if row and time.time() - row[2] > self.ttl:
+            return None
+        return row
+
+    # ---------- API ----------
+    def get(self, key: str) -> Optional[str]:
+        key = normalize_key(key)
+        h = self._hash(key)
+        row = self._fetch(h)
+        if row:
+            self._hit(h, row[1])
+            return row[0]
+
+        with self._lock:  # список хешів лише доповнюється, тож перші len(matrix) відповідають рядкам
+            matrix, hashes = self._matrix, self._vec_hashes
+        if matrix is not None:
+            q = np.asarray(self.embeddings.embed_query(key), dtype=np.float32)
+            q /= np.linalg.norm(q) or 1.0
+            sims = matrix @ q
+            best = int(np.argmax(sims))
+            if sims[best] >= self.threshold:
+                row = self._fetch(hashes[best])
+                if row:
+                    self._hit(hashes[best], row[1], semantic=True)
+                    return row[0]
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, response: str, latency: float = 0.0):
+        key = normalize_key(key)
+        h = self._hash(key)
+        vec = None
+        if self.embeddings is not None:
+            v = np.asarray(self.embeddings.embed_query(key), dtype=np.float32)
+            v /= np.linalg.norm(v) or 1.0
+            vec = v.tobytes()
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                               (self.namespace, h, key, response, vec, latency, now, now))
+            count = self._conn.execute("SELECT COUNT(*) FROM responses WHERE ns = ?", (self.namespace,)).fetchone()[0]
+            evicted = count > self.max_entries
+            if evicted:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE rowid IN (SELECT rowid FROM responses WHERE ns = ?"
+                    " ORDER BY last_used LIMIT ?)", (self.namespace, count - self.max_entries))
+        if evicted:
+            self._load_vectors()
+        elif vec is not None:
+            v = np.frombuffer(vec, dtype=np.float32)[None, :]
+            with self._lock:
+                if h not in self._vec_hashes:
+                    self._matrix = v if self._matrix is None else np.vstack([self._matrix, v])
+                    self._vec_hashes.append(h)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            exact, semantic, misses, saved = self.exact_hits, self.semantic_hits, self.misses, self.saved_seconds
+        total = exact + semantic + misses
+        return {
+            "exact_hits": exact,
+            "semantic_hits": semantic,
+            "misses": misses,
+            "hit_rate": round((exact + semantic) / total, 3) if total else None,
+            "saved_seconds": round(saved, 2),
+        }
+
+
+class CachedLLM:
+    """
+    Обгортка над llm.invoke з кешем. Повертає текст відповіді (str).
+    cache_key — що саме кешувати (напр. лише питання користувача);
+    за замовчуванням — увесь промпт. use_cache=False — виклик повз кеш
+    (відповідь залежить від того, чого немає в ключі, напр. історії розмови).
+    """
+
+    def __init__(self, llm, cache: ResponseCache):
+        self.llm = llm
+        self.cache = cache
+
+    def invoke(self, prompt, cache_key: Optional[str] = None, use_cache: bool = True) -> str:
+        if not use_cache:
+            resp = self.llm.invoke(prompt)
+            return getattr(resp, "content", resp)
+        key = cache_key if cache_key is not None else prompt_to_text(prompt)
+        hit = self.cache.get(key)
+        if hit is not None:
+            return hit
+        t0 = time.perf_counter()
+        resp = self.llm.invoke(prompt)
+        text = getattr(resp, "content", resp)
+        self.cache.put(key, text, latency=time.perf_counter() - t0)
+        return text
+
+    async def ainvoke(self, prompt, cache_key: Optional[str] = None, use_cache: bool = True) -> str:
+        """
+        Асинхронний варіант (llm.ainvoke). get/put кешу блокують (SQLite, ембедінг ключа
+        для семантичного рівня), тож ідуть у потік і не зупиняють event loop для інших сесій.
+        """
+        if not use_cache:
+            resp = await self.llm.ainvoke(prompt)
+            return getattr(resp, "content", resp)
+        key = cache_key if cache_key is not None else prompt_to_text(prompt)
+        hit = await asyncio.to_thread(self.cache.get, key)
+        if hit is not None:
+            return hit
+        t0 = time.perf_counter()
+        resp = await self.llm.ainvoke(prompt)
+        text = getattr(resp, "content", resp)
+        await asyncio.to_thread(self.cache.put, key, text, latency=time.perf_counter() - t0)
+        return text
+
+    def stream(self, prompt, cache_key: Optional[str] = None, use_cache: bool = True) -> Iterator[str]:
+        """
+        Потокова відповідь: при влучанні в кеш — уся відповідь одним шматком,
+        інакше шматки з llm.stream, а зібраний текст після завершення йде в кеш.
+        """
+        if not use_cache:
+            for chunk in self.llm.stream(prompt):
+                yield chunk if isinstance(chunk, str) else getattr(chunk, "content", "")
+            return
+        key = cache_key if cache_key is not None else prompt_to_text(prompt)
+        hit = self.cache.get(key)
+        if hit is not None:
+            yield hit
+            return
+        t0 = time.perf_counter()
+        parts = []
+        for chunk in self.llm.stream(prompt):
+            text = chunk if isinstance(chunk, str) else getattr(chunk, "content", "")
+            parts.append(text)
+            yield text
+        self.cache.put(key, "".join(parts), latency=time.perf_counter() - t0)
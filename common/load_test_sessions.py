@@ -0,0 +1,179 @@
+"""
+Навантажувальний тест сервера сесій (common/session_server.py) на локальних заглушках:
+- "LLM" — асинхронна заглушка з затримкою (як Gemini, але без мережі й ключа);
+- "Serper" — локальний HTTP-сервер (aiohttp.web), до якого бот ходить через
+  спільний aiohttp.ClientSession (пул зʼєднань).
+
+Кожен віртуальний користувач відкриває своє TCP-зʼєднання до сервера сесій і
+робить --turns реплік. Звіт: sessions/sec, turns/sec, p50/p95 латентності репліки,
+затримка event loop (скільки його блокують синхронні виклики), к-сть відмов
+(backpressure) і скільки TCP-зʼєднань реально відкрито до "Serper".
+
+--policy-bot hw1 — замість StubPolicyBot справжній Lesson 1/HW1.py (areply: пошук
+розділів правил, кеш відповідей, памʼять зі стисненням), заглушкою лише LLM; кеш
+відповідей — у тимчасовій теці. Потрібні залежності HW1 (langchain_google_genai,
+sentence-transformers), ключ Gemini не потрібен.
+
+Приклади:
+    python -m common.load_test_sessions --sessions 500 --turns 4 --max-concurrency 64
+    python -m common.load_test_sessions --policy-bot hw1 --sessions 100 --turns 4
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from aiohttp import ClientSession, TCPConnector
+
+from common.chat_memory import ConversationMemory
+from common.fake_serper import start_fake_serper
+from common.llm_cache import CachedLLM, ResponseCache
+from common.session_server import BOT_SCRIPTS, SessionServer, load_bot
+
+
+class StubLLM:
+    def __init__(self, latency: float, jitter: float):
+        self.latency = latency
+        self.jitter = jitter
+
+    async def ainvoke(self, messages):
+        await asyncio.sleep(self.latency + random.random() * self.jitter)
+        return f"Відповідь на: {messages[-1].content}"
+
+    def invoke(self, prompt):
+        """Стиснення історії (make_llm_summarizer) кличе LLM синхронно — з потоку, не з event loop."""
+        time.sleep(self.latency)
+        return "Користувач питав про повернення товару."
+
+
+class StubPolicyBot:
+    """Як HW1: памʼять розмови на сесію + виклик LLM."""
+
+    def __init__(self, llm: StubLLM):
+        self.llm = llm
+
+    def new_session(self):
+        return ConversationMemory(system_instruction="Правила повернення товару…", max_window_tokens=300)
+
+    async def areply(self, memory, text):
+        reply = await self.llm.ainvoke(memory.build_messages(text))
+        memory.add_turn(text, reply)
+        return reply
+
+
+def load_hw1(llm: StubLLM, cache_dir: Path):
+    """Lesson 1/HW1.py як є, але з заглушкою LLM і кешем відповідей у cache_dir."""
+    os.environ.setdefault("GEMINI_API_KEY", "load-test")  # клієнт Gemini створюється, але не викликається
+    hw1 = load_bot(BOT_SCRIPTS["policy"])
+    hw1.llm = llm  # new_session() бере summarizer з hw1.llm
+    hw1.cached_llm = CachedLLM(llm, ResponseCache(cache_dir / "llm_cache.sqlite", namespace="load_test",
+                                                  embeddings=hw1.cache_embeddings, threshold=hw1.CACHE_THRESHOLD,
+                                                  ttl_seconds=hw1.CACHE_TTL))
+    return hw1
+
+
+class StubSearchBot:
+    """Як HW 5: HTTP-запит до "Serper" через спільний пул зʼєднань."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.http = None
+
+    def new_session(self):
+        return {}
+
+    async def areply(self, state, text):
+        if self.http is None:
+            self.http = ClientSession(connector=TCPConnector(limit=100))
+        async with self.http.post(self.url, json={"q": text, "num": 5}) as r:
+            data = await r.json()
+        return "\n".join(p["title"] for p in data["places"])
+
+    async def aclose(self):
+        if self.http is not None:
+            await self.http.close()
+
+
+async def virtual_user(port: int, uid: int, turns: int, latencies: list, errors: list):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    bot = "policy" if uid % 2 == 0 else "restaurants"
+    try:
+        for t in range(turns):
+            req = {"bot": bot, "session": f"u{uid}", "text": f"питання {t} від {uid}"}
+            t0 = time.perf_counter()
+            writer.write((json.dumps(req, ensure_ascii=False) + "\n").encode("utf-8"))
+            await writer.drain()
+            resp = json.loads(await reader.readline())
+            latencies.append(time.perf_counter() - t0)
+            if "error" in resp:
+                errors.append(resp["error"])
+    finally:
+        writer.close()
+
+
+def pct(values, q):
+    s = sorted(values)
+    return s[min(len(s) - 1, int(q / 100 * len(s)))] * 1000 if s else 0.0
+
+
+async def loop_lag(stop: asyncio.Event, lags: list, interval: float = 0.01):
+    """Наскільки пізніше за план прокидається event loop — час, коли його блокував синхронний код."""
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, time.perf_counter() - t0 - interval))
+
+
+async def run(args):
+    serper = await start_fake_serper(args.search_latency)
+    llm = StubLLM(args.llm_latency, args.jitter)
+    tmp = tempfile.TemporaryDirectory()
+    policy = load_hw1(llm, Path(tmp.name)) if args.policy_bot == "hw1" else StubPolicyBot(llm)
+    bots = {"policy": policy, "restaurants": StubSearchBot(serper.url + "/places")}
+    srv = SessionServer(bots, max_concurrency=args.max_concurrency, max_pending=args.max_pending)
+    server = await srv.start("127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+
+    latencies, errors, lags = [], [], []
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(loop_lag(stop, lags))
+    t0 = time.perf_counter()
+    await asyncio.gather(*(virtual_user(port, u, args.turns, latencies, errors) for u in range(args.sessions)))
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    await monitor
+
+    await srv.stop(server)
+    await serper.close()
+    tmp.cleanup()
+
+    print(f"Сесій: {args.sessions} × {args.turns} реплік, max_concurrency={args.max_concurrency}, "
+          f"policy-бот: {args.policy_bot}")
+    print(f"Час: {elapsed:.2f} с  |  sessions/sec: {args.sessions / elapsed:.1f}  |  turns/sec: {len(latencies) / elapsed:.1f}")
+    print(f"Латентність репліки: p50 {pct(latencies, 50):.0f} мс, p95 {pct(latencies, 95):.0f} мс")
+    print(f"Затримка event loop: p95 {pct(lags, 95):.1f} мс, max {max(lags, default=0.0) * 1000:.1f} мс")
+    print(f"Відмов (busy): {errors.count('busy')}, інших помилок: {len(errors) - errors.count('busy')}")
+    print(f"TCP-зʼєднань до Serper-заглушки: {len(serper.peers)} "
+          f"(на {sum(1 for u in range(args.sessions) if u % 2) * args.turns} пошукових запитів)")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sessions", type=int, default=200)
+    ap.add_argument("--turns", type=int, default=3)
+    ap.add_argument("--llm-latency", type=float, default=0.3)
+    ap.add_argument("--jitter", type=float, default=0.2)
+    ap.add_argument("--search-latency", type=float, default=0.1)
+    ap.add_argument("--max-concurrency", type=int, default=64)
+    ap.add_argument("--max-pending", type=int, default=10_000)
+    ap.add_argument("--policy-bot", choices=["stub", "hw1"], default="stub",
+                    help="stub — StubPolicyBot; hw1 — справжній HW1.areply із заглушкою LLM")
+    asyncio.run(run(ap.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
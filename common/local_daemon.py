@@ -0,0 +1,112 @@
+"""
+Локальний демон на Unix-сокеті: тримає "теплі" ресурси (модель ембедінгів, Chroma)
+між викликами консольних утиліт, щоб кожен виклик не платив секунди за імпорти й
+завантаження моделі.
+
+Протокол — один JSON-рядок запиту і один JSON-рядок відповіді на зʼєднання
+(як у common/session_server.py, але без TCP — доступ лише з цієї машини, права 0600):
+    -> {"cmd": "query", "text": "...", "k": 5}
+    <- {"ok": true, "result": ...}   або   {"ok": false, "error": "..."}
+
+Вбудовані команди: ping (аптайм, к-сть запитів), shutdown.
+Модуль навмисно лише на stdlib: клієнт (call) не тягне важких залежностей.
+"""
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+Handler = Callable[[Dict], Any]
+
+
+class DaemonUnavailable(Exception):
+    """Демон не запущений (немає сокета або ніхто не слухає)."""
+
+
+def call(socket_path: Path, cmd: str, timeout: Optional[float] = None, **params) -> Any:
+    """Надсилає команду демону; результат або RuntimeError з текстом помилки демона."""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(str(socket_path))
+    except (FileNotFoundError, ConnectionRefusedError) as e:
+        sock.close()
+        raise DaemonUnavailable(str(socket_path)) from e
+    with sock, sock.makefile("rwb") as f:
+        f.write(json.dumps({"cmd": cmd, **params}, ensure_ascii=False).encode("utf-8") + b"\n")
+        f.flush()
+        line = f.readline()
+    if not line:
+        raise RuntimeError("демон закрив зʼєднання без відповіді")
+    resp = json.loads(line)
+    if not resp.get("ok"):
+        raise RuntimeError(resp.get("error", "невідома помилка"))
+    return resp.get("result")
+
+
+def is_running(socket_path: Path) -> bool:
+    try:
+        call(socket_path, "ping", timeout=2)
+        return True
+    except (DaemonUnavailable, OSError, RuntimeError):
+        return False
+
+
+class _Server(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+def serve(socket_path: Path, handlers: Dict[str, Handler], on_ready: Optional[Callable[[], None]] = None):
+    """
+    Блокує до команди shutdown (або Ctrl+C). handlers — {"назва команди": f(запит) -> результат}.
+    Залишений після аварії сокет видаляється; якщо демон уже працює — RuntimeError.
+    """
+    socket_path = Path(socket_path)
+    if socket_path.exists():
+        if is_running(socket_path):
+            raise RuntimeError(f"демон уже слухає {socket_path}")
+        socket_path.unlink()
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+
+    started = time.time()
+    counters = {"requests": 0, "errors": 0}
+
+    class RequestHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            line = self.rfile.readline()
+            if not line:
+                return
+            counters["requests"] += 1
+            try:
+                req = json.loads(line)
+                cmd = req.get("cmd")
+                if cmd == "ping":
+                    result = {"pid": os.getpid(), "uptime_s": round(time.time() - started, 1), **counters}
+                elif cmd == "shutdown":
+                    threading.Thread(target=server.shutdown, daemon=True).start()
+                    result = "bye"
+                elif cmd in handlers:
+                    result = handlers[cmd](req)
+                else:
+                    raise ValueError(f"невідома команда: {cmd!r}")
+                resp = {"ok": True, "result": result}
+            except Exception as e:
+                counters["errors"] += 1
+                resp = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+            self.wfile.write(json.dumps(resp, ensure_ascii=False).encode("utf-8") + b"\n")
+
+    server = _Server(str(socket_path), RequestHandler)
+    try:
+        os.chmod(socket_path, 0o600)
+        if on_ready is not None:
+            on_ready()
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        socket_path.unlink(missing_ok=True)
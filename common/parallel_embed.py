@@ -0,0 +1,114 @@
+"""
+Паралельний CPU-ембедер для sentence-transformers (напр. all-MiniLM-L6-v2).
+
+- тексти діляться на пачки і розподіляються по пулу процесів,
+  у кожному процесі — своя копія моделі;
+- у межах пачки тексти відсортовані за довжиною (менше паддингу);
+- результати повертаються в початковому порядку;
+- embed_stream тримає кілька пачок "у польоті", тож запис у Chroma
+  поточної пачки йде паралельно з ембедінгом наступних.
+"""
+import multiprocessing as mp
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+_model = None  # модель у процесі-воркері
+
+
+def _init_worker(model_name: str, threads: int):
+    global _model
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    torch.set_num_threads(threads)
+    _model = SentenceTransformer(model_name, device="cpu")
+
+
+def _encode(texts: List[str]) -> List[List[float]]:
+    # ті самі параметри, що й у HuggingFaceEmbeddings за замовчуванням
+    return _model.encode(texts, batch_size=len(texts), show_progress_bar=False).tolist()
+
+
+class ParallelEmbeddings(Embeddings):
+    """
+    Embeddings-сумісний ембедер на пулі процесів.
+    workers — кількість процесів (за замовчуванням — усі ядра),
+    batch_size — скільки текстів іде в один виклик model.encode,
+    threads_per_worker — потоки torch у кожному процесі.
+    """
+
+    def __init__(self, model_name: str, workers: Optional[int] = None, batch_size: int = 64,
+                 threads_per_worker: int = 1, prefetch: int = 2):
+        self.model_name = model_name
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.threads_per_worker = threads_per_worker
+        self.prefetch = prefetch
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: fork після ініціалізації torch може зависнути
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=mp.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.model_name, self.threads_per_worker),
+            )
+        return self._pool
+
+    def _submit(self, texts: List[str]) -> Tuple[int, List[Tuple[List[int], Future]]]:
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        jobs = []
+        for s in range(0, len(order), self.batch_size):
+            idx = order[s:s + self.batch_size]
+            jobs.append((idx, self.pool.submit(_encode, [texts[i] for i in idx])))
+        return len(texts), jobs
+
+    @staticmethod
+    def _collect(submitted: Tuple[int, List[Tuple[List[int], Future]]]) -> List[List[float]]:
+        n, jobs = submitted
+        out: List[List[float]] = [None] * n
+        for idx, fut in jobs:
+            for i, vec in zip(idx, fut.result()):
+                out[i] = vec
+        return out
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._collect(self._submit(list(texts)))
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        # запит кодується так само, як документ (model.encode без префіксів), тож пакетом
+        return self.embed_documents(texts)
+
+    def embed_stream(self, text_batches: Iterable[List[str]]) -> Iterator[List[List[float]]]:
+        """
+        Для кожної пачки текстів віддає її вектори — у тому ж порядку,
+        тримаючи до prefetch наступних пачок в обробці.
+        """
+        pending = deque()
+        for texts in text_batches:
+            pending.append(self._submit(list(texts)))
+            if len(pending) > self.prefetch:
+                yield self._collect(pending.popleft())
+        while pending:
+            yield self._collect(pending.popleft())
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,207 @@
+"""
+RAG для консольних ботів: замість усього документа в промпт іде лише top-k розділів.
+
+- SectionIndex — документи (правила повернення, бази знань) ріжуться на розділи
+  (нумеровані заголовки "1. ..." або блоки через порожні рядки, як у huge_file.txt;
+  задовгі — Chunker-ом), ембедяться один раз і зберігаються на диск (vectors.npy +
+  sections.json). open_or_build() при наступному старті лише звіряє відбиток
+  (вміст файлів + модель + налаштування) і підвантажує індекс без ембедінгу;
+- ChromaSections — той самий інтерфейс search() поверх готової Chroma-колекції HW 6/HW 7;
+- Retriever — top-k з кожного джерела + LRU-кеш результатів за нормалізованим
+  питанням (normalize_key, як у кеші відповідей); stats() — влучання і час пошуку.
+"""
+import hashlib
+import io
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from common.chunker import Chunker, default_title, iter_text_blocks, model_max_tokens, token_counter
+from common.llm_cache import normalize_key
+
+NUMBERED_HEADING_RE = re.compile(r"^\s*\d+\.\s+\S", re.MULTILINE)
+INDEX_VERSION = 1
+
+
+@dataclass
+class Section:
+    text: str
+    title: str
+    source: str
+
+
+def split_sections(text: str, source: str = "") -> List[Section]:
+    """
+    Розділи документа: якщо є нумеровані заголовки ("1. Термін повернення") — по них
+    (преамбула до першого заголовка йде окремим розділом), інакше — блоки iter_text_blocks.
+    """
+    starts = [m.start() for m in NUMBERED_HEADING_RE.finditer(text)]
+    if starts:
+        bounds = ([0] if starts[0] > 0 else []) + starts + [len(text)]
+        parts = [text[a:b].strip() for a, b in zip(bounds, bounds[1:])]
+    else:
+        parts = list(iter_text_blocks(io.StringIO(text)))
+    return [Section(text=p, title=default_title(p), source=source) for p in parts if p]
+
+
+def _normalize_rows(mat: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(mat, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return mat / norms
+
+
+class SectionIndex:
+    """Косинусний пошук по розділах у памʼяті (розділів — сотні-тисячі, тож точний перебір)."""
+
+    def __init__(self, sections: List[Section], vectors: np.ndarray, embeddings: Embeddings):
+        self.sections = sections
+        self.vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self.embeddings = embeddings
+
+    @classmethod
+    def build(cls, paths: Sequence[Path], embeddings: Embeddings,
+              chunker: Optional[Chunker] = None) -> "SectionIndex":
+        sections: List[Section] = []
+        for path in paths:
+            path = Path(path)
+            for sec in split_sections(path.read_text(encoding="utf-8"), source=path.name):
+                if chunker is None:
+                    sections.append(sec)
+                    continue
+                # лише ділимо задовгі розділи; короткі не зливаються (min_tokens=0 у make_chunker)
+                sections += [Section(text=c.text, title=sec.title, source=sec.source)
+                             for c in chunker.chunk_stream([sec.text])]
+        vectors = np.asarray(embeddings.embed_documents([s.text for s in sections]), dtype=np.float32)
+        return cls(sections, _normalize_rows(vectors.reshape(len(sections), -1)), embeddings)
+
+    def save(self, index_dir: Path, fingerprint: str = ""):
+        index_dir = Path(index_dir)
+        index_dir.mkdir(parents=True, exist_ok=True)
+        np.save(index_dir / "vectors.npy", self.vectors)
+        meta = {"version": INDEX_VERSION, "fingerprint": fingerprint, "sections": [asdict(s) for s in self.sections]}
+        (index_dir / "sections.json").write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+
+    @classmethod
+    def load(cls, index_dir: Path, embeddings: Embeddings, fingerprint: Optional[str] = None) -> Optional["SectionIndex"]:
+        """None, якщо індексу немає, він старого формату або відбиток не збігається."""
+        index_dir = Path(index_dir)
+        try:
+            meta = json.loads((index_dir / "sections.json").read_text(encoding="utf-8"))
+            vectors = np.load(index_dir / "vectors.npy")
+        except (OSError, ValueError):
+            return None
+        if meta.get("version") != INDEX_VERSION or (fingerprint is not None and meta.get("fingerprint") != fingerprint):
+            return None
+        return cls([Section(**s) for s in meta["sections"]], vectors, embeddings)
+
+    @classmethod
+    def open_or_build(cls, paths: Sequence[Path], embeddings: Embeddings, index_dir: Path, model_name: str = "",
+                      chunker: Optional[Chunker] = None) -> "SectionIndex":
+        fp = fingerprint(paths, model_name, chunker)
+        index = cls.load(index_dir, embeddings, fp)
+        if index is None:
+            index = cls.build(paths, embeddings, chunker)
+            index.save(index_dir, fp)
+        return index
+
+    def search(self, question: str, k: int = 3) -> List[Tuple[Section, float]]:
+        if not self.sections:
+            return []
+        q = np.asarray(self.embeddings.embed_query(question), dtype=np.float32)
+        q /= np.linalg.norm(q) or 1.0
+        scores = self.vectors @ q
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.sections[i], float(scores[i])) for i in top]
+
+
+class ChromaSections:
+    """Готова Chroma-колекція (HW 6/HW 7) як джерело розділів; score = 1 - distance."""
+
+    def __init__(self, vs):
+        self.vs = vs
+
+    def search(self, question: str, k: int = 3) -> List[Tuple[Section, float]]:
+        return [(Section(text=d.page_content, title=d.metadata.get("block_title", ""), source=d.metadata.get("file", "")),
+                 1.0 - float(dist)) for d, dist in self.vs.similarity_search_with_score(question, k=k)]
+
+
+def fingerprint(paths: Sequence[Path], model_name: str = "", chunker: Optional[Chunker] = None) -> str:
+    h = hashlib.sha256(model_name.encode("utf-8"))
+    if chunker is not None:
+        h.update(f"{chunker.target}:{chunker.budget_max}:{chunker.overlap}".encode())
+    for path in paths:
+        h.update(Path(path).name.encode("utf-8"))
+        h.update(Path(path).read_bytes())
+    return h.hexdigest()
+
+
+def make_chunker(model_name: str = "", max_tokens: Optional[int] = None) -> Chunker:
+    """
+    Ріже лише розділи, довші за вікно моделі; короткі розділи лишаються окремими.
+    Вікно (max_seq_length) і лічильник токенів — від model_name; без неї — оцінка на 256 токенів.
+    """
+    if max_tokens is None:
+        max_tokens = model_max_tokens(model_name) if model_name else 256
+    return Chunker(token_counter(model_name or None), target_tokens=max_tokens * 3 // 4,
+                   max_tokens=max_tokens, min_tokens=0)
+
+
+class Retriever:
+    def __init__(self, sources: Sequence, k: int = 3, cache_size: int = 1024, min_score: float = -1.0):
+        self.sources = list(sources)
+        self.k = k
+        self.cache_size = cache_size
+        self.min_score = min_score
+        self._cache: "OrderedDict[str, List[Tuple[Section, float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.search_seconds = 0.0
+        self.last_ms = 0.0
+        self.last_cached = False
+
+    def retrieve(self, question: str) -> List[Tuple[Section, float]]:
+        """Потокобезпечний: HW1.areply викликає його з потоків asyncio.to_thread."""
+        key = normalize_key(question)
+        t0 = time.perf_counter()
+        with self._lock:
+            found = self._cache.get(key)
+            if found is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+        self.last_cached = found is not None
+        if found is None:
+            found = [(s, score) for src in self.sources for s, score in src.search(question, self.k)
+                     if score >= self.min_score]
+            with self._lock:
+                self.misses += 1
+                self.search_seconds += time.perf_counter() - t0
+                self._cache[key] = found
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        self.last_ms = (time.perf_counter() - t0) * 1000
+        return found
+
+    def context(self, question: str) -> str:
+        """Знайдені розділи одним текстом для системної інструкції."""
+        return "\n\n".join(s.text for s, _ in self.retrieve(question))
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "queries": total,
+            "cache_hits": self.hits,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "avg_search_ms": round(self.search_seconds / self.misses * 1000, 2) if self.misses else 0.0,
+            "cached_questions": len(self._cache),
+        }
@@ -0,0 +1,41 @@
+"""
+Token bucket — обмеження частоти викликів зовнішніх API (LLM, Serper).
+
+rate — скільки викликів на секунду в середньому, burst — скільки можна
+зробити одразу після простою. Є асинхронний (acquire) і синхронний
+(acquire_sync) варіанти; обидва чекають, поки зʼявиться токен.
+"""
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.waited = 0.0  # сумарний час очікування (для статистики)
+
+    def _take(self) -> float:
+        """Забирає токен, якщо є; інакше повертає, скільки секунд чекати."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    async def acquire(self):
+        while (delay := self._take()) > 0:
+            self.waited += delay
+            await asyncio.sleep(delay)
+
+    def acquire_sync(self):
+        while (delay := self._take()) > 0:
+            self.waited += delay
+            time.sleep(delay)
@@ -0,0 +1,148 @@
+"""
+Другий етап пошуку: переранжування кандидатів cross-encoder-ом (CPU).
+
+Бі-енкодер (Chroma / HNSW / гібрид) швидко дає top-N кандидатів, але на текстах
+на кшталт ToS потрібний блок часто стоїть на 8-20 місці. Cross-encoder читає пару
+(запит, блок) разом і оцінює її точніше, але дорожче — тому:
+- оцінюються лише перші candidates кандидатів, пачками по batch_size;
+- max_latency_ms — пачки йдуть у порядку рангу бі-енкодера, і наступна не
+  запускається, якщо (за середнім часом на пару) не вкладеться в ліміт; неоцінені
+  кандидати лишаються після оцінених у вихідному порядку;
+- оцінки кешуються за (нормалізований запит, ID блоку) — LRU у памʼяті,
+  повторний запит не викликає модель зовсім. ID блоку — MD5 вмісту, як у HW 6/HW 7.
+
+Один Reranker спільний для всіх сесій (Streamlit cache_resource), тож candidates і
+max_latency_ms можна передати в rerank()/search() на конкретний виклик, не змінюючи
+обʼєкт; кеш, середній час на пару й лічильники — під замком, last — свій у кожному потоці.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+
+from common.llm_cache import normalize_key
+
+DEFAULT_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+_DEFAULT = object()  # max_latency_ms=None означає "без ліміту", тож "як у конструкторі" — окремий маркер
+
+# scorer(пари (запит, текст)) -> оцінки; більше — релевантніше
+Scorer = Callable[[List[Tuple[str, str]]], Sequence[float]]
+
+
+def content_id(doc: Document) -> str:
+    return hashlib.md5(doc.page_content.encode("utf-8")).hexdigest()
+
+
+class CrossEncoderScorer:
+    """Локальний cross-encoder з sentence-transformers на CPU."""
+
+    def __init__(self, model_name: str = DEFAULT_MODEL, max_length: int = 256, device: str = "cpu"):
+        from sentence_transformers import CrossEncoder
+
+        self.model_name = model_name
+        self.model = CrossEncoder(model_name, max_length=max_length, device=device)
+
+    def __call__(self, pairs: List[Tuple[str, str]]) -> List[float]:
+        return [float(s) for s in self.model.predict(pairs, batch_size=len(pairs), show_progress_bar=False)]
+
+
+class Reranker:
+    def __init__(self, scorer: Scorer, candidates: int = 30, batch_size: int = 16,
+                 max_latency_ms: Optional[float] = None, cache_size: int = 100_000,
+                 id_fn: Callable[[Document], str] = content_id):
+        self.scorer = scorer
+        self.candidates = candidates
+        self.batch_size = batch_size
+        self.max_latency_ms = max_latency_ms
+        self.cache_size = cache_size
+        self.id_fn = id_fn
+        self._cache: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._pair_ms: Optional[float] = None  # ковзне середнє часу моделі на пару
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.totals = {"queries": 0, "scored": 0, "cached": 0, "skipped": 0, "model_ms": 0.0}
+
+    @property
+    def last(self) -> Dict:
+        """Статистика останнього rerank() у цьому потоці (у Streamlit — у цій сесії)."""
+        return getattr(self._local, "last", {})
+
+    def _cached(self, key) -> Optional[float]:
+        score = self._cache.get(key)
+        if score is not None:
+            self._cache.move_to_end(key)
+        return score
+
+    def _remember(self, key, score: float):
+        self._cache[key] = score
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def rerank(self, query: str, docs: Sequence[Document], k: int, candidates: Optional[int] = None,
+               max_latency_ms=_DEFAULT) -> List[Tuple[Document, Optional[float]]]:
+        """
+        (документ, оцінка cross-encoder-а) для top-k; docs — у порядку бі-енкодера.
+        Оцінка None — кандидат не встиг у ліміт часу (стоїть після оцінених).
+        candidates / max_latency_ms — на цей виклик (None у max_latency_ms — без ліміту);
+        не задані — як у конструкторі.
+        """
+        t0 = time.perf_counter()
+        candidates = self.candidates if candidates is None else candidates
+        cap = self.max_latency_ms if max_latency_ms is _DEFAULT else max_latency_ms
+        q = normalize_key(query)
+        pool = list(docs[:max(candidates, k)])
+        keys = [(q, self.id_fn(d)) for d in pool]
+        with self._lock:
+            scores: List[Optional[float]] = [self._cached(key) for key in keys]
+        cached = sum(s is not None for s in scores)
+        todo = [i for i, s in enumerate(scores) if s is None]
+
+        scored, model_ms = 0, 0.0
+        for b in range(0, len(todo), self.batch_size):
+            batch = todo[b:b + self.batch_size]
+            elapsed = (time.perf_counter() - t0) * 1000
+            pair_ms = self._pair_ms
+            if b and cap is not None and pair_ms is not None and elapsed + pair_ms * len(batch) > cap:
+                break  # перша пачка йде завжди, далі — лише якщо вкладаємось у ліміт
+            tb = time.perf_counter()
+            out = self.scorer([(query, pool[i].page_content) for i in batch])
+            batch_ms = (time.perf_counter() - tb) * 1000
+            per_pair = batch_ms / len(batch)
+            model_ms += batch_ms
+            for i, s in zip(batch, out):
+                scores[i] = float(s)
+            with self._lock:
+                self._pair_ms = per_pair if self._pair_ms is None else 0.8 * self._pair_ms + 0.2 * per_pair
+                for i in batch:
+                    self._remember(keys[i], scores[i])
+            scored += len(batch)
+
+        # стабільне сортування: оцінені — за оцінкою, решта — у вихідному порядку після них
+        order = sorted(range(len(pool)), key=lambda i: (scores[i] is None, -(scores[i] or 0.0)))
+        skipped = sum(s is None for s in scores)
+        last = {"candidates": len(pool), "scored": scored, "cached": cached, "skipped": skipped,
+                "model_ms": round(model_ms, 1), "total_ms": round((time.perf_counter() - t0) * 1000, 1)}
+        self._local.last = last
+        with self._lock:
+            self.totals["queries"] += 1
+            for key in ("scored", "cached", "skipped", "model_ms"):
+                self.totals[key] += last[key]
+        return [(pool[i], scores[i]) for i in order[:k]]
+
+    def search(self, retrieve: Callable[[str, int], List[Document]], query: str, k: int,
+               candidates: Optional[int] = None, max_latency_ms=_DEFAULT) -> List[Tuple[Document, Optional[float]]]:
+        """retrieve(запит, n) — перший етап (будь-який режим пошуку); береться max(candidates, k) кандидатів."""
+        n = self.candidates if candidates is None else candidates
+        return self.rerank(query, retrieve(query, max(n, k)), k, candidates=n, max_latency_ms=max_latency_ms)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            t = dict(self.totals)
+            t["cache_entries"] = len(self._cache)
+        pairs = t["scored"] + t["cached"]
+        t["cache_hit_rate"] = round(t["cached"] / pairs, 3) if pairs else 0.0
+        t["model_ms"] = round(t["model_ms"], 1)
+        return t
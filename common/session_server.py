@@ -0,0 +1,165 @@
+"""
+Асинхронний сервер сесій для консольних чат-ботів (HW1, HW 4, HW 5).
+
+- багато одночасних сесій в одному процесі; LLM-клієнт і HTTP-пул спільні;
+- стан кожної сесії окремо (памʼять розмови, замовлення, ...), репліки
+  однієї сесії обробляються по черзі;
+- ліміт одночасних викликів бота (max_concurrency) і backpressure: якщо в
+  черзі вже max_pending реплік, нова отримує відмову "busy" одразу, а не
+  чекає невизначено довго;
+- неактивні сесії видаляються через session_ttl секунд.
+
+Протокол — JSON-рядки по TCP:
+    -> {"bot": "policy", "session": "abc", "text": "Як повернути товар?"}
+    <- {"session": "abc", "reply": "..."}   або   {"session": "abc", "error": "busy"}
+
+Бот — будь-який модуль/обʼєкт з функціями:
+    new_session() -> стан сесії
+    async areply(state, text) -> str
+
+Запуск з реальними ботами:
+    python -m common.session_server --port 8765
+"""
+import argparse
+import asyncio
+import importlib.util
+import inspect
+import json
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+
+BOT_SCRIPTS = {
+    "policy": ROOT / "Lesson 1" / "HW1.py",
+    "pizza": ROOT / "Lesson 4" / "HW 4.py",
+    "restaurants": ROOT / "Lesson 5" / "HW 5.py",
+}
+
+
+class Overloaded(Exception):
+    pass
+
+
+@dataclass
+class Session:
+    state: Any
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    last_seen: float = field(default_factory=time.monotonic)
+    turns: int = 0
+
+
+class SessionServer:
+    def __init__(self, bots: Dict[str, Any], max_concurrency: int = 32, max_pending: int = 256,
+                 session_ttl: float = 1800.0):
+        self.bots = bots
+        self.max_pending = max_pending
+        self.session_ttl = session_ttl
+        self.sessions: Dict[Tuple[str, str], Session] = {}
+        self._sem = asyncio.Semaphore(max_concurrency)
+        self._pending = 0
+        self.served = 0
+        self.rejected = 0
+
+    async def handle_turn(self, bot_name: str, session_id: str, text: str) -> str:
+        bot = self.bots.get(bot_name)
+        if bot is None:
+            raise KeyError(f"невідомий бот: {bot_name}")
+        if self._pending >= self.max_pending:
+            self.rejected += 1
+            raise Overloaded()
+        self._pending += 1
+        try:
+            key = (bot_name, session_id)
+            session = self.sessions.get(key)
+            if session is None:
+                session = self.sessions[key] = Session(state=bot.new_session())
+            session.last_seen = time.monotonic()
+            async with session.lock:           # репліки однієї сесії — по черзі
+                async with self._sem:          # загальний ліміт одночасних викликів
+                    reply = await bot.areply(session.state, text)
+            session.turns += 1
+            self.served += 1
+            return reply
+        finally:
+            self._pending -= 1
+
+    async def _expire_sessions(self):
+        while True:
+            await asyncio.sleep(min(60.0, self.session_ttl))
+            now = time.monotonic()
+            for key in [k for k, s in self.sessions.items() if now - s.last_seen > self.session_ttl and not s.lock.locked()]:
+                del self.sessions[key]
+
+    async def _client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while line := await reader.readline():
+                try:
+                    req = json.loads(line)
+                    sid = str(req.get("session", ""))
+                    resp = {"session": sid, "reply": await self.handle_turn(req["bot"], sid, req["text"])}
+                except Overloaded:
+                    resp = {"session": req.get("session"), "error": "busy"}
+                except Exception as e:
+                    resp = {"error": str(e)}
+                writer.write((json.dumps(resp, ensure_ascii=False) + "\n").encode("utf-8"))
+                await writer.drain()  # повільний клієнт гальмує лише своє зʼєднання
+        except (ConnectionResetError, BrokenPipeError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8765) -> asyncio.AbstractServer:
+        self._expirer = asyncio.create_task(self._expire_sessions())
+        return await asyncio.start_server(self._client, host, port, limit=1 << 20)
+
+    async def stop(self, server: asyncio.AbstractServer):
+        server.close()
+        await server.wait_closed()
+        self._expirer.cancel()
+        for bot in self.bots.values():
+            aclose = getattr(bot, "aclose", None)
+            if aclose is not None and inspect.iscoroutinefunction(aclose):
+                await aclose()
+
+
+def load_bot(path: Path):
+    """Імпортує скрипт бота за шляхом (у назвах папок/файлів є пробіли)."""
+    name = "bot_" + path.stem.replace(" ", "_").lower()
+    spec = importlib.util.spec_from_file_location(name, path)
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules[name] = mod
+    spec.loader.exec_module(mod)
+    return mod
+
+
+async def serve(host: str, port: int, bot_names, max_concurrency: int, max_pending: int):
+    bots = {name: load_bot(BOT_SCRIPTS[name]) for name in bot_names}
+    srv = SessionServer(bots, max_concurrency=max_concurrency, max_pending=max_pending)
+    server = await srv.start(host, port)
+    print(f"Сервер сесій слухає {host}:{port}, боти: {', '.join(bots)}")
+    try:
+        await server.serve_forever()
+    finally:
+        await srv.stop(server)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Асинхронний сервер сесій для чат-ботів")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--bots", nargs="+", default=list(BOT_SCRIPTS), choices=list(BOT_SCRIPTS))
+    ap.add_argument("--max-concurrency", type=int, default=32)
+    ap.add_argument("--max-pending", type=int, default=256)
+    args = ap.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.bots, args.max_concurrency, args.max_pending))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
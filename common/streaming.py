@@ -0,0 +1,93 @@
+"""
+Потокова видача відповідей LLM.
+
+- TimedStream: обгортка над llm.stream(...) / chain.stream(...), що віддає
+  текстові шматки й міряє time-to-first-token (TTFT) і повний час;
+- iter_partial_json: з потоку тексту (у т.ч. в ```json-блоці, як просить
+  StructuredOutputParser) віддає частково розібраний dict щоразу, коли
+  зʼявилось щось нове — поля можна показувати до завершення відповіді.
+"""
+import time
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from langchain_core.utils.json import parse_partial_json
+
+
+def chunk_text(chunk) -> str:
+    """Шматок від LLM (str) чи чат-моделі (AIMessageChunk) -> текст."""
+    return chunk if isinstance(chunk, str) else getattr(chunk, "content", str(chunk))
+
+
+class TimedStream:
+    def __init__(self, chunks: Iterable):
+        self._chunks = chunks
+        self._parts: List[str] = []
+        self.ttft: Optional[float] = None   # секунди до першого непорожнього шматка
+        self.total: Optional[float] = None  # секунди до кінця відповіді
+
+    def __iter__(self) -> Iterator[str]:
+        t0 = time.perf_counter()
+        for chunk in self._chunks:
+            text = chunk_text(chunk)
+            if not text:
+                continue
+            if self.ttft is None:
+                self.ttft = time.perf_counter() - t0
+            self._parts.append(text)
+            yield text
+        self.total = time.perf_counter() - t0
+
+    @property
+    def text(self) -> str:
+        return "".join(self._parts)
+
+    def metrics(self) -> Dict:
+        return {
+            "ttft_ms": round(self.ttft * 1000) if self.ttft is not None else None,
+            "total_ms": round(self.total * 1000) if self.total is not None else None,
+        }
+
+
+def _strip_fence(text: str) -> str:
+    text = text.lstrip()
+    if text.startswith("```"):
+        nl = text.find("\n")
+        text = text[nl + 1:] if nl != -1 else ""
+    end = text.find("```")
+    return text[:end] if end != -1 else text
+
+
+def iter_partial_json(chunks: Iterable) -> Iterator[Dict]:
+    """Віддає dict з уже отриманими полями щоразу, коли він змінюється."""
+    buf = ""
+    last = None
+    for chunk in chunks:
+        buf += chunk_text(chunk)
+        body = _strip_fence(buf)
+        if "{" not in body:
+            continue
+        parsed = parse_partial_json(body[body.index("{"):])
+        if isinstance(parsed, dict) and parsed != last:
+            last = parsed
+            yield parsed
+
+
+class TTFTStats:
+    """Накопичує TTFT по репліках для підсумку сесії."""
+
+    def __init__(self):
+        self.samples: List[float] = []
+
+    def add(self, stream: TimedStream):
+        if stream.ttft is not None:
+            self.samples.append(stream.ttft)
+
+    def summary(self) -> Dict:
+        if not self.samples:
+            return {"turns": 0}
+        s = sorted(self.samples)
+        return {
+            "turns": len(s),
+            "ttft_avg_ms": round(sum(s) / len(s) * 1000),
+            "ttft_p95_ms": round(s[min(len(s) - 1, int(0.95 * len(s)))] * 1000),
+        }
@@ -0,0 +1,166 @@
+"""
+Компактний структурований вивід замість StructuredOutputParser.
+
+- get_format_instructions(): один рядок-шаблон JSON замість багаторядкового
+  опису схеми з ```json-блоком — менше токенів у кожному промпті;
+- parse(): швидкий локальний розбір з виправленням типових помилок моделі
+  (незакритий чи відсутній ```-блок, текст навколо JSON, "розумні" лапки,
+  одинарні лапки, коми в кінці, пропущені коми між полями, // коментарі зі
+  схеми) — без повторного запиту до LLM; з обірваної відповіді беруться лише
+  поля, що дійшли повністю, тож обірване поле схеми — це помилка, а не урізане значення;
+- перевірка полів з ResponseSchema: обовʼязкова наявність, ключі без
+  урахування регістру, type="list" приводиться до списку.
+
+Сумісний з LangChain (prompt | llm | parser), підміняє StructuredOutputParser:
+
+    parser = CompactOutputParser.from_response_schemas(schemas)
+    prompt = PromptTemplate.from_template("...{instructions}",
+                                          partial_variables={"instructions": parser.get_format_instructions()})
+"""
+import ast
+import json
+import re
+from typing import Any, Dict, List, Sequence, Tuple
+
+from langchain_core.exceptions import OutputParserException
+from langchain_core.output_parsers import BaseOutputParser
+from langchain_core.utils.json import parse_partial_json
+from pydantic import Field
+
+LIST_TYPES = {"list", "array", "List[string]", "list[str]"}
+
+FENCE_RE = re.compile(r"```[a-zA-Z]*\s*\n?(.*?)(?:```|$)", re.DOTALL)
+# "розумні" лапки лише там, де вони обмежують ключ чи значення JSON
+SMART_QUOTE_RE = re.compile(r'(?<=[{\[,:])(\s*)[“”„]|[“”„](?=\s*[:,}\]])')
+TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+MISSING_COMMA_RE = re.compile(r'(["\]}]|\d|true|false|null)(\s*\n\s*)(?=")')
+LINE_COMMENT_RE = re.compile(r'(?<=[\s,])//[^\n"]*$', re.MULTILINE)
+BULLET_RE = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s*")
+
+
+def _json_body(text: str) -> str:
+    """Текст відповіді -> фрагмент від першої { до останньої } (з ```-блоку, якщо він є)."""
+    m = FENCE_RE.search(text)
+    if m and "{" in m.group(1):
+        text = m.group(1)
+    start = text.find("{")
+    if start == -1:
+        return text.strip()
+    end = text.rfind("}")
+    return text[start:end + 1] if end > start else text[start:]
+
+
+def _loads(body: str):
+    try:
+        return json.loads(body, strict=False)  # strict=False: переноси рядків усередині значень
+    except json.JSONDecodeError:
+        return None
+
+
+def _python_literal(body: str):
+    """{'a': 'b', 'c': True} — модель відповіла словником Python."""
+    fixed = re.sub(r"\btrue\b", "True", re.sub(r"\bfalse\b", "False", re.sub(r"\bnull\b", "None", body)))
+    try:
+        value = ast.literal_eval(fixed)
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        return None
+    return value if isinstance(value, dict) else None
+
+
+def _complete_fields(body: str, value: Dict) -> Dict:
+    """
+    Поля обірваної відповіді, що дійшли повністю. Якщо бракує лише закриваючої дужки
+    обʼєкта — усі; інакше останнє поле могло обірватись посеред значення (рядок,
+    список) — його відкидаємо.
+    """
+    if _loads(body.rstrip().rstrip(",") + "}") is not None:
+        return value
+    last = next(reversed(value))
+    return {k: v for k, v in value.items() if k != last}
+
+
+def extract_json(text: str) -> Tuple[Any, str]:
+    """
+    Повертає (обʼєкт, як_розібрано): "strict" — валідний JSON одразу,
+    "repaired" — після виправлень, "partial" — повні поля обірваної відповіді.
+    Якщо нічого не вийшло — OutputParserException.
+    """
+    body = _json_body(text)
+    value = _loads(body)
+    if value is not None:
+        return value, "strict"
+
+    fixed = SMART_QUOTE_RE.sub(r'\1"', body)
+    fixed = LINE_COMMENT_RE.sub("", fixed)
+    fixed = MISSING_COMMA_RE.sub(r"\1,\2", fixed)
+    fixed = TRAILING_COMMA_RE.sub(r"\1", fixed)
+    for candidate in (fixed, body):
+        value = _loads(candidate)
+        if value is None:
+            value = _python_literal(candidate)
+        if value is not None:
+            return value, "repaired"
+
+    try:
+        value = parse_partial_json(fixed, strict=False) if fixed.startswith("{") else None
+    except json.JSONDecodeError:
+        value = None
+    if isinstance(value, dict) and value:
+        return _complete_fields(fixed, value), "partial"
+    raise OutputParserException(f"Не вдалося знайти JSON у відповіді: {text[:200]!r}", llm_output=text)
+
+
+def _to_list(value) -> List:
+    if isinstance(value, list):
+        return value
+    if isinstance(value, str):
+        sep = "\n" if "\n" in value.strip() else ","
+        return [BULLET_RE.sub("", part).strip() for part in value.split(sep) if part.strip()]
+    return [value]
+
+
+class CompactOutputParser(BaseOutputParser[Dict[str, Any]]):
+    response_schemas: List[Any]
+    stats: Dict[str, int] = Field(default_factory=lambda: {"strict": 0, "repaired": 0, "partial": 0, "failed": 0})
+
+    @classmethod
+    def from_response_schemas(cls, response_schemas: Sequence) -> "CompactOutputParser":
+        return cls(response_schemas=list(response_schemas))
+
+    def get_format_instructions(self) -> str:
+        fields = []
+        for rs in self.response_schemas:
+            placeholder = f"[<{rs.description}>]" if rs.type in LIST_TYPES else f'"<{rs.description}>"'
+            fields.append(f'"{rs.name}": {placeholder}')
+        return "Відповідай лише JSON без пояснень: {" + ", ".join(fields) + "}"
+
+    def parse(self, text: str) -> Dict[str, Any]:
+        try:
+            value, how = extract_json(text)
+        except OutputParserException:
+            self.stats["failed"] += 1
+            raise
+        if not isinstance(value, dict):
+            self.stats["failed"] += 1
+            raise OutputParserException(f"Очікувався JSON-обʼєкт, отримано {type(value).__name__}", llm_output=text)
+
+        by_lower = {str(k).strip().lower(): k for k in value}
+        out, used, missing = {}, set(), []
+        for rs in self.response_schemas:
+            key = rs.name if rs.name in value else by_lower.get(rs.name.lower())
+            if key is None:
+                missing.append(rs.name)
+                continue
+            used.add(key)
+            out[rs.name] = _to_list(value[key]) if rs.type in LIST_TYPES else value[key]
+        if missing:
+            self.stats["failed"] += 1
+            cut = " (відповідь обірвана)" if how == "partial" else ""
+            raise OutputParserException(f"У відповіді немає полів{cut}: {', '.join(missing)}", llm_output=text)
+        out.update((k, v) for k, v in value.items() if k not in used)
+        self.stats[how] += 1
+        return out
+
+    @property
+    def _type(self) -> str:
+        return "compact_structured_output"
@@ -0,0 +1,270 @@
+"""
+Компактний знімок Chroma-колекції у плоских файлах, які відкриваються через mmap.
+
+Каталог знімка:
+    manifest.json          — формат, dim, к-сть, тип векторів, метрика, список файлів-джерел
+    vectors.npy            — вектори: float32 | float16 | int8 (симетрично, своя шкала на вектор)
+    scales.npy             — шкали int8 (float32, лише для int8)
+    sq_norms.npy           — ||x||^2 оригінальних float32-векторів (для l2)
+    file_idx.npy           — номер файлу-джерела в manifest["files"] (int32, -1 — немає)
+    ids.bin / ids.off.npy  — ID блоків: UTF-8 підряд + зсуви (uint64, n + 1)
+    titles.bin / .off.npy  — block_title
+    docs.bin / .off.npy    — тексти блоків
+
+Відкриття знімка (VectorSnapshot.open) нічого не читає наперед: усі масиви — np.load
+з mmap_mode="r", тексти декодуються лише для знайдених блоків. Точний пошук іде
+блоками рядків: порція матриці перетворюється у float32 і множиться на запити,
+тож памʼять не залежить від розміру колекції.
+
+export_snapshot() / import_snapshot() — з Chroma у знімок і назад (ID, документи,
+метадані file/block_title і вектори; з int8/float16 назад імпортуються відновлені,
+тобто наближені вектори).
+"""
+import json
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+FORMAT_VERSION = 1
+DTYPES = ("float32", "float16", "int8")
+PAGE = 5000         # скільки записів тягнути з Chroma за один get / писати в Chroma за один upsert
+ROW_BLOCK = 32768   # рядків матриці на одне перетворення у float32 під час пошуку
+QUERY_CHUNK = 256   # запитів на одне матричне множення
+
+
+# ---------- рядкові колонки ----------
+class _StringWriter:
+    def __init__(self, dir_path: Path, name: str):
+        self._bin = open(dir_path / f"{name}.bin", "wb")
+        self._off_path = dir_path / f"{name}.off.npy"
+        self._offsets = [0]
+
+    def extend(self, values: Iterable[Optional[str]]):
+        for v in values:
+            data = (v or "").encode("utf-8")
+            self._bin.write(data)
+            self._offsets.append(self._offsets[-1] + len(data))
+
+    def close(self):
+        self._bin.close()
+        np.save(self._off_path, np.asarray(self._offsets, dtype=np.uint64))
+
+
+class _StringColumn:
+    """Колонка рядків поверх mmap: рядок i = data[off[i]:off[i + 1]]."""
+
+    def __init__(self, dir_path: Path, name: str):
+        self._off = np.load(dir_path / f"{name}.off.npy", mmap_mode="r")
+        size = int(self._off[-1])
+        self._data = np.memmap(dir_path / f"{name}.bin", dtype=np.uint8, mode="r") if size else np.zeros(0, np.uint8)
+
+    def __len__(self) -> int:
+        return len(self._off) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return self._data[int(self._off[i]):int(self._off[i + 1])].tobytes().decode("utf-8")
+
+
+# ---------- квантування ----------
+def quantize(vectors: np.ndarray, dtype: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """float32 -> (коди, шкали). int8: x ≈ codes * scale, scale = max|x| / 127 для кожного вектора."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dtype == "float32":
+        return vectors, None
+    if dtype == "float16":
+        return vectors.astype(np.float16), None
+    if dtype != "int8":
+        raise ValueError(f"невідомий тип векторів: {dtype} (є: {', '.join(DTYPES)})")
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.rint(vectors / scales[:, None]).clip(-127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def write_snapshot(dir_path: Path, batches: Iterable[Tuple[List[str], np.ndarray, List[str], List[Dict]]],
+                   count: int, dim: int, dtype: str = "int8", space: str = "l2", extra: Optional[Dict] = None) -> Dict:
+    """
+    Пише знімок потоково: batches — (ids, vectors, documents, metadatas) порціями,
+    count і dim потрібні наперед (vectors.npy створюється одразу потрібного розміру).
+    """
+    if dtype not in DTYPES:
+        raise ValueError(f"невідомий тип векторів: {dtype} (є: {', '.join(DTYPES)})")
+    dir_path = Path(dir_path)
+    dir_path.mkdir(parents=True, exist_ok=True)
+    vectors = np.lib.format.open_memmap(dir_path / "vectors.npy", mode="w+", dtype=np.dtype(dtype), shape=(count, dim))
+    scales = np.lib.format.open_memmap(dir_path / "scales.npy", mode="w+", dtype=np.float32, shape=(count,)) \
+        if dtype == "int8" else None
+    sq_norms = np.lib.format.open_memmap(dir_path / "sq_norms.npy", mode="w+", dtype=np.float32, shape=(count,))
+    file_idx = np.lib.format.open_memmap(dir_path / "file_idx.npy", mode="w+", dtype=np.int32, shape=(count,))
+    ids, titles, docs = (_StringWriter(dir_path, n) for n in ("ids", "titles", "docs"))
+    files: Dict[str, int] = {}
+
+    n = 0
+    for batch_ids, batch_vecs, batch_docs, batch_metas in batches:
+        batch_vecs = np.asarray(batch_vecs, dtype=np.float32)
+        end = n + len(batch_ids)
+        if end > count:
+            raise ValueError(f"записів більше, ніж оголошено ({count})")
+        codes, batch_scales = quantize(batch_vecs, dtype)
+        vectors[n:end] = codes
+        if scales is not None:
+            scales[n:end] = batch_scales
+        sq_norms[n:end] = (batch_vecs ** 2).sum(axis=1)
+        metas = [m or {} for m in batch_metas]
+        file_idx[n:end] = [files.setdefault(m["file"], len(files)) if m.get("file") is not None else -1
+                           for m in metas]
+        ids.extend(batch_ids)
+        titles.extend(m.get("block_title") for m in metas)
+        docs.extend(batch_docs)
+        n = end
+    if n != count:
+        raise ValueError(f"записано {n} із оголошених {count}")
+
+    for arr in (vectors, scales, sq_norms, file_idx):
+        if arr is not None:
+            arr.flush()
+    for col in (ids, titles, docs):
+        col.close()
+    manifest = {"format_version": FORMAT_VERSION, "count": count, "dim": dim, "dtype": dtype, "space": space,
+                "files": list(files), "created": time.time(), **(extra or {})}
+    (dir_path / "manifest.json").write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    return manifest
+
+
+def _collection_pages(collection, page: int) -> Iterator[Tuple[List[str], np.ndarray, List[str], List[Dict]]]:
+    offset = 0
+    while True:
+        res = collection.get(limit=page, offset=offset, include=["embeddings", "documents", "metadatas"])
+        if not res["ids"]:
+            break
+        offset += len(res["ids"])
+        yield res["ids"], np.asarray(res["embeddings"], dtype=np.float32), res["documents"], res["metadatas"]
+
+
+def export_snapshot(collection, dir_path: Path, dtype: str = "int8", page: int = PAGE) -> Dict:
+    """chromadb.Collection -> знімок (посторінково, без завантаження всієї колекції в памʼять)."""
+    count = collection.count()
+    first = collection.get(limit=1, include=["embeddings"])
+    dim = len(first["embeddings"][0]) if count else 0
+    space = (collection.metadata or {}).get("hnsw:space", "l2")
+    return write_snapshot(dir_path, _collection_pages(collection, page), count, dim, dtype=dtype, space=space,
+                          extra={"collection": collection.name})
+
+
+def import_snapshot(dir_path: Path, collection, batch_size: int = PAGE) -> int:
+    """Знімок -> chromadb.Collection (upsert пачками; для int8/float16 — відновлені вектори)."""
+    snap = VectorSnapshot.open(dir_path)
+    for s in range(0, len(snap), batch_size):
+        rows = range(s, min(s + batch_size, len(snap)))
+        collection.upsert(ids=[snap.ids[i] for i in rows],
+                          embeddings=snap.vectors_f32(rows.start, rows.stop).tolist(),
+                          documents=[snap.docs[i] for i in rows],
+                          metadatas=[snap.metadata(i) for i in rows])
+    return len(snap)
+
+
+# ---------- читання і пошук ----------
+class VectorSnapshot:
+    def __init__(self, dir_path: Path, manifest: Dict):
+        dir_path = Path(dir_path)
+        self.dir = dir_path
+        self.manifest = manifest
+        self.dtype = manifest["dtype"]
+        self.space = manifest["space"]
+        self.vectors = np.load(dir_path / "vectors.npy", mmap_mode="r")
+        self.scales = np.load(dir_path / "scales.npy", mmap_mode="r") if self.dtype == "int8" else None
+        self.sq_norms = np.load(dir_path / "sq_norms.npy", mmap_mode="r")
+        self.file_idx = np.load(dir_path / "file_idx.npy", mmap_mode="r")
+        self.ids = _StringColumn(dir_path, "ids")
+        self.titles = _StringColumn(dir_path, "titles")
+        self.docs = _StringColumn(dir_path, "docs")
+        self.files = manifest["files"]
+
+    @classmethod
+    def open(cls, dir_path: Path) -> "VectorSnapshot":
+        manifest = json.loads((Path(dir_path) / "manifest.json").read_text(encoding="utf-8"))
+        if manifest.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"невідома версія знімка: {manifest.get('format_version')}")
+        return cls(dir_path, manifest)
+
+    def __len__(self) -> int:
+        return self.manifest["count"]
+
+    def vectors_f32(self, start: int, stop: int) -> np.ndarray:
+        """Відновлені float32-вектори рядків [start, stop)."""
+        block = np.asarray(self.vectors[start:stop], dtype=np.float32)
+        if self.scales is not None:
+            block *= self.scales[start:stop, None]
+        return block
+
+    def metadata(self, i: int) -> Dict:
+        f = int(self.file_idx[i])
+        meta = {"block_title": self.titles[i]}
+        if f >= 0:  # Chroma не приймає None у метаданих
+            meta["file"] = self.files[f]
+        return meta
+
+    def document(self, i: int) -> Document:
+        return Document(page_content=self.docs[i], metadata={"id": self.ids[i], **self.metadata(i)})
+
+    def _search_rows(self, q: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Точний top-k для порції запитів: обхід матриці блоками рядків зі злиттям кандидатів."""
+        n = len(self)
+        best_idx = np.zeros((len(q), 0), dtype=np.int64)
+        best_dist = np.zeros((len(q), 0), dtype=np.float32)
+        qn = np.linalg.norm(q, axis=1, keepdims=True) if self.space == "cosine" else None
+        for start in range(0, n, ROW_BLOCK):
+            stop = min(start + ROW_BLOCK, n)
+            dist = q @ self.vectors_f32(start, stop).T
+            if self.space == "l2":
+                dist *= -2.0
+                dist += self.sq_norms[start:stop][None, :]
+            elif self.space == "cosine":
+                xn = np.sqrt(self.sq_norms[start:stop])
+                dist /= -np.where(xn == 0, 1.0, xn)[None, :] * qn
+            else:  # "ip"
+                dist *= -1.0
+            kk = min(k, stop - start)
+            part = np.argpartition(dist, kk - 1, axis=1)[:, :kk]
+            best_idx = np.hstack([best_idx, part + start])
+            best_dist = np.hstack([best_dist, np.take_along_axis(dist, part, axis=1)])
+            if best_idx.shape[1] > k:
+                keep = np.argpartition(best_dist, k - 1, axis=1)[:, :k]
+                best_idx = np.take_along_axis(best_idx, keep, axis=1)
+                best_dist = np.take_along_axis(best_dist, keep, axis=1)
+        order = np.argsort(best_dist, axis=1)
+        best_idx = np.take_along_axis(best_idx, order, axis=1)
+        best_dist = np.take_along_axis(best_dist, order, axis=1)
+        # та сама шкала відстаней, що й у VectorIndex / Chroma
+        shift = (q ** 2).sum(axis=1)[:, None] if self.space == "l2" else 1.0
+        return best_idx, best_dist + shift
+
+    def search_rows(self, query_vectors, k: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+        """Номери рядків і відстані top-k для кожного запиту, найближчі першими."""
+        q = np.atleast_2d(np.asarray(query_vectors, dtype=np.float32))
+        k = min(k, len(self))
+        if k == 0:
+            return np.zeros((len(q), 0), np.int64), np.zeros((len(q), 0), np.float32)
+        parts = [self._search_rows(q[i:i + QUERY_CHUNK], k) for i in range(0, len(q), QUERY_CHUNK)]
+        return np.vstack([p[0] for p in parts]), np.vstack([p[1] for p in parts])
+
+    def search_vectors(self, query_vectors, k: int = 5, exact: bool = True) -> List[List[Tuple[str, float]]]:
+        """Як VectorIndex.search_vectors: для кожного запиту [(id, distance)] (пошук завжди точний)."""
+        rows, dists = self.search_rows(query_vectors, k)
+        return [[(self.ids[int(r)], float(d)) for r, d in zip(rr, dr)] for rr, dr in zip(rows, dists)]
+
+    def set_ef(self, ef_search: int):
+        """Сумісність з VectorIndex (у знімку немає HNSW)."""
+
+    def similarity_search_with_score(self, query_vector: Sequence[float], k: int = 5) -> List[Tuple[Document, float]]:
+        rows, dists = self.search_rows(query_vector, k)
+        return [(self.document(int(r)), float(d)) for r, d in zip(rows[0], dists[0])]
+
+    def nbytes(self) -> Dict[str, int]:
+        """Розмір файлів знімка на диску, байт (вектори окремо від решти)."""
+        sizes = {p.name: p.stat().st_size for p in self.dir.iterdir() if p.is_file()}
+        vec = sum(sizes.get(n, 0) for n in ("vectors.npy", "scales.npy", "sq_norms.npy"))
+        return {"vectors": vec, "total": sum(sizes.values())}